@@ -0,0 +1,4 @@
+"""Benchmarks for the weather service layer.
+
+Run from the ``mod6_labs`` directory, e.g. ``python -m benchmarks.connections``.
+"""
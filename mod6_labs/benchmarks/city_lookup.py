@@ -0,0 +1,93 @@
+"""Build, open and query cost of the offline city index.
+
+Builds an index over a synthetic city list the size of OpenWeatherMap's
+``city.list.json`` and reports the file size, the time to open it, the
+latency of the prefix searches behind each keystroke, of lookups by ID and
+of nearest-city lookups by coordinate, compared with linear scans over the
+decoded list.
+
+Usage::
+
+    python -m benchmarks.city_lookup [--cities 200000] [--queries 2000]
+"""
+
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.common import percentile
+from city_index import CityIndex, build_index, distance_km, normalize_name
+
+
+def make_cities(count: int, seed: int = 1) -> List[Dict]:
+    rng = random.Random(seed)
+    cities = []
+    for city_id in range(1, count + 1):
+        name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12))).title()
+        cities.append({
+            "id": city_id * 7,
+            "name": name,
+            "state": "",
+            "country": rng.choice(["US", "GB", "PH", "DE", "JP", "BR"]),
+            "coord": {"lon": rng.uniform(-180, 180), "lat": rng.uniform(-90, 90)},
+        })
+    return cities
+
+
+def timed(func, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cities", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    cities = make_cities(args.cities)
+    rng = random.Random(2)
+    prefixes = [rng.choice(cities)["name"][:rng.randint(1, 4)] for _ in range(args.queries)]
+    ids = [rng.choice(cities)["id"] for _ in range(args.queries)]
+    points = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "city_index.bin")
+        build_seconds = timed(build_index, cities, path)
+        started = time.perf_counter()
+        index = CityIndex(path)
+        open_seconds = time.perf_counter() - started
+
+        search = [timed(index.search, prefix, 6) for prefix in prefixes]
+        get = [timed(index.get, city_id) for city_id in ids]
+        nearest = [timed(index.nearest, lat, lon) for lat, lon in points]
+
+        def scan(prefix):
+            key = normalize_name(prefix)
+            return [c for c in cities if normalize_name(c["name"]).startswith(key)][:6]
+
+        def nearest_scan(lat, lon):
+            return min(cities, key=lambda c: distance_km(lat, lon, c["coord"]["lat"], c["coord"]["lon"]))
+
+        scan_times = [timed(scan, prefix) for prefix in prefixes[:20]]
+        nearest_scan_times = [timed(nearest_scan, lat, lon) for lat, lon in points[:5]]
+
+        print(f"cities:          {len(index)}")
+        print(f"index size:      {os.path.getsize(path) / 1024 / 1024:.1f} MiB")
+        print(f"build:           {build_seconds:.2f} s")
+        print(f"open:            {open_seconds * 1000:.3f} ms")
+        print(f"search p50/p99:  {percentile(search, 50) * 1e6:.1f} / {percentile(search, 99) * 1e6:.1f} µs")
+        print(f"get p50/p99:     {percentile(get, 50) * 1e6:.1f} / {percentile(get, 99) * 1e6:.1f} µs")
+        print(f"nearest p50/p99: {percentile(nearest, 50) * 1e6:.1f} / {percentile(nearest, 99) * 1e6:.1f} µs")
+        print(f"linear scan p50: {percentile(scan_times, 50) * 1000:.1f} ms search, "
+              f"{percentile(nearest_scan_times, 50) * 1000:.1f} ms nearest")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Helpers shared by the benchmarks."""
+
+import math
+import os
+from typing import Sequence
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+from fake_owm_server import FakeWeatherServer  # noqa: E402
+from weather_service import WeatherService  # noqa: E402
+
+
+def make_service(server: FakeWeatherServer, **kwargs) -> WeatherService:
+    """A service pointed at ``server`` with client-side rate limiting off."""
+    service = WeatherService(
+        base_url=server.weather_url, forecast_url=server.forecast_url, **kwargs
+    )
+    service.rate_limiter = None  # measure the transport, not the quota
+    return service
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (``pct`` in 0-100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
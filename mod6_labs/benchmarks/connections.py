@@ -0,0 +1,65 @@
+"""Count TCP connections opened for back-to-back weather + forecast lookups.
+
+Compares a fresh client per request (the previous behaviour) with the shared
+pooled client now held by ``WeatherService``, against the local stand-in
+server so no API key or network access is needed. The response cache is
+bypassed so every lookup really goes over the wire.
+
+Usage::
+
+    python -m benchmarks.connections [--lookups 20]
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import make_service
+from fake_owm_server import FakeWeatherServer
+
+CITIES = ["London", "Tokyo", "Nabua", "New York", "Paris"]
+
+
+async def per_request_client(server: FakeWeatherServer, lookups: int):
+    """Open and close a client around every single request."""
+    for i in range(lookups):
+        city = CITIES[i % len(CITIES)]
+        async with make_service(server) as service:
+            await service.get_weather(city, "metric", bypass_cache=True)
+        async with make_service(server) as service:
+            await service.get_forecast(city, "metric", bypass_cache=True)
+
+
+async def shared_client(server: FakeWeatherServer, lookups: int):
+    """Reuse one service (and its connection pool) for every request."""
+    async with make_service(server) as service:
+        for i in range(lookups):
+            city = CITIES[i % len(CITIES)]
+            await service.get_weather(city, "metric", bypass_cache=True)
+            await service.get_forecast(city, "metric", bypass_cache=True)
+
+
+def run(scenario, lookups: int):
+    with FakeWeatherServer() as server:
+        started = time.perf_counter()
+        asyncio.run(scenario(server, lookups))
+        elapsed = time.perf_counter() - started
+        return server.connections, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=20,
+                        help="weather + forecast pairs to fetch")
+    args = parser.parse_args()
+
+    requests = args.lookups * 2
+    print(f"{'scenario':<20}{'requests':>10}{'connections':>13}{'seconds':>10}")
+    for name, scenario in (("per-request client", per_request_client),
+                           ("shared client", shared_client)):
+        connections, elapsed = run(scenario, args.lookups)
+        print(f"{name:<20}{requests:>10}{connections:>13}{elapsed:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Daily aggregation speed: pure Python vs. NumPy.
+
+Builds synthetic hourly forecasts of increasing length (the 5-day forecast
+is 40 steps; hourly and climate endpoints return thousands) and times
+``aggregate_daily`` on both code paths. The NumPy column is skipped when
+NumPy is not installed.
+
+Usage::
+
+    python -m benchmarks.forecast_aggregate [--hours 40 1000 100000]
+"""
+
+import argparse
+import random
+import time
+from typing import Optional
+
+import forecast_aggregate
+from forecast_model import Forecast
+
+CONDITIONS = [(800, "01d", "clear sky"), (803, "04d", "broken clouds"),
+              (500, "10d", "light rain"), (600, "13d", "light snow")]
+
+
+def hourly_forecast(hours: int, seed: int = 0) -> Forecast:
+    """A Forecast with one step per hour in a UTC+05:30 city."""
+    rng = random.Random(seed)
+    forecast = Forecast(city="Benchmark", timezone=19800)
+    for hour in range(hours):
+        temp = 285 + 8 * rng.random()
+        code, icon, description = rng.choice(CONDITIONS)
+        forecast.dt.append(1700000000 + hour * 3600)
+        for column in (forecast.temp, forecast.feels_like, forecast.temp_min, forecast.temp_max):
+            column.append(temp)
+        forecast.humidity.append(60)
+        forecast.wind_speed.append(10 * rng.random())
+        forecast.pop.append(rng.random())
+        forecast.precipitation.append(rng.random() if code < 800 else 0.0)
+        forecast.condition_id.append(code)
+        forecast.icon.append(icon)
+        forecast.description.append(description)
+    return forecast
+
+
+def best_time(forecast: Forecast, use_numpy: bool, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        forecast_aggregate.aggregate_daily(forecast, use_numpy=use_numpy)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=int, nargs="+", default=[40, 1000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    has_numpy = forecast_aggregate.load_numpy() is not None
+    print(f"{'hours':>8}{'days':>7}{'python ms':>11}{'numpy ms':>10}")
+    for hours in args.hours:
+        forecast = hourly_forecast(hours)
+        days = len(forecast_aggregate.aggregate_daily(forecast, use_numpy=False))
+        python_time = best_time(forecast, False, args.repeat)
+        numpy_time: Optional[float] = best_time(forecast, True, args.repeat) if has_numpy else None
+        numpy_text = f"{numpy_time * 1000:>10.2f}" if numpy_time is not None else f"{'n/a':>10}"
+        print(f"{hours:>8}{days:>7}{python_time * 1000:>11.2f}{numpy_text}")
+
+
+if __name__ == "__main__":
+    main()
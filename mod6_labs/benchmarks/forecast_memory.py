@@ -0,0 +1,87 @@
+"""Memory and speed of the raw forecast dict vs. the columnar ``Forecast``.
+
+For each forecast size it reports the bytes retained by the decoded JSON
+payload and by the parsed ``Forecast`` (measured with tracemalloc), plus the
+time of the two operations the app repeats: a unit conversion and the
+per-day high/low scan done by ``display_forecast``.
+
+Usage::
+
+    python -m benchmarks.forecast_memory [--entries 40 400 4000]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, Dict
+
+import units
+from fake_owm_server import make_forecast
+from forecast_model import Forecast
+
+
+def retained(build: Callable[[], object]) -> int:
+    """Bytes still allocated by what ``build`` returns."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+def best_time(func: Callable[[], object], repeat: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def daily_range_dict(data: Dict):
+    days = defaultdict(list)
+    for item in data.get("list", []):
+        days[item.get("dt_txt", "").split(" ")[0]].append(item.get("main", {}).get("temp", 0))
+    return {day: (max(temps), min(temps)) for day, temps in days.items()}
+
+
+def daily_range_model(forecast: Forecast):
+    days = defaultdict(list)
+    temp = forecast.temp
+    for index, timestamp in enumerate(forecast.dt):
+        days[timestamp // 86400].append(temp[index])
+    return {day: (max(temps), min(temps)) for day, temps in days.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[40, 400, 4000])
+    args = parser.parse_args()
+
+    print(f"{'entries':>8}{'dict KiB':>10}{'model KiB':>11}"
+          f"{'convert dict ms':>17}{'convert model ms':>18}{'daily dict ms':>15}{'daily model ms':>16}")
+    for entries in args.entries:
+        body = json.dumps(make_forecast("London", "standard", entries))
+        data = json.loads(body)
+        forecast = Forecast.from_payload(data)
+
+        dict_bytes = retained(lambda: json.loads(body))
+        model_bytes = retained(lambda: Forecast.from_payload(json.loads(body)))
+        convert_dict = best_time(lambda: units.convert_payload(data, units.STANDARD, units.METRIC))
+        convert_model = best_time(lambda: forecast.to_unit(units.METRIC))
+        daily_dict = best_time(lambda: daily_range_dict(data))
+        daily_model = best_time(lambda: daily_range_model(forecast))
+
+        print(f"{entries:>8}{dict_bytes / 1024:>10.1f}{model_bytes / 1024:>11.1f}"
+              f"{convert_dict * 1000:>17.3f}{convert_model * 1000:>18.3f}"
+              f"{daily_dict * 1000:>15.3f}{daily_model * 1000:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
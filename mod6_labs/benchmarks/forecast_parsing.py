@@ -0,0 +1,70 @@
+"""Peak memory and parse time: ``json.loads`` vs. the streaming forecast parser.
+
+The body is fed in network-sized chunks. The baseline buffers the whole body
+and decodes every object (what ``response.json()`` does); the streaming
+parser decodes one entry at a time and keeps only ``DISPLAY_FIELDS``. Larger
+entry counts stand in for the paid hourly / 16-day endpoints.
+
+Usage::
+
+    python -m benchmarks.forecast_parsing [--entries 40 400 4000] [--chunk 16384]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from fake_owm_server import make_forecast
+from forecast_stream import parse_forecast_chunks
+
+
+def buffered(chunks: List[bytes]) -> Dict:
+    return json.loads(b"".join(chunks))
+
+
+def streamed(chunks: List[bytes]) -> Dict:
+    return parse_forecast_chunks(chunks)
+
+
+def measure(parse: Callable[[List[bytes]], Dict], chunks: List[bytes], repeat: int) -> Tuple[float, int]:
+    """Best wall time over ``repeat`` runs and peak traced bytes of one run."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse(chunks)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        result = parse(chunks)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    del result
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[40, 400, 4000])
+    parser.add_argument("--chunk", type=int, default=16384, help="bytes per network chunk")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8}{'body KiB':>10}{'parser':>10}{'ms':>9}{'peak KiB':>10}")
+    for entries in args.entries:
+        body = json.dumps(make_forecast("London", "standard", entries)).encode("utf-8")
+        # The chunks already exist when a real response arrives; build them
+        # before measuring so only the parsers are traced
+        chunks = [body[i:i + args.chunk] for i in range(0, len(body), args.chunk)]
+        del body
+        size = sum(len(c) for c in chunks)
+        for name, parse in (("json", buffered), ("stream", streamed)):
+            seconds, peak = measure(parse, chunks, args.repeat)
+            print(f"{entries:>8}{size / 1024:>10.0f}{name:>10}{seconds * 1000:>9.2f}{peak / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Forecast re-render cost: rebuilt card trees vs. the in-place card pool.
+
+Uses Flet's own diffing (``Control.build_update_commands``) on a detached
+forecast column, so no window or Flet client is needed. For each scenario it
+reports the update commands and JSON bytes ``page.update()`` would send, and
+the time spent building them.
+
+Usage::
+
+    python -m benchmarks.forecast_render [--repeat 200]
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, List, Tuple
+
+import flet as ft
+from flet.core.protocol import CommandEncoder
+
+import benchmarks.common  # noqa: F401  (sets a dummy API key for config)
+from fake_owm_server import make_forecast
+from forecast_aggregate import DailySummary, aggregate_daily
+from forecast_model import Forecast
+from main import ForecastCard
+
+
+def _header() -> List[ft.Control]:
+    return [ft.Text("5-Day Forecast", size=18, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_900),
+            ft.Divider()]
+
+
+class RebuildRenderer:
+    """What display_forecast used to do: new controls on every render."""
+
+    def __init__(self):
+        self.column = ft.Column([])
+
+    def render(self, summaries: List[DailySummary], unit_symbol: str):
+        cards = []
+        for summary in summaries:
+            cards.append(ft.Container(
+                content=ft.Row(
+                    [
+                        ft.Text(summary.day.strftime("%a, %b %d"), size=16,
+                                weight=ft.FontWeight.BOLD, width=80, color=ft.Colors.BLACK),
+                        ft.Image(src=f"https://openweathermap.org/img/wn/{summary.icon}@2x.png",
+                                 width=30, height=30),
+                        ft.Text(summary.description.title(), size=14, italic=True,
+                                expand=True, color=ft.Colors.BLACK),
+                        ft.Text(f"H: {summary.high:.1f}{unit_symbol}", size=14, color=ft.Colors.BLACK),
+                        ft.Text(f"L: {summary.low:.1f}{unit_symbol}", size=14, color=ft.Colors.BLACK),
+                    ],
+                    alignment=ft.MainAxisAlignment.START,
+                    spacing=10,
+                ),
+                bgcolor=ft.Colors.WHITE,
+                padding=10,
+                border_radius=10,
+                margin=ft.margin.only(bottom=5),
+            ))
+        self.column.controls.clear()
+        self.column.controls.extend(_header() + cards)
+
+
+class PoolRenderer:
+    """The current display_forecast: a fixed pool of ForecastCard controls."""
+
+    def __init__(self, size: int = 5):
+        self.cards = [ForecastCard() for _ in range(size)]
+        self.column = ft.Column(_header() + [card.control for card in self.cards])
+
+    def render(self, summaries: List[DailySummary], unit_symbol: str):
+        for index, card in enumerate(self.cards):
+            if index < len(summaries):
+                summary = summaries[index]
+                card.show(summary, unit_symbol, f"/icons/{summary.icon}@2x.png")
+            else:
+                card.hide()
+
+
+class DetachedPage:
+    """Enough of a Flet page to mount a control tree and diff updates."""
+
+    def __init__(self, root: ft.Control):
+        self.root = root
+        self._next_id = 0
+        added: List[ft.Control] = []
+        root._build_add_commands(added_controls=added)
+        self._assign_ids(added)
+
+    def _assign_ids(self, controls: List[ft.Control]):
+        for control in controls:
+            self._next_id += 1
+            control._Control__uid = f"_{self._next_id}"
+
+    def update(self) -> Tuple[int, int]:
+        """Diff the tree like ``page.update()``; return (commands, bytes)."""
+        commands: list = []
+        added: List[ft.Control] = []
+        self.root.build_update_commands({}, commands, added, [])
+        self._assign_ids(added)
+        count = sum(1 + len(c.commands) for c in commands)
+        return count, len(json.dumps(commands, cls=CommandEncoder))
+
+
+def scenarios() -> List[Tuple[str, Callable[[], Tuple[List[DailySummary], str]]]]:
+    london = Forecast.from_payload(make_forecast("London"))
+    tokyo = Forecast.from_payload(make_forecast("Tokyo"))
+    return [
+        ("same data again", lambda: (aggregate_daily(london.to_unit("metric")), "°C")),
+        ("unit toggle", lambda: (aggregate_daily(london.to_unit("imperial")), "°F")),
+        ("new city", lambda: (aggregate_daily(tokyo.to_unit("metric")), "°C")),
+    ]
+
+
+def measure(factory, first, scenario, repeat: int) -> Tuple[int, int, float]:
+    total = 0.0
+    for _ in range(repeat):
+        renderer = factory()
+        page = DetachedPage(renderer.column)
+        renderer.render(*first)
+        page.update()
+        summaries, symbol = scenario()
+        started = time.perf_counter()
+        renderer.render(summaries, symbol)
+        commands, size = page.update()
+        total += time.perf_counter() - started
+    return commands, size, total / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    first = (aggregate_daily(Forecast.from_payload(make_forecast("London")).to_unit("metric")), "°C")
+    print(f"{'scenario':<18}{'renderer':<10}{'commands':>10}{'bytes':>8}{'ms':>8}")
+    for name, scenario in scenarios():
+        for label, factory in (("rebuild", RebuildRenderer), ("pool", PoolRenderer)):
+            commands, size, seconds = measure(factory, first, scenario, args.repeat)
+            print(f"{name:<18}{label:<10}{commands:>10}{size:>8}{seconds * 1000:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
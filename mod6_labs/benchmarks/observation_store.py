@@ -0,0 +1,97 @@
+"""Write and query cost of the observation store over a year of data.
+
+Fills a temporary ``ObservationStore`` with one reading per city every
+``--interval`` seconds for ``--days`` days, written a day per transaction,
+then times the downsampling queries the trend panel uses. For comparison
+each query is also answered by aggregating the raw rows with ``GROUP BY``,
+which is what the hourly rollup avoids.
+
+Usage::
+
+    python -m benchmarks.observation_store [--cities 5] [--days 365] [--interval 600]
+"""
+
+import argparse
+import math
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from observations import DAY, HOUR, Observation, ObservationStore
+
+START = 1_700_000_000 // DAY * DAY
+
+RAW_QUERY = (
+    "SELECT (ts + ?) / ? * ? AS bucket, COUNT(*), MIN(temp), MAX(temp), AVG(temp), "
+    "MIN(humidity), MAX(humidity), AVG(humidity), MIN(pressure), MAX(pressure), AVG(pressure), "
+    "MIN(wind_speed), MAX(wind_speed), AVG(wind_speed) "
+    "FROM observations WHERE city_id = ? AND ts >= ? AND ts < ? GROUP BY bucket ORDER BY bucket"
+)
+
+
+def fill(store: ObservationStore, cities: int, days: int, interval: int) -> float:
+    """Write the synthetic year; returns seconds spent in ``flush()``."""
+    spent = 0.0
+    for day in range(days):
+        for ts in range(START + day * DAY, START + (day + 1) * DAY, interval):
+            season = math.sin(2 * math.pi * (ts - START) / (365 * DAY))
+            daily = math.sin(2 * math.pi * (ts % DAY) / DAY)
+            for city_id in range(1, cities + 1):
+                temp = 283 + 10 * season + 5 * daily + city_id
+                store.add(Observation(city_id, ts, temp, temp - 1, 60 + 20 * daily, 1013, 3.0, 800))
+        started = time.perf_counter()
+        store.flush()
+        spent += time.perf_counter() - started
+    return spent
+
+
+def timed(run, repeat: int) -> float:
+    """Median milliseconds of ``run()``."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cities", type=int, default=5)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--interval", type=int, default=600, help="seconds between readings")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    end = START + args.days * DAY
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "observations.db"
+        store = ObservationStore(path, raw_retention=None, hourly_retention=None, clock=lambda: end)
+        flush_seconds = fill(store, args.cities, args.days, args.interval)
+        rows = len(store)
+        print(f"{rows} observations, {args.cities} cities, {args.days} days: "
+              f"{rows / flush_seconds:,.0f} rows/s written, "
+              f"database {path.stat().st_size / 1e6:.1f} MB")
+
+        raw = store._conn
+        queries = [
+            ("hourly, last 24 h", lambda: store.hourly(1, end - DAY), (0, HOUR, end - DAY)),
+            ("daily, last 7 days", lambda: store.daily(1, end - 7 * DAY), (0, DAY, end - 7 * DAY)),
+            ("daily, whole year", lambda: store.daily(1, START), (0, DAY, START)),
+            ("hourly, whole year", lambda: store.hourly(1, START), (0, HOUR, START)),
+        ]
+        print(f"{'query':<22}{'buckets':>9}{'rollup ms':>11}{'raw ms':>9}")
+        for name, query, (offset, size, since) in queries:
+            buckets = len(query())
+            rollup_ms = timed(query, args.repeat)
+            raw_ms = timed(
+                lambda: raw.execute(RAW_QUERY, (offset, size, size, 1, since, end)).fetchall(),
+                args.repeat,
+            )
+            print(f"{name:<22}{buckets:>9}{rollup_ms:>11.2f}{raw_ms:>9.2f}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
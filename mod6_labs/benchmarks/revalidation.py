@@ -0,0 +1,61 @@
+"""Bytes downloaded when expired responses are revalidated instead of refetched.
+
+The fake server sends ``Cache-Control: max-age=0``, so every lookup after the
+first finds its cached response expired. With conditional requests the
+service sends the stored ETag back and unchanged data is answered with an
+empty 304; without them every lookup downloads the full body again. Body
+bytes are counted by the server.
+
+Usage::
+
+    python -m benchmarks.revalidation [--rounds 10] [--forecast-count 40]
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import make_service
+from fake_owm_server import FakeWeatherServer
+
+CITIES = ["London", "Tokyo", "Nabua", "New York", "Paris"]
+
+
+async def refresh(server: FakeWeatherServer, rounds: int, conditional: bool) -> int:
+    """Look up weather and forecast for every city ``rounds`` times; returns 304 count."""
+    async with make_service(server) as service:
+        service.conditional_requests = conditional
+        for _ in range(rounds):
+            for city in CITIES:
+                await service.get_weather(city, "metric")
+                await service.get_forecast(city, "metric")
+        return service.revalidated
+
+
+def run(rounds: int, forecast_count: int, conditional: bool):
+    with FakeWeatherServer(max_age=0, forecast_count=forecast_count) as server:
+        started = time.perf_counter()
+        not_modified = asyncio.run(refresh(server, rounds, conditional))
+        elapsed = time.perf_counter() - started
+        return server.requests, not_modified, server.api.bytes_sent, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=10, help="lookups of every city")
+    parser.add_argument("--forecast-count", type=int, default=40,
+                        help="entries per forecast, to vary the payload size")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<14}{'requests':>10}{'304s':>7}{'body KiB':>10}{'seconds':>10}")
+    results = {}
+    for name, conditional in (("full refetch", False), ("conditional", True)):
+        requests, not_modified, sent, elapsed = run(args.rounds, args.forecast_count, conditional)
+        results[name] = sent
+        print(f"{name:<14}{requests:>10}{not_modified:>7}{sent / 1024:>10.1f}{elapsed:>10.3f}")
+    saved = results["full refetch"] - results["conditional"]
+    print(f"saved {saved / 1024:.1f} KiB ({saved / max(1, results['full refetch']):.0%} of body bytes)")
+
+
+if __name__ == "__main__":
+    main()
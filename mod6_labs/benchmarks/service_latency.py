@@ -0,0 +1,140 @@
+"""Latency and throughput of the WeatherService methods at several concurrencies.
+
+Drives ``get_weather``, ``get_forecast`` and ``get_weather_by_coordinates``
+against the local fake API and reports p50/p95/p99 latency, requests per
+second, TCP connections opened and traced memory per in-flight request. The
+response cache is bypassed and every request asks for a different city, so
+each call really goes over the wire.
+
+Usage::
+
+    python -m benchmarks.service_latency [--requests 200] [--concurrency 1 4 16]
+                                         [--latency 0.0] [--json results.json]
+
+Compare JSON files from two releases to spot regressions.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.common import make_service, percentile
+from fake_owm_server import FakeWeatherServer
+from weather_service import WeatherService
+
+Call = Callable[[WeatherService, int], Awaitable[Dict]]
+
+METHODS: Dict[str, Call] = {
+    "get_weather": lambda s, i: s.get_weather(f"City{i}", "metric", bypass_cache=True),
+    "get_forecast": lambda s, i: s.get_forecast(f"City{i}", "metric", bypass_cache=True),
+    "get_weather_by_coordinates": lambda s, i: s.get_weather_by_coordinates(
+        (i % 180) - 90 + 0.5, (i % 360) - 180 + 0.5, "metric", bypass_cache=True
+    ),
+}
+
+
+async def _drive(service: WeatherService, call: Call, requests: int, concurrency: int) -> List[float]:
+    """Issue ``requests`` calls from ``concurrency`` workers; return latencies."""
+    latencies: List[float] = []
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            await call(service, i)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def _measure_memory(server: FakeWeatherServer, call: Call, concurrency: int) -> float:
+    """Peak traced bytes above baseline, per request in flight."""
+    async with make_service(server) as service:
+        await _drive(service, call, concurrency, concurrency)  # warm up the pool
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await _drive(service, call, concurrency * 4, concurrency)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return (peak - baseline) / concurrency
+
+
+def run_case(method: str, requests: int, concurrency: int, latency: float) -> Dict:
+    """Benchmark one method at one concurrency level against a fresh server."""
+    call = METHODS[method]
+
+    async def scenario(server: FakeWeatherServer):
+        async with make_service(server) as service:
+            started = time.perf_counter()
+            latencies = await _drive(service, call, requests, concurrency)
+            elapsed = time.perf_counter() - started
+        connections = server.connections
+        memory = await _measure_memory(server, call, concurrency)
+        return latencies, elapsed, connections, memory
+
+    with FakeWeatherServer(latency=latency) as server:
+        latencies, elapsed, connections, memory = asyncio.run(scenario(server))
+
+    return {
+        "method": method,
+        "concurrency": concurrency,
+        "requests": requests,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "requests_per_sec": requests / elapsed,
+        "connections": connections,
+        "bytes_per_request": memory,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200,
+                        help="requests per method and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="simulated server latency in seconds")
+    parser.add_argument("--methods", nargs="+", choices=sorted(METHODS), default=list(METHODS))
+    parser.add_argument("--json", metavar="PATH", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'method':<28}{'conc':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'req/s':>9}{'conns':>7}{'KiB/req':>9}")
+    for method in args.methods:
+        for concurrency in args.concurrency:
+            result = run_case(method, args.requests, concurrency, args.latency)
+            results.append(result)
+            print(f"{method:<28}{concurrency:>5}{result['p50_ms']:>9.2f}"
+                  f"{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+                  f"{result['requests_per_sec']:>9.0f}{result['connections']:>7}"
+                  f"{result['bytes_per_request'] / 1024:>9.1f}")
+
+    if args.json:
+        report = {
+            "benchmark": "service_latency",
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "httpx": httpx.__version__,
+            "settings": {"requests": args.requests, "latency": args.latency},
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
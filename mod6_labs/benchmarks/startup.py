@@ -0,0 +1,139 @@
+"""Startup cost of the app: ``python -X importtime`` plus building the UI.
+
+Each run starts a fresh interpreter without ``OPENWEATHER_API_KEY`` (config
+is resolved on first service use, so none is needed), imports ``main`` under
+``-X importtime`` and builds ``WeatherApp`` on a stub page. It reports the
+import time of Flet, of the app's own modules, the UI build time and the
+slowest modules the app pulls in.
+
+The run fails (exit status 1) when the app's own import time exceeds
+``--budget-ms`` or a module that should load only after the first frame
+(``DEFERRED_MODULES``) is imported at startup, so it can guard CI::
+
+    python -m benchmarks.startup [--runs 5] [--budget-ms 60]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Imported after the first frame by WeatherApp.load_state() or on first use
+DEFERRED_MODULES = (
+    "weather_service", "disk_cache", "city_index", "icon_cache",
+    "forecast_aggregate", "forecast_model", "observations", "numpy", "sqlite3", "dotenv",
+)
+
+BUILD_UI = """
+import asyncio, sys, time
+from unittest.mock import MagicMock
+import main
+
+async def build():
+    page = MagicMock()
+    page.loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    main.WeatherApp(page)
+    print("build_ms", (time.perf_counter() - started) * 1000, file=sys.stderr)
+    print("deferred_loaded", *(m for m in {deferred!r} if m in sys.modules), file=sys.stderr)
+
+asyncio.run(build())
+"""
+
+
+def parse_importtime(stderr: str) -> Tuple[Dict[str, int], List[Tuple[str, int, int]]]:
+    """Cumulative µs of ``main`` and ``flet``, and (module, self µs, depth) rows.
+
+    Lines look like ``import time:  self | cumulative | <2 spaces per level>name``
+    and list every module after the modules it imported.
+    """
+    cumulative, rows = {}, []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        head, cumulative_us, name = line.split("|")
+        self_us = head.split(":")[1].strip()
+        if not self_us.isdigit():
+            continue  # the header line
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        module = name.strip()
+        rows.append((module, int(self_us), depth))
+        if module in ("flet", "main"):
+            cumulative[module] = int(cumulative_us)
+    return cumulative, rows
+
+
+def run_once() -> Dict:
+    env = {k: v for k, v in os.environ.items() if k != "OPENWEATHER_API_KEY"}
+    code = BUILD_UI.format(deferred=DEFERRED_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    cumulative, rows = parse_importtime(result.stderr)
+    build_ms, loaded = 0.0, []
+    for line in result.stderr.splitlines():
+        if line.startswith("build_ms"):
+            build_ms = float(line.split()[1])
+        elif line.startswith("deferred_loaded"):
+            loaded = line.split()[1:]
+    main_us = cumulative.get("main", 0)
+    flet_us = cumulative.get("flet", 0)
+    return {
+        "main_ms": main_us / 1000,
+        "flet_ms": flet_us / 1000,
+        "app_ms": (main_us - flet_us) / 1000,
+        "build_ms": build_ms,
+        "loaded": loaded,
+        "rows": rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=60.0,
+                        help="maximum median import time of the app's own modules")
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    median = {key: statistics.median(r[key] for r in runs)
+              for key in ("main_ms", "flet_ms", "app_ms", "build_ms")}
+    print(f"import main:   {median['main_ms']:7.1f} ms (median of {args.runs})")
+    print(f"  flet:        {median['flet_ms']:7.1f} ms")
+    print(f"  app modules: {median['app_ms']:7.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"build UI:      {median['build_ms']:7.1f} ms")
+
+    # Slowest modules imported by main outside Flet, from the last run
+    in_main = in_flet = False
+    own = []
+    for module, self_us, depth in reversed(runs[-1]["rows"]):  # parents first
+        if depth == 0:
+            in_main = module == "main"
+        elif depth == 1:
+            in_flet = module == "flet"
+        if in_main and not in_flet and depth > 0:
+            own.append((self_us, module))
+    print("slowest non-Flet imports (self time):")
+    for self_us, module in sorted(own, reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:7.1f} ms  {module}")
+
+    failures = []
+    if median["app_ms"] > args.budget_ms:
+        failures.append(f"app modules took {median['app_ms']:.1f} ms, budget {args.budget_ms:.0f} ms")
+    loaded = sorted({m for r in runs for m in r["loaded"]})
+    if loaded:
+        failures.append("imported at startup but should be deferred: " + ", ".join(loaded))
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""In-memory response cache for the weather service."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+
+class CachedResponse(NamedTuple):
+    """A response body with the validators needed to revalidate it.
+
+    ``etag`` and ``last_modified`` are the raw ``ETag`` and ``Last-Modified``
+    headers; sent back as ``If-None-Match``/``If-Modified-Since`` they let
+    the server answer 304 Not Modified instead of the whole body.
+    """
+    data: Dict
+    fetched_at: float  # wall-clock time of the last download or revalidation
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Request headers that make a GET conditional on this response."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class TTLCache:
+    """Bounded least-recently-used cache whose entries expire after a TTL.
+
+    Each entry carries its own time-to-live so different endpoints (current
+    conditions vs. forecast) can share one cache. When the cache is full the
+    least recently used entry is evicted.
+
+    Expired entries are not served by ``get`` but stay until evicted, so
+    ``stale`` can still hand them out for revalidation.
+    """
+
+    def __init__(self, max_entries: int = 128, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for ``key``, or ``None`` if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if self._clock() >= expires_at:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Like ``get`` but without touching the counters or LRU order."""
+        entry = self._entries.get(key)
+        if entry is None or self._clock() >= entry[1]:
+            return None
+        return entry[0]
+
+    def stale(self, key: Hashable) -> Optional[Any]:
+        """The value for ``key`` even if it has expired, without touching the counters."""
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        """Store ``value`` under ``key`` for ``ttl`` seconds.
+
+        A ``ttl`` of zero or less stores the value already expired: ``get``
+        never returns it, but ``stale`` does.
+        """
+        if self.max_entries <= 0:
+            return
+
+        self._entries[key] = (value, self._clock() + max(0.0, ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters and the current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and self._clock() < entry[1]
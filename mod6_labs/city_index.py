@@ -0,0 +1,319 @@
+"""Offline index over the OpenWeatherMap city list.
+
+OpenWeatherMap publishes every city it knows as ``city.list.json.gz``
+(~200k entries with ID, name, state, country and coordinates). ``build_index``
+turns that dump into one binary file and ``CityIndex`` memory-maps it, so
+opening the index costs nothing and only the pages a lookup touches are
+read. Entries are sorted by normalized name, which makes a prefix search two
+binary searches; a second array sorted by ID serves lookups by city ID, and
+a grid of 1° x 1° cells finds the city nearest to a coordinate.
+
+File layout (native byte order, all counts in entries)::
+
+    header       magic, count, key bytes, label bytes
+    key_offsets  uint32[count + 1]   normalized names, sorted
+    label_offs   uint32[count + 1]   "name\\tstate\\tcountry"
+    ids          uint32[count]
+    lat, lon     float32[count]
+    by_id        uint32[count]       entry positions sorted by ID
+    cell_offs    uint32[cells + 1]   where each grid cell starts in by_cell
+    by_cell      uint32[count]       entry positions grouped by grid cell
+    keys, labels UTF-8 blobs
+
+Build it once with::
+
+    python city_index.py city.list.json.gz city_index.bin
+"""
+
+import argparse
+import bisect
+import gzip
+import json
+import math
+import mmap
+import os
+import struct
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+MAGIC = b"OWMCITY2"
+_HEADER = struct.Struct("=8sIII")
+
+# Spatial grid: one cell per degree of latitude and longitude
+GRID_ROWS, GRID_COLS = 180, 360
+GRID_CELLS = GRID_ROWS * GRID_COLS
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def normalize_name(name: str) -> str:
+    """Fold case, accents and spacing so "  são paulo" matches "Sao Paulo"."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.split()).casefold()
+
+
+def grid_cell(lat: float, lon: float) -> Tuple[int, int]:
+    """Row and column of the grid cell containing a coordinate."""
+    row = min(max(int(math.floor(lat + 90)), 0), GRID_ROWS - 1)
+    col = int(math.floor(lon + 180)) % GRID_COLS
+    return row, col
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle (haversine) distance between two coordinates."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class City(NamedTuple):
+    """One entry of the city list."""
+    id: int
+    name: str
+    state: str
+    country: str
+    lat: float
+    lon: float
+
+    @property
+    def label(self) -> str:
+        """Human-readable, disambiguated name, e.g. "Springfield, IL, US"."""
+        return ", ".join(part for part in (self.name, self.state, self.country) if part)
+
+
+def build_index(cities: Iterable[Dict], path: Union[str, Path]) -> int:
+    """
+    Write the binary index for ``cities`` (entries shaped like city.list.json).
+
+    Args:
+        cities: Dicts with ``id``, ``name``, ``state``, ``country`` and ``coord``
+        path: Output file
+
+    Returns:
+        Number of indexed cities
+    """
+    entries = []
+    for city in cities:
+        name = (city.get("name") or "").strip()
+        if not name:
+            continue
+        key = normalize_name(name).encode("utf-8")
+        label = "\t".join((name, city.get("state") or "", city.get("country") or ""))
+        coord = city.get("coord") or {}
+        entries.append((key, int(city["id"]), label.encode("utf-8"),
+                        float(coord.get("lat", 0.0)), float(coord.get("lon", 0.0))))
+    entries.sort(key=lambda e: (e[0], e[1]))
+
+    key_offsets, label_offsets = array("I", [0]), array("I", [0])
+    ids, lats, lons = array("I"), array("f"), array("f")
+    keys, labels = bytearray(), bytearray()
+    for key, city_id, label, lat, lon in entries:
+        keys += key
+        labels += label
+        key_offsets.append(len(keys))
+        label_offsets.append(len(labels))
+        ids.append(city_id)
+        lats.append(lat)
+        lons.append(lon)
+    by_id = array("I", sorted(range(len(entries)), key=ids.__getitem__))
+
+    cells = []
+    for lat, lon in zip(lats, lons):
+        row, col = grid_cell(lat, lon)
+        cells.append(row * GRID_COLS + col)
+    by_cell = array("I", sorted(range(len(entries)), key=cells.__getitem__))
+    cell_offsets = array("I", [0]) * (GRID_CELLS + 1)
+    for cell in cells:
+        cell_offsets[cell + 1] += 1
+    for cell in range(GRID_CELLS):
+        cell_offsets[cell + 1] += cell_offsets[cell]
+
+    temporary = Path(str(path) + ".tmp")
+    with open(temporary, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(entries), len(keys), len(labels)))
+        for column in (key_offsets, label_offsets, ids, lats, lons, by_id, cell_offsets, by_cell):
+            column.tofile(f)
+        f.write(keys)
+        f.write(labels)
+    os.replace(temporary, path)
+    return len(entries)
+
+
+def load_city_list(path: Union[str, Path]) -> List[Dict]:
+    """Read ``city.list.json`` or its gzipped download."""
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class _Keys:
+    """Sequence view of the sorted keys, for ``bisect``."""
+
+    def __init__(self, index: "CityIndex"):
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, position: int) -> bytes:
+        return self._index._key(position)
+
+
+class CityIndex:
+    """Read-only, memory-mapped city index written by ``build_index``."""
+
+    def __init__(self, path: Union[str, Path]):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, keys_size, labels_size = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a city index")
+
+        view = memoryview(self._map)
+        offset = _HEADER.size
+
+        def take(size: int, fmt: str) -> memoryview:
+            nonlocal offset
+            section = view[offset:offset + size * 4].cast(fmt)
+            offset += size * 4
+            return section
+
+        self._count = count
+        self._key_offsets = take(count + 1, "I")
+        self._label_offsets = take(count + 1, "I")
+        self.ids = take(count, "I")
+        self.lats = take(count, "f")
+        self.lons = take(count, "f")
+        self._by_id = take(count, "I")
+        self._cell_offsets = take(GRID_CELLS + 1, "I")
+        self._by_cell = take(count, "I")
+        self._keys = view[offset:offset + keys_size]
+        self._labels = view[offset + keys_size:offset + keys_size + labels_size]
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> Optional["CityIndex"]:
+        """Open the index at ``path``, or return ``None`` if it is missing or invalid."""
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def close(self):
+        # Release the views before the map, or mmap refuses to close
+        for name in ("_key_offsets", "_label_offsets", "ids", "lats", "lons", "_by_id",
+                     "_cell_offsets", "_by_cell", "_keys", "_labels"):
+            getattr(self, name).release()
+        self._map.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _key(self, position: int) -> bytes:
+        return self._keys[self._key_offsets[position]:self._key_offsets[position + 1]].tobytes()
+
+    def city(self, position: int) -> City:
+        """The city stored at ``position`` in name order."""
+        start, end = self._label_offsets[position], self._label_offsets[position + 1]
+        name, state, country = str(self._labels[start:end], "utf-8").split("\t")
+        return City(self.ids[position], name, state, country,
+                    self.lats[position], self.lons[position])
+
+    def search(self, prefix: str, limit: int = 8) -> List[City]:
+        """
+        Cities whose normalized name starts with ``prefix``.
+
+        Results are in name order, so exact matches come first.
+
+        Args:
+            prefix: What the user has typed so far
+            limit: Maximum number of suggestions
+
+        Returns:
+            Up to ``limit`` cities
+        """
+        key = normalize_name(prefix).encode("utf-8")
+        if not key:
+            return []
+        keys = _Keys(self)
+        start = bisect.bisect_left(keys, key)
+        # Every key with this prefix sorts before prefix + the highest byte
+        end = bisect.bisect_left(keys, key + b"\xff", lo=start)
+        return [self.city(p) for p in range(start, min(end, start + limit))]
+
+    def get(self, city_id: int) -> Optional[City]:
+        """Look up a city by its OpenWeatherMap ID."""
+        by_id, ids = self._by_id, self.ids
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if ids[by_id[mid]] < city_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and ids[by_id[lo]] == city_id:
+            return self.city(by_id[lo])
+        return None
+
+    def nearest(
+        self, lat: float, lon: float, max_km: Optional[float] = None
+    ) -> Optional[Tuple[City, float]]:
+        """
+        The city closest to a coordinate, without any network request.
+
+        Searches grid cells in growing rings around the coordinate and stops
+        once no unvisited cell can hold anything closer.
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+            max_km: Ignore cities farther away than this
+
+        Returns:
+            The city and its distance in km, or ``None`` if there is no city
+            within ``max_km``
+        """
+        row, col = grid_cell(lat, lon)
+        offsets, by_cell, lats, lons = self._cell_offsets, self._by_cell, self.lats, self.lons
+        limit = math.inf if max_km is None else max_km
+        best, best_km = -1, math.inf
+        visited = set()
+        for ring in range(max(GRID_ROWS, GRID_COLS // 2) + 1):
+            for r in range(max(row - ring, 0), min(row + ring, GRID_ROWS - 1) + 1):
+                # Whole top and bottom rows of the ring, only its ends in between
+                if abs(r - row) == ring:
+                    columns = range(col - ring, col + ring + 1)
+                else:
+                    columns = (col - ring, col + ring)
+                for c in columns:
+                    cell = r * GRID_COLS + c % GRID_COLS
+                    if cell in visited:
+                        continue  # longitude wrapped around
+                    visited.add(cell)
+                    for i in range(offsets[cell], offsets[cell + 1]):
+                        position = by_cell[i]
+                        km = distance_km(lat, lon, lats[position], lons[position])
+                        if km < best_km:
+                            best, best_km = position, km
+            # Anything unvisited is at least ``ring`` degrees of latitude or
+            # longitude away; a degree of longitude shrinks towards the poles
+            lon_bound = math.sin(math.radians(min(ring, 90))) * math.cos(math.radians(lat))
+            bound = min(ring * KM_PER_DEGREE, math.asin(lon_bound) * EARTH_RADIUS_KM)
+            if best_km <= bound or bound > limit:
+                break
+        if best < 0 or best_km > limit:
+            return None
+        return self.city(best), best_km
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the offline city index")
+    parser.add_argument("city_list", help="city.list.json or city.list.json.gz from OpenWeatherMap")
+    parser.add_argument("output", nargs="?", default="city_index.bin")
+    args = parser.parse_args()
+    count = build_index(load_city_list(args.city_list), args.output)
+    print(f"Indexed {count} cities into {args.output}")
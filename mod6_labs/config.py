@@ -1,40 +1,137 @@
 # config.py
-"""Configuration management for the Weather App."""
+"""Configuration management for the Weather App.
+
+Settings read from the environment (and the ``.env`` file) are resolved by
+``Config.load()`` on first use by the weather service, not when this module
+is imported, so importing it is free and a missing API key is reported as a
+service error instead of preventing the app from starting.
+"""
 
 import os
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
 
 class Config:
     """Application configuration."""
     
-    # API Configuration
-    API_KEY = os.getenv("OPENWEATHER_API_KEY", "")
-    BASE_URL = os.getenv(
-        "OPENWEATHER_BASE_URL", 
-        "https://api.openweathermap.org/data/2.5/weather"
-    )
+    # API Configuration; the environment overrides these in load()
+    API_KEY = ""
+    BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
+    FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
     
     # App Configuration
     APP_TITLE = "Weather App"
     APP_WIDTH = 1024
     APP_HEIGHT = 768
+    SEARCH_DEBOUNCE = 0.2  # seconds; a search this soon after another waits this long first; 0 disables
+    FORECAST_DAYS = 5  # forecast cards, built once and updated in place
+    UI_UPDATE_INTERVAL = 1 / 60  # seconds; page.update() calls within one frame are merged
+    SAVE_DEBOUNCE = 0.5  # seconds; history/settings changes within this window share one write
+
+    # Condition icons are downloaded once into ASSETS_DIR/icons and served by Flet
+    ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+    ICON_URL = "https://openweathermap.org/img/wn/{icon}@2x.png"
     
+    # Offline city list for search suggestions; build it with city_index.py
+    CITY_INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "city_index.bin")
+    SUGGESTION_LIMIT = 6
+    NEAREST_CITY_MAX_KM = 30  # farther than this, coordinates are sent to the API as-is
+
+    # Metrics: Ctrl+Shift+M toggles the in-app overlay; a port other than 0
+    # (WEATHER_METRICS_PORT) also serves them at http://127.0.0.1:<port>/metrics
+    METRICS_PORT = 0
+    METRICS_REFRESH = 1.0  # seconds between overlay refreshes
+
     # API Settings
     UNITS = "metric"  # metric, imperial, or standard
     TIMEOUT = 10  # seconds
+
+    # Connection pool settings (shared httpx.AsyncClient)
+    MAX_CONNECTIONS = 10
+    MAX_KEEPALIVE_CONNECTIONS = 10
+    KEEPALIVE_EXPIRY = 30  # seconds an idle connection is kept open
+    HTTP2 = False  # OPENWEATHER_HTTP2=1 enables it; needs httpx[http2]
+
+    # Response cache settings
+    CACHE_MAX_ENTRIES = 128
+    CACHE_TTL_WEATHER = 600  # seconds; current conditions update ~every 10 min
+    CACHE_TTL_FORECAST = 1800  # seconds; 3-hourly forecast changes slowly
+    CACHE_TTL_FROM_SERVER = True  # a Cache-Control max-age overrides the TTLs above
+    CONDITIONAL_REQUESTS = True  # revalidate expired responses with ETag/Last-Modified
+
+    # Parse forecasts incrementally, keeping only the fields the app displays.
+    # Trades CPU for a modest memory saving: about 24-34% lower peak memory
+    # at 400-4000 entries, but about 5x slower to parse (benchmarks/forecast_parsing.py)
+    STREAM_FORECAST = False
+
+    # Persistent cache used to paint the last city instantly at startup
+    DISK_CACHE_FILE = "weather_cache.db"
+    DISK_CACHE_MAX_BYTES = 2_000_000
+
+    # Multi-city lookups
+    BATCH_CONCURRENCY = 5  # simultaneous requests in get_weather_many
+
+    # Client-side rate limit; the free OpenWeatherMap plan allows 60 calls/min.
+    # Set RATE_LIMIT_PER_MINUTE to 0 to disable.
+    RATE_LIMIT_PER_MINUTE = 60
+    RATE_LIMIT_BURST = 10
+
+    # Headless poller (python -m poller): the interval is stretched if the
+    # cities would not fit in the rate limit
+    POLL_INTERVAL = 600  # seconds between polls of one city
+    POLL_JITTER = 0.1  # fraction of the interval that is randomised
+    OBSERVATION_BATCH = 100  # observations per transaction
+    OBSERVATION_FLUSH_INTERVAL = 60  # seconds; write a partial batch after this long
+
+    # Observation history, recorded by both the app and the poller. Raw
+    # observations are kept this long; hourly min/max/mean for longer
+    OBSERVATIONS_FILE = "observations.db"
+    OBSERVATION_RAW_RETENTION_DAYS = 35
+    OBSERVATION_HOURLY_RETENTION_DAYS = 400
+
+    # Trend panel, from the observations of every search (and of the poller)
+    TREND_HOURS = 24  # hourly bars
+    TREND_DAYS = 7  # daily lows and highs
+
+    # Retries for timeouts, network errors, 429 and 5xx responses
+    RETRY_MAX_ATTEMPTS = 3
+    RETRY_BASE_DELAY = 0.5  # seconds, doubled on every retry
+    RETRY_MAX_DELAY = 8.0
+    RETRY_JITTER = 0.5  # fraction of each delay that is randomised
+    RETRY_MAX_RETRY_AFTER = 30.0  # give up rather than wait longer than this
+
+    # Circuit breaker: fast-fail for a while after repeated upstream failures
+    BREAKER_FAILURE_THRESHOLD = 5
+    BREAKER_COOLDOWN = 30.0  # seconds
     
+    MISSING_API_KEY = (
+        "OPENWEATHER_API_KEY not found. "
+        "Please create a .env file with your API key."
+    )
+    _loaded = False
+
+    @classmethod
+    def load(cls):
+        """Read the ``.env`` file and the environment; later calls do nothing."""
+        if cls._loaded:
+            return
+        from dotenv import load_dotenv
+
+        # Load environment variables from .env file
+        load_dotenv()
+        cls.API_KEY = os.getenv("OPENWEATHER_API_KEY", cls.API_KEY)
+        cls.BASE_URL = os.getenv("OPENWEATHER_BASE_URL", cls.BASE_URL)
+        cls.FORECAST_URL = os.getenv("OPENWEATHER_FORECAST_URL", cls.FORECAST_URL)
+        cls.ICON_URL = os.getenv("OPENWEATHER_ICON_URL", cls.ICON_URL)
+        cls.METRICS_PORT = int(os.getenv("WEATHER_METRICS_PORT", cls.METRICS_PORT))
+        http2 = os.getenv("OPENWEATHER_HTTP2")
+        if http2 is not None:
+            cls.HTTP2 = http2.lower() in ("1", "true", "yes")
+        cls._loaded = True
+
     @classmethod
     def validate(cls):
         """Validate that required configuration is present."""
+        cls.load()
         if not cls.API_KEY:
-            raise ValueError(
-                "OPENWEATHER_API_KEY not found. "
-                "Please create a .env file with your API key."
-            )
+            raise ValueError(cls.MISSING_API_KEY)
         return True
-
-# Validate configuration on import
-Config.validate()
\ No newline at end of file
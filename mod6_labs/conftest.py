@@ -0,0 +1,53 @@
+"""Shared pytest fixtures: an offline fake OpenWeatherMap API."""
+
+import asyncio
+import inspect
+import os
+
+import pytest
+
+# The service refuses to make requests without a key; the fake API accepts any key
+os.environ.setdefault("OPENWEATHER_API_KEY", "test-key")
+
+from fake_owm_server import FakeWeatherAPI, FakeWeatherServer  # noqa: E402
+from resilience import RetryPolicy  # noqa: E402
+from weather_service import WeatherService  # noqa: E402
+
+WEATHER_URL = "http://owm.test/data/2.5/weather"
+FORECAST_URL = "http://owm.test/data/2.5/forecast"
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Run ``async def`` tests in a fresh event loop."""
+    if inspect.iscoroutinefunction(pyfuncitem.obj):
+        argnames = pyfuncitem._fixtureinfo.argnames
+        asyncio.run(pyfuncitem.obj(**{name: pyfuncitem.funcargs[name] for name in argnames}))
+        return True
+    return None
+
+
+@pytest.fixture
+def fake_api():
+    """In-process fake API; tweak latency/error_rate/forecast_count per test."""
+    return FakeWeatherAPI()
+
+
+@pytest.fixture
+def make_service(fake_api):
+    """Factory for services wired to ``fake_api`` with fast retries and no rate limit."""
+    def factory(**kwargs):
+        kwargs.setdefault("transport", fake_api.transport())
+        kwargs.setdefault("retry_policy", RetryPolicy(base_delay=0.01))
+        service = WeatherService(base_url=WEATHER_URL, forecast_url=FORECAST_URL, **kwargs)
+        if "rate_limiter" not in kwargs:
+            service.rate_limiter = None  # tests exercise behaviour, not the quota
+        return service
+    return factory
+
+
+@pytest.fixture
+def fake_server():
+    """The fake API behind a real HTTP server on localhost."""
+    with FakeWeatherServer() as server:
+        yield server
@@ -0,0 +1,146 @@
+"""Persistent cache of the last weather responses, stored in SQLite.
+
+Unlike the in-memory ``TTLCache`` this keeps responses across restarts and
+never treats them as expired: callers get the stored body together with the
+time it was fetched and decide for themselves whether it is fresh enough.
+The total size of stored bodies is capped; least recently used rows are
+evicted first. Each body is stored with its ``ETag``/``Last-Modified``
+validators, so even after a restart it can be revalidated with a
+conditional request instead of downloaded again.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+from cache import CachedResponse
+
+
+class DiskCache:
+    """SQLite-backed store of the most recent response per cache key.
+
+    Methods are blocking; the weather service calls them through
+    ``asyncio.to_thread`` so the event loop is never held up by disk I/O.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_bytes: int = 2_000_000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        for column in ("etag", "last_modified"):
+            if column not in columns:  # database written by an older version
+                self._conn.execute(f"ALTER TABLE responses ADD COLUMN {column} TEXT")
+        self._conn.commit()
+
+    @staticmethod
+    def _encode_key(key: Hashable) -> str:
+        return json.dumps(key)
+
+    def get(self, key: Hashable) -> Optional[Tuple[Dict, float]]:
+        """Return ``(data, fetched_at)`` for ``key``, or ``None`` if absent."""
+        response = self.get_response(key)
+        return (response.data, response.fetched_at) if response is not None else None
+
+    def get_response(self, key: Hashable) -> Optional[CachedResponse]:
+        """Return the stored response for ``key`` with its validators."""
+        encoded = self._encode_key(key)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, fetched_at, etag, last_modified FROM responses WHERE key = ?",
+                (encoded,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (self._clock(), encoded),
+            )
+            self._conn.commit()
+
+        body, fetched_at, etag, last_modified = row
+        try:
+            return CachedResponse(json.loads(body), fetched_at, etag, last_modified)
+        except json.JSONDecodeError:
+            return None
+
+    def put(
+        self,
+        key: Hashable,
+        data: Any,
+        fetched_at: Optional[float] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        """Store ``data`` (and its validators) under ``key`` and evict old rows beyond the size cap."""
+        now = self._clock()
+        body = json.dumps(data, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, body, fetched_at, accessed_at, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self._encode_key(key), body, fetched_at if fetched_at is not None else now, now,
+                    etag, last_modified,
+                ),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Delete least recently used rows until the bodies fit in ``max_bytes``."""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(CAST(body AS BLOB))), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, LENGTH(CAST(body AS BLOB)) FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def size_bytes(self) -> int:
+        """Total size of the stored response bodies."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(CAST(body AS BLOB))), 0) FROM responses"
+            ).fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,388 @@
+"""Local stand-in for the OpenWeatherMap API.
+
+Serves ``/weather`` and ``/forecast`` with deterministic, OpenWeatherMap-shaped
+payloads (and placeholder condition icons under ``/img/wn/``) so the service layer can be exercised without a network connection
+or an API key. Latency, error rate and forecast size are configurable.
+Responses carry ``ETag``/``Last-Modified`` validators, and conditional
+requests for unchanged data are answered 304; ``max_age`` adds a
+``Cache-Control`` header.
+
+Two front ends share the same behaviour:
+
+* ``FakeWeatherServer`` is a real HTTP server on localhost. It counts the TCP
+  connections it accepts, which makes connection reuse visible to benchmarks.
+* ``FakeWeatherAPI.transport()`` is an ``httpx.MockTransport`` for fast,
+  socket-free tests.
+
+Run ``python fake_owm_server.py`` to point the app at it by hand.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Mapping, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+
+NOT_FOUND_PREFIX = "invalid"
+
+ICON_PATH = "/img/wn/"
+ICON_CODES = {
+    f"{code}{time_of_day}"
+    for code in ("01", "02", "03", "04", "09", "10", "11", "13", "50")
+    for time_of_day in ("d", "n")
+}
+# A 1x1 transparent PNG stands in for every condition icon
+ICON_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+
+def _seed(city: str) -> int:
+    """Stable per-city number used to vary the generated payloads."""
+    digest = hashlib.md5(city.strip().lower().encode("utf-8")).hexdigest()
+    return int(digest[:8], 16)
+
+
+def _temp(kelvin: float, unit: str) -> float:
+    if unit == "metric":
+        return round(kelvin - 273.15, 2)
+    if unit == "imperial":
+        return round((kelvin - 273.15) * 9 / 5 + 32, 2)
+    return round(kelvin, 2)
+
+
+def _speed(mps: float, unit: str) -> float:
+    if unit == "imperial":
+        return round(mps * 2.237, 2)
+    return round(mps, 2)
+
+
+def make_weather(city: str, unit: str = "standard", city_id: Optional[int] = None) -> Dict:
+    """Build a current-weather payload for ``city`` (with ``city_id`` if given)."""
+    seed = _seed(city)
+    kelvin = 273.15 + (seed % 35)
+    return {
+        "coord": {"lon": (seed % 360) - 180.0, "lat": (seed % 180) - 90.0},
+        "weather": [{"id": 800, "main": "Clear", "description": "clear sky", "icon": "01d"}],
+        "main": {
+            "temp": _temp(kelvin, unit),
+            "feels_like": _temp(kelvin - 1.5, unit),
+            "temp_min": _temp(kelvin - 2, unit),
+            "temp_max": _temp(kelvin + 2, unit),
+            "pressure": 1012,
+            "humidity": 40 + seed % 50,
+        },
+        "wind": {"speed": _speed(1 + seed % 9, unit), "deg": seed % 360},
+        "dt": 1700000000,
+        "sys": {"country": "XX"},
+        "timezone": 0,
+        "id": seed % 10_000_000 if city_id is None else city_id,
+        "name": city.strip().title(),
+        "cod": 200,
+    }
+
+
+def make_forecast(
+    city: str, unit: str = "standard", count: int = 40, city_id: Optional[int] = None
+) -> Dict:
+    """Build a 3-hourly forecast payload with ``count`` entries for ``city``."""
+    seed = _seed(city)
+    start = 1700006400  # 2023-11-15 00:00:00 UTC
+    entries = []
+    for i in range(count):
+        dt = start + i * 3 * 3600
+        kelvin = 273.15 + (seed % 30) + (i % 8) - 4
+        hour = (i * 3) % 24
+        icon = "10d" if i % 5 == 0 else ("01d" if 6 <= hour < 18 else "01n")
+        entries.append({
+            "dt": dt,
+            "main": {
+                "temp": _temp(kelvin, unit),
+                "feels_like": _temp(kelvin - 1, unit),
+                "temp_min": _temp(kelvin - 0.5, unit),
+                "temp_max": _temp(kelvin + 0.5, unit),
+                "pressure": 1010,
+                "humidity": 60,
+            },
+            "weather": [{
+                "id": 500 if icon == "10d" else 800,
+                "main": "Rain" if icon == "10d" else "Clear",
+                "description": "light rain" if icon == "10d" else "clear sky",
+                "icon": icon,
+            }],
+            "wind": {"speed": _speed(2 + i % 4, unit), "deg": 180},
+            "pop": 0.4 if icon == "10d" else 0,
+            "dt_txt": _dt_txt(dt),
+        })
+        if icon == "10d":
+            entries[-1]["rain"] = {"3h": 0.8}
+    return {
+        "cod": "200",
+        "cnt": count,
+        "list": entries,
+        "city": {
+            "id": seed % 10_000_000 if city_id is None else city_id,
+            "name": city.strip().title(),
+            "country": "XX",
+            "timezone": 0,
+        },
+    }
+
+
+def _dt_txt(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class FakeWeatherAPI:
+    """Request handling shared by the HTTP server and the in-process transport.
+
+    Args:
+        latency: Seconds added to every response
+        error_rate: Fraction of requests answered with HTTP 500
+        forecast_count: Entries per forecast, to vary the payload size
+        seed: Seed for the error-rate RNG so runs are reproducible
+        validators: Send ETag/Last-Modified and answer conditional requests
+        max_age: Seconds sent as ``Cache-Control: max-age``, if given
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        forecast_count: int = 40,
+        seed: Optional[int] = 0,
+        validators: bool = True,
+        max_age: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.forecast_count = forecast_count
+        self.validators = validators
+        self.max_age = max_age
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self.bytes_sent = 0  # response bodies only
+
+    def respond(self, path: str, query: Dict[str, str]) -> Tuple[int, Union[Dict, bytes]]:
+        """Return ``(status, payload)`` for a GET of ``path`` with ``query``.
+
+        The payload is a JSON document, or PNG bytes for condition icons.
+        """
+        with self._lock:
+            self.requests += 1
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if fail:
+            return 500, {"cod": "500", "message": "Internal error"}
+
+        if path.startswith(ICON_PATH):
+            code = path[len(ICON_PATH):].split("@")[0]
+            if code in ICON_CODES:
+                return 200, ICON_PNG
+            return 404, {"cod": "404", "message": "icon not found"}
+
+        city_id = int(query["id"]) if "id" in query else None
+        if city_id is not None:
+            city = f"City {city_id}"
+        else:
+            city = query.get("q") or f"{query.get('lat', '0')},{query.get('lon', '0')}"
+        unit = query.get("units", "standard")
+        if city.lower().startswith(NOT_FOUND_PREFIX):
+            return 404, {"cod": "404", "message": "city not found"}
+        if path.endswith("/weather"):
+            return 200, make_weather(city, unit, city_id)
+        if path.endswith("/forecast"):
+            return 200, make_forecast(city, unit, self.forecast_count, city_id)
+        return 404, {"cod": "404", "message": "Internal error"}
+
+    def handle(
+        self, path: str, query: Dict[str, str], headers: Mapping[str, str]
+    ) -> Tuple[int, bytes, Dict[str, str]]:
+        """Return ``(status, body, headers)``, honouring conditional request ``headers``."""
+        status, payload = self.respond(path, query)
+        if isinstance(payload, bytes):
+            body, response_headers = payload, {"Content-Type": "image/png"}
+        else:
+            body = json.dumps(payload).encode("utf-8")
+            response_headers = {"Content-Type": "application/json; charset=utf-8"}
+
+        if status == 200 and not isinstance(payload, bytes):
+            if self.max_age is not None:
+                response_headers["Cache-Control"] = f"max-age={self.max_age}"
+            if self.validators and self._validate(payload, body, headers, response_headers):
+                status, body = 304, b""
+                with self._lock:
+                    self.not_modified += 1
+        with self._lock:
+            self.bytes_sent += len(body)
+        return status, body, response_headers
+
+    @staticmethod
+    def _validate(
+        payload: Dict, body: bytes, headers: Mapping[str, str], response_headers: Dict[str, str]
+    ) -> bool:
+        """Add validators to ``response_headers``; True if the client's copy is current."""
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        response_headers["ETag"] = etag
+        modified = payload.get("dt")
+        if isinstance(modified, int):
+            response_headers["Last-Modified"] = formatdate(modified, usegmt=True)
+
+        if "If-None-Match" in headers:
+            return etag in (tag.strip() for tag in headers["If-None-Match"].split(","))
+        since = headers.get("If-Modified-Since")
+        if since and isinstance(modified, int):
+            try:
+                return parsedate_to_datetime(since).timestamp() >= modified
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def transport(self) -> httpx.MockTransport:
+        """An httpx transport answering in-process, without any sockets."""
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            status, body, headers = self.handle(
+                request.url.path, dict(request.url.params), request.headers
+            )
+            return httpx.Response(status, content=body, headers=headers)
+
+        return httpx.MockTransport(handler)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.record_connection()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        if self.server.api.latency:
+            time.sleep(self.server.api.latency)
+        status, body, headers = self.server.api.handle(parsed.path, query, self.headers)
+        self._send(status, body, headers)
+
+    def _send(self, status: int, body: bytes, headers: Dict[str, str]):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeWeatherServer(ThreadingHTTPServer):
+    """Threaded HTTP/1.1 server answering like OpenWeatherMap.
+
+    Accepts the same options as ``FakeWeatherAPI``, or a ready-made ``api``.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        api: Optional[FakeWeatherAPI] = None,
+        **options,
+    ):
+        super().__init__((host, port), _Handler)
+        self.api = api or FakeWeatherAPI(**options)
+        self._lock = threading.Lock()
+        self.connections = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    @property
+    def requests(self) -> int:
+        return self.api.requests
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def weather_url(self) -> str:
+        return f"{self.base_url}/data/2.5/weather"
+
+    @property
+    def forecast_url(self) -> str:
+        return f"{self.base_url}/data/2.5/forecast"
+
+    @property
+    def icon_url(self) -> str:
+        return f"{self.base_url}{ICON_PATH}{{icon}}@2x.png"
+
+    def start(self) -> "FakeWeatherServer":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the socket."""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenWeatherMap API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--forecast-count", type=int, default=40)
+    parser.add_argument("--max-age", type=int, help="send Cache-Control: max-age")
+    args = parser.parse_args()
+
+    with FakeWeatherServer(
+        port=args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        forecast_count=args.forecast_count,
+        max_age=args.max_age,
+    ) as server:
+        print(f"Fake OpenWeatherMap API listening on {server.base_url}")
+        print(f"  OPENWEATHER_BASE_URL={server.weather_url}")
+        print(f"  OPENWEATHER_FORECAST_URL={server.forecast_url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,207 @@
+"""Daily aggregation of a ``Forecast``.
+
+Forecast steps are grouped by the city's *local* calendar day (UTC timestamp
+plus the API's ``city.timezone`` offset), not by the UTC date in ``dt_txt``,
+so a city far from Greenwich gets its evening steps on the right day.
+
+For every day ``aggregate_daily`` computes the high, low and mean
+temperature, total precipitation, highest chance of precipitation, strongest
+wind and the dominant condition. With NumPy installed, long series are
+computed in one vectorized pass over the forecast columns; short ones (and
+everything when NumPy is missing) take a single pure-Python pass that gives
+the same result. NumPy is only imported once a series is long enough to
+need it, so the app's 40-step forecasts never pay for importing it.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+from forecast_model import Forecast
+
+np = None  # NumPy, set by load_numpy()
+_numpy_checked = False
+
+SECONDS_PER_DAY = 86400
+# Below this many steps NumPy's per-call overhead outweighs its speed-up
+NUMPY_MIN_STEPS = 256
+
+
+def load_numpy():
+    """Import NumPy on first use; ``None`` if it is not installed (it is optional)."""
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np
+
+
+@dataclass
+class DailySummary:
+    """Aggregated forecast for one local day, in the forecast's unit system."""
+    day: date
+    high: float
+    low: float
+    mean: float
+    precipitation: float  # mm, rain plus snow
+    pop: float  # highest probability of precipitation, 0..1
+    max_wind: float
+    condition_id: int
+    icon: str
+    description: str
+    steps: int
+
+
+def local_days(forecast: Forecast) -> List[int]:
+    """Local day number (days since the epoch) of every forecast step."""
+    offset = forecast.timezone
+    return [(dt + offset) // SECONDS_PER_DAY for dt in forecast.dt]
+
+
+def _dominant(counts: Dict[int, int]) -> int:
+    """Most frequent condition code; ties go to the lower, more significant code.
+
+    OpenWeatherMap codes run from thunderstorm (2xx) through rain and snow to
+    clear sky (800) and clouds (80x), so a rainy step outweighs a clear one.
+    """
+    return min(counts, key=lambda code: (-counts[code], code))
+
+
+def _icon_for(forecast: Forecast, indices: List[int], code: int) -> int:
+    """Index of the step whose icon represents ``code``, preferring daytime."""
+    matching = [i for i in indices if forecast.condition_id[i] == code]
+    for i in matching:
+        if forecast.icon[i].endswith("d"):
+            return i
+    return matching[0]
+
+
+def _summary(forecast: Forecast, day: int, code: int, shown: int, steps: int, values) -> DailySummary:
+    high, low, mean, precipitation, pop, max_wind = values
+    return DailySummary(
+        day=datetime.fromtimestamp(day * SECONDS_PER_DAY, tz=timezone.utc).date(),
+        high=float(high),
+        low=float(low),
+        mean=float(mean),
+        precipitation=float(precipitation),
+        pop=float(pop),
+        max_wind=float(max_wind),
+        condition_id=int(code),
+        icon=forecast.icon[shown],
+        description=forecast.description[shown],
+        steps=steps,
+    )
+
+
+def aggregate_daily_python(forecast: Forecast) -> List[DailySummary]:
+    """Pure-Python ``aggregate_daily``."""
+    groups: Dict[int, List[int]] = {}
+    for index, day in enumerate(local_days(forecast)):
+        groups.setdefault(day, []).append(index)
+
+    summaries = []
+    for day in sorted(groups):
+        indices = groups[day]
+        counts: Dict[int, int] = {}
+        for i in indices:
+            code = forecast.condition_id[i]
+            counts[code] = counts.get(code, 0) + 1
+        values = (
+            max(forecast.temp_max[i] for i in indices),
+            min(forecast.temp_min[i] for i in indices),
+            sum(forecast.temp[i] for i in indices) / len(indices),
+            sum(forecast.precipitation[i] for i in indices),
+            max(forecast.pop[i] for i in indices),
+            max(forecast.wind_speed[i] for i in indices),
+        )
+        code = _dominant(counts)
+        shown = _icon_for(forecast, indices, code)
+        summaries.append(_summary(forecast, day, code, shown, len(indices), values))
+    return summaries
+
+
+def _group_firsts(group, size: int):
+    """Mask of the first element of each run in the sorted ``group`` array."""
+    first = np.ones(size, dtype=bool)
+    first[1:] = group[1:] != group[:-1]
+    return first
+
+
+def aggregate_daily_numpy(forecast: Forecast) -> List[DailySummary]:
+    """NumPy ``aggregate_daily``: every statistic is one grouped array operation."""
+    if load_numpy() is None:
+        raise RuntimeError("NumPy is not installed")
+    size = len(forecast)
+    if not size:
+        return []
+    days = (np.frombuffer(forecast.dt, dtype=np.int64) + forecast.timezone) // SECONDS_PER_DAY
+    # Sort steps by day once; every statistic is then a reduction over runs
+    order = np.argsort(days, kind="stable")
+    days = days[order]
+    first = _group_firsts(days, size)
+    starts = np.flatnonzero(first)
+    steps = np.diff(np.append(starts, size))
+    group = np.cumsum(first) - 1
+
+    def column(name):
+        return np.frombuffer(getattr(forecast, name), dtype=np.float64)[order]
+
+    high = np.maximum.reduceat(column("temp_max"), starts)
+    low = np.minimum.reduceat(column("temp_min"), starts)
+    mean = np.add.reduceat(column("temp"), starts) / steps
+    precipitation = np.add.reduceat(column("precipitation"), starts)
+    pop = np.maximum.reduceat(column("pop"), starts)
+    max_wind = np.maximum.reduceat(column("wind_speed"), starts)
+
+    # Mode per day: count (day, code) pairs, then order by day, count desc, code
+    codes = np.asarray(forecast.condition_id, dtype=np.int64)[order]
+    base = int(codes.max()) + 1
+    pairs, counts = np.unique(group * base + codes, return_counts=True)
+    pair_group, pair_code = np.divmod(pairs, base)
+    ranked = np.lexsort((pair_code, -counts, pair_group))
+    dominant = pair_code[ranked][_group_firsts(pair_group[ranked], len(ranked))]
+
+    # Icon: first daytime step with the dominant code, else its first step
+    is_daytime = np.char.endswith(np.asarray(forecast.icon, dtype=str), "d")[order]
+    rank = np.where(codes == dominant[group], np.where(is_daytime, 0, 1), 2)
+    ranked = np.lexsort((np.arange(size), rank, group))
+    shown = order[ranked[_group_firsts(group[ranked], size)]]
+
+    return [
+        _summary(
+            forecast,
+            int(days[starts[g]]),
+            int(dominant[g]),
+            int(shown[g]),
+            int(steps[g]),
+            (high[g], low[g], mean[g], precipitation[g], pop[g], max_wind[g]),
+        )
+        for g in range(len(starts))
+    ]
+
+
+def aggregate_daily(
+    forecast: Forecast, days: Optional[int] = None, use_numpy: Optional[bool] = None
+) -> List[DailySummary]:
+    """
+    Summarize a forecast per local day.
+
+    Args:
+        forecast: Forecast to aggregate
+        days: Return at most this many days (all if ``None``)
+        use_numpy: Force (``True``) or avoid (``False``) the NumPy path; by
+            default it is used for ``NUMPY_MIN_STEPS`` steps or more when
+            NumPy is installed
+
+    Returns:
+        DailySummary objects in chronological order
+    """
+    if use_numpy is None:
+        use_numpy = len(forecast) >= NUMPY_MIN_STEPS and load_numpy() is not None
+    aggregate = aggregate_daily_numpy if use_numpy else aggregate_daily_python
+    summaries = aggregate(forecast)
+    return summaries if days is None else summaries[:days]
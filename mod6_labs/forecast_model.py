@@ -0,0 +1,185 @@
+"""Compact, typed representation of a 5-day forecast.
+
+A forecast response is ~40 entries of nested dictionaries, each with a dozen
+keys the app never reads. ``Forecast`` keeps one column per field instead:
+``array('d')`` for measurements, ``array('q')`` for timestamps and plain
+lists of interned strings for icons and descriptions. Columns are cheap to
+convert (one linear pass per array) and cheap to aggregate, and reading a
+value is an index instead of a chain of ``.get()`` calls.
+"""
+
+from array import array
+from sys import intern
+from typing import Dict, Iterator, List
+
+import units
+
+
+class ForecastPoint:
+    """One forecast time step, as read from a ``Forecast``."""
+
+    __slots__ = (
+        "dt", "temp", "feels_like", "temp_min", "temp_max", "humidity",
+        "wind_speed", "pop", "precipitation", "condition_id", "icon", "description",
+    )
+
+    def __init__(self, dt, temp, feels_like, temp_min, temp_max, humidity,
+                 wind_speed, pop, precipitation, condition_id, icon, description):
+        self.dt = dt
+        self.temp = temp
+        self.feels_like = feels_like
+        self.temp_min = temp_min
+        self.temp_max = temp_max
+        self.humidity = humidity
+        self.wind_speed = wind_speed
+        self.pop = pop
+        self.precipitation = precipitation
+        self.condition_id = condition_id
+        self.icon = icon
+        self.description = description
+
+    def __repr__(self) -> str:
+        return f"ForecastPoint(dt={self.dt}, temp={self.temp:.2f}, icon={self.icon!r})"
+
+
+class Forecast:
+    """Column-oriented forecast in a single unit system.
+
+    Attributes:
+        unit: Unit system of the temperature and wind columns
+        city: City name reported by the API
+        timezone: Offset of the city's local time from UTC, in seconds
+        dt: UTC timestamps of each time step
+        temp, feels_like, temp_min, temp_max: Temperatures
+        humidity: Relative humidity in percent
+        wind_speed: Wind speed
+        pop: Probability of precipitation, 0..1
+        precipitation: Rain plus snow volume for the step, in mm
+        condition_id: OpenWeatherMap condition code
+        icon, description: Condition icon code and text
+    """
+
+    __slots__ = (
+        "unit", "city", "timezone", "dt", "temp", "feels_like", "temp_min",
+        "temp_max", "humidity", "wind_speed", "pop", "precipitation",
+        "condition_id", "icon", "description",
+    )
+
+    # Columns holding unit-dependent values
+    TEMPERATURE_COLUMNS = ("temp", "feels_like", "temp_min", "temp_max")
+    SPEED_COLUMNS = ("wind_speed",)
+
+    def __init__(self, unit: str = units.STANDARD, city: str = "", timezone: int = 0):
+        self.unit = unit
+        self.city = city
+        self.timezone = timezone
+        self.dt = array("q")
+        self.temp = array("d")
+        self.feels_like = array("d")
+        self.temp_min = array("d")
+        self.temp_max = array("d")
+        self.humidity = array("d")
+        self.wind_speed = array("d")
+        self.pop = array("d")
+        self.precipitation = array("d")
+        self.condition_id = array("l")
+        self.icon: List[str] = []
+        self.description: List[str] = []
+
+    @classmethod
+    def from_payload(cls, data: Dict, unit: str = units.STANDARD) -> "Forecast":
+        """
+        Build a forecast from a ``/forecast`` response.
+
+        Missing fields (e.g. in a compact streamed forecast) become 0 or "".
+
+        Args:
+            data: Forecast response
+            unit: Unit system ``data`` is expressed in
+
+        Returns:
+            A new Forecast in ``unit``
+        """
+        city = data.get("city") or {}
+        forecast = cls(unit, city.get("name", ""), city.get("timezone", 0) or 0)
+        for entry in data.get("list", []):
+            main = entry.get("main") or {}
+            wind = entry.get("wind") or {}
+            conditions = entry.get("weather") or [{}]
+            condition = conditions[0]
+            rain = (entry.get("rain") or {}).get("3h", 0.0)
+            snow = (entry.get("snow") or {}).get("3h", 0.0)
+
+            forecast.dt.append(int(entry.get("dt", 0)))
+            temp = main.get("temp", 0.0)
+            forecast.temp.append(temp)
+            forecast.feels_like.append(main.get("feels_like", temp))
+            forecast.temp_min.append(main.get("temp_min", temp))
+            forecast.temp_max.append(main.get("temp_max", temp))
+            forecast.humidity.append(main.get("humidity", 0))
+            forecast.wind_speed.append(wind.get("speed", 0.0))
+            forecast.pop.append(entry.get("pop", 0.0))
+            forecast.precipitation.append(rain + snow)
+            forecast.condition_id.append(condition.get("id", 0))
+            # Forecasts repeat a handful of icons and descriptions; share them
+            forecast.icon.append(intern(condition.get("icon", "01d")))
+            forecast.description.append(intern(condition.get("description", "")))
+        return forecast
+
+    def to_unit(self, unit: str) -> "Forecast":
+        """
+        Return this forecast in another unit system.
+
+        Only the temperature and wind columns are converted (one linear pass
+        over each array); every other column is shared with ``self``.
+
+        Args:
+            unit: Target unit system
+
+        Returns:
+            ``self`` if already in ``unit``, otherwise a new Forecast
+        """
+        if unit == self.unit:
+            return self
+
+        scale, offset = units.temperature_transform(self.unit, unit)
+        speed = units.speed_scale(self.unit, unit)
+        converted = Forecast(unit, self.city, self.timezone)
+        for name in self.__slots__[3:]:
+            setattr(converted, name, getattr(self, name))
+        for name in self.TEMPERATURE_COLUMNS:
+            setattr(converted, name, array("d", [v * scale + offset for v in getattr(self, name)]))
+        for name in self.SPEED_COLUMNS:
+            setattr(converted, name, array("d", [v * speed for v in getattr(self, name)]))
+        return converted
+
+    def __len__(self) -> int:
+        return len(self.dt)
+
+    def __getitem__(self, index: int) -> ForecastPoint:
+        return ForecastPoint(
+            self.dt[index], self.temp[index], self.feels_like[index],
+            self.temp_min[index], self.temp_max[index], self.humidity[index],
+            self.wind_speed[index], self.pop[index], self.precipitation[index],
+            self.condition_id[index], self.icon[index], self.description[index],
+        )
+
+    def __iter__(self) -> Iterator[ForecastPoint]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def local_time(self, index: int) -> int:
+        """Timestamp of step ``index`` shifted to the city's local time."""
+        return self.dt[index] + self.timezone
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the columns (strings are shared)."""
+        total = 0
+        for name in self.__slots__[3:]:
+            column = getattr(self, name)
+            if isinstance(column, array):
+                total += column.itemsize * len(column)
+            else:
+                total += 8 * len(column)  # one pointer per interned string
+        return total
+
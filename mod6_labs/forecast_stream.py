@@ -0,0 +1,233 @@
+"""Incremental parsing of forecast responses.
+
+``response.json()`` needs the whole body in memory and then builds every
+nested object of every forecast entry, although the app only reads a few
+fields per entry. ``ForecastStreamParser`` is fed the body chunk by chunk,
+decodes one ``list`` entry at a time and keeps only the configured fields, so
+neither the full body nor the full object tree is ever held at once.
+
+Values are decoded with ``json.JSONDecoder.raw_decode`` (the C scanner); only
+the punctuation between values is handled in Python. That Python loop makes
+parsing about 5x slower than ``json.loads``, in exchange for a peak memory
+about a quarter to a third lower on large forecasts, so it is opt-in.
+"""
+
+import codecs
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+FieldPath = Tuple[Union[str, int], ...]
+
+# What forecast_model.Forecast reads from each forecast entry
+DISPLAY_FIELDS: Sequence[FieldPath] = (
+    ("dt",),
+    ("main", "temp"),
+    ("main", "feels_like"),
+    ("main", "temp_min"),
+    ("main", "temp_max"),
+    ("main", "humidity"),
+    ("wind", "speed"),
+    ("pop",),
+    ("rain", "3h"),
+    ("snow", "3h"),
+    ("weather", 0, "id"),
+    ("weather", 0, "icon"),
+    ("weather", 0, "description"),
+)
+
+_WHITESPACE = " \t\n\r"
+
+
+class ForecastStreamError(ValueError):
+    """The streamed body is not a valid forecast document."""
+
+
+def _get_path(value: Any, path: FieldPath) -> Tuple[bool, Any]:
+    for part in path:
+        try:
+            value = value[part]
+        except (KeyError, IndexError, TypeError):
+            return False, None
+    return True, value
+
+
+def _set_path(target: Dict, path: FieldPath, value: Any):
+    """Set ``path`` in ``target``, creating dicts and one-element lists."""
+    node: Any = target
+    for part, next_part in zip(path, path[1:]):
+        if isinstance(part, int):
+            while len(node) <= part:
+                node.append({} if not isinstance(next_part, int) else [])
+            node = node[part]
+        else:
+            node = node.setdefault(part, [] if isinstance(next_part, int) else {})
+    last = path[-1]
+    if isinstance(last, int):
+        while len(node) <= last:
+            node.append(None)
+    node[last] = value
+
+
+def prune(entry: Dict, fields: Iterable[FieldPath]) -> Dict:
+    """Return a copy of ``entry`` holding only ``fields``, keeping its nesting."""
+    pruned: Dict = {}
+    for path in fields:
+        found, value = _get_path(entry, path)
+        if found:
+            _set_path(pruned, path, value)
+    return pruned
+
+
+class ForecastStreamParser:
+    """Push parser turning a forecast body into a compact forecast dict.
+
+    Feed bytes with ``feed()`` and call ``close()`` at the end of the body to
+    get ``{"list": [pruned entries...], <other top-level members>}``.
+    """
+
+    def __init__(self, fields: Sequence[FieldPath] = DISPLAY_FIELDS, encoding: str = "utf-8"):
+        self.fields = tuple(fields)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        # expect: "start" -> "key" -> "colon" -> "value" | "list" ... -> "done"
+        self._state = "start"
+        self._key: Optional[str] = None
+        self._eof = False
+        self.result: Dict[str, Any] = {}
+        self.entries: List[Dict] = []
+        self.entries_seen = 0
+
+    def feed(self, chunk: bytes):
+        """Consume the next piece of the body."""
+        self._buf += self._decoder.decode(chunk)
+        self._parse()
+
+    def close(self) -> Dict:
+        """Finish parsing and return the compact forecast."""
+        self._buf += self._decoder.decode(b"", final=True)
+        self._eof = True
+        self._parse()
+        if self._state != "done":
+            raise ForecastStreamError("Unexpected end of forecast data")
+        self.result["list"] = self.entries
+        return self.result
+
+    # -- scanning helpers -------------------------------------------------
+
+    def _skip_ws(self) -> bool:
+        """Skip whitespace; return whether a non-space character is available."""
+        buf, pos = self._buf, self._pos
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return pos < len(buf)
+
+    def _expect(self, *chars: str) -> Optional[str]:
+        """Consume one of ``chars``; ``None`` if more data is needed."""
+        if not self._skip_ws():
+            return None
+        char = self._buf[self._pos]
+        if char not in chars:
+            raise ForecastStreamError(f"Expected one of {chars!r}, got {char!r}")
+        self._pos += 1
+        return char
+
+    def _value(self) -> Tuple[bool, Any]:
+        """Decode one JSON value; ``(False, None)`` if it is not complete yet."""
+        if not self._skip_ws():
+            return False, None
+        try:
+            value, end = self._json.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError as e:
+            if self._eof:
+                raise ForecastStreamError(str(e)) from None
+            return False, None
+        if end == len(self._buf) and not self._eof:
+            # A number may continue in the next chunk ("4" of "40")
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _compact(self):
+        if self._pos > 65536:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+
+    # -- state machine ----------------------------------------------------
+
+    def _parse(self):
+        while self._state != "done":
+            if not self._step():
+                break
+            self._compact()
+        self._compact()
+
+    def _step(self) -> bool:
+        """Advance one token; return ``False`` when more data is needed."""
+        state = self._state
+        if state == "start":
+            if self._expect("{") is None:
+                return False
+            self._state = "key"
+        elif state == "key":
+            if not self._skip_ws():
+                return False
+            if self._buf[self._pos] == "}":
+                self._pos += 1
+                self._state = "done"
+                return True
+            complete, key = self._value()
+            if not complete:
+                return False
+            if not isinstance(key, str):
+                raise ForecastStreamError("Object keys must be strings")
+            self._key = key
+            self._state = "colon"
+        elif state == "colon":
+            if self._expect(":") is None:
+                return False
+            self._state = "list_open" if self._key == "list" else "value"
+        elif state == "value":
+            complete, value = self._value()
+            if not complete:
+                return False
+            self.result[self._key] = value
+            self._state = "after_value"
+        elif state == "after_value":
+            char = self._expect(",", "}")
+            if char is None:
+                return False
+            self._state = "key" if char == "," else "done"
+        elif state == "list_open":
+            if self._expect("[") is None:
+                return False
+            self._state = "list_item"
+        elif state == "list_item":
+            if not self._skip_ws():
+                return False
+            if self._buf[self._pos] == "]":
+                self._pos += 1
+                self._state = "after_value"
+                return True
+            complete, entry = self._value()
+            if not complete:
+                return False
+            self.entries.append(prune(entry, self.fields))
+            self.entries_seen += 1
+            self._state = "list_next"
+        elif state == "list_next":
+            char = self._expect(",", "]")
+            if char is None:
+                return False
+            self._state = "list_item" if char == "," else "after_value"
+        return True
+
+
+def parse_forecast_chunks(chunks: Iterable[bytes], fields: Sequence[FieldPath] = DISPLAY_FIELDS) -> Dict:
+    """Parse a forecast body given as an iterable of byte chunks."""
+    parser = ForecastStreamParser(fields)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
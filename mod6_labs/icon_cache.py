@@ -0,0 +1,127 @@
+"""Local cache of the OpenWeatherMap condition icons.
+
+Pointing ``ft.Image.src`` at openweathermap.org makes the Flet client fetch
+the icon again on every render, and the display stalls on a slow link. The
+~18 condition icons never change, so ``IconCache`` downloads each one once
+into Flet's assets directory and hands out local asset paths from then on.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import httpx
+
+from config import Config
+
+# Every icon code OpenWeatherMap uses: nine conditions, day and night
+ICON_CODES = tuple(
+    f"{code}{time_of_day}"
+    for code in ("01", "02", "03", "04", "09", "10", "11", "13", "50")
+    for time_of_day in ("d", "n")
+)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class IconCache:
+    """Condition icons stored under ``<assets_dir>/icons``.
+
+    ``src()`` returns the asset path of an icon that is on disk and the
+    remote URL otherwise, so rendering never waits for a download and keeps
+    working offline for every icon fetched before. ``preload()`` downloads
+    the missing icons in the background.
+
+    Args:
+        assets_dir: Directory passed to ``ft.app(assets_dir=...)``
+        url_template: Remote icon URL with an ``{icon}`` placeholder;
+            ``Config.ICON_URL`` by default
+        transport: Optional httpx transport, used by the tests
+    """
+
+    SUBDIR = "icons"
+
+    def __init__(
+        self,
+        assets_dir: Union[str, Path] = Config.ASSETS_DIR,
+        url_template: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.directory = Path(assets_dir) / self.SUBDIR
+        if url_template is None:
+            Config.load()
+            url_template = Config.ICON_URL
+        self.url_template = url_template
+        self.transport = transport
+        self._local = set()
+        if self.directory.is_dir():
+            self._local = {path.name.split("@")[0] for path in self.directory.glob("*@2x.png")}
+        self.downloaded = 0
+        self.failed = 0
+
+    @staticmethod
+    def filename(icon: str) -> str:
+        return f"{icon}@2x.png"
+
+    def is_local(self, icon: str) -> bool:
+        return icon in self._local
+
+    def src(self, icon: str) -> str:
+        """Image source for ``icon``: a local asset if cached, else the remote URL."""
+        if icon in self._local:
+            return f"/{self.SUBDIR}/{self.filename(icon)}"
+        return self.url_template.format(icon=icon)
+
+    async def preload(self, icons: Iterable[str] = ICON_CODES) -> int:
+        """
+        Download the icons that are not cached yet.
+
+        Failures (e.g. when offline) are counted in ``failed`` and leave
+        ``src()`` returning the remote URL for that icon.
+
+        Args:
+            icons: Icon codes to make available locally
+
+        Returns:
+            Number of icons downloaded
+        """
+        missing = [icon for icon in dict.fromkeys(icons) if icon not in self._local]
+        if not missing:
+            return 0
+        # Building the client's TLS context takes tens of ms; keep it off the loop
+        client = await asyncio.to_thread(
+            httpx.AsyncClient, transport=self.transport, timeout=Config.TIMEOUT
+        )
+        async with client:
+            results = await asyncio.gather(*(self._download(client, icon) for icon in missing))
+        return sum(results)
+
+    async def _download(self, client: httpx.AsyncClient, icon: str) -> bool:
+        try:
+            response = await client.get(self.url_template.format(icon=icon))
+            response.raise_for_status()
+        except httpx.HTTPError:
+            self.failed += 1
+            return False
+        if not response.content.startswith(PNG_SIGNATURE):
+            # A captive portal or proxy error page is not an icon
+            self.failed += 1
+            return False
+
+        try:
+            await asyncio.to_thread(self._write, icon, response.content)
+        except OSError:
+            self.failed += 1
+            return False
+        self._local.add(icon)
+        self.downloaded += 1
+        return True
+
+    def _write(self, icon: str, data: bytes):
+        """Write atomically so a half-written file is never served."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.directory / self.filename(icon)
+        temporary = target.with_name(target.name + ".tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, target)
@@ -1,14 +1,84 @@
 # main.py
-"""Weather Application using Flet v0.28.3"""
+"""Weather Application using Flet v0.28.3
+
+Only what the first frame needs is imported up front. The weather service,
+icon cache, city index and forecast aggregation are imported when first
+used, after the window is up (see ``benchmarks/startup.py``).
+"""
 
 import flet as ft
-from weather_service import WeatherService
+from metrics import MetricsRegistry
+from storage import JsonStore
+from update_scheduler import UpdateScheduler
 from config import Config
+import units
 import asyncio
-import json
+import threading
+import time
+from functools import partial
 from pathlib import Path
-from datetime import datetime
-from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from city_index import City, CityIndex
+    from forecast_aggregate import DailySummary
+    from forecast_model import Forecast
+    from icon_cache import IconCache
+    from observations import ObservationStore, Summary
+    from weather_service import WeatherService
+
+
+def format_age(seconds: float) -> str:
+    """Describe how long ago something happened, e.g. "5 min ago"."""
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min ago"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)} h ago"
+    return f"{int(seconds // 86400)} days ago"
+
+
+class ForecastCard:
+    """One day of the forecast, built once and then updated in place.
+
+    Flet only marks a property dirty when its value changes, so refilling a
+    card with new values makes ``page.update()`` send just the changed
+    ``value``/``src`` props instead of a whole new control subtree.
+    """
+
+    def __init__(self):
+        # Fixed text colors for dark mode readability
+        self.date_text = ft.Text("", size=16, weight=ft.FontWeight.BOLD, width=80, color=ft.Colors.BLACK)
+        # Shown instead of the icon if it cannot be loaded (offline, not cached)
+        self.icon_image = ft.Image(width=30, height=30, error_content=ft.Icon(ft.Icons.CLOUD_OUTLINED))
+        self.description_text = ft.Text("", size=14, italic=True, expand=True, color=ft.Colors.BLACK)
+        self.high_text = ft.Text("", size=14, color=ft.Colors.BLACK)
+        self.low_text = ft.Text("", size=14, color=ft.Colors.BLACK)
+        self.control = ft.Container(
+            content=ft.Row(
+                [self.date_text, self.icon_image, self.description_text, self.high_text, self.low_text],
+                alignment=ft.MainAxisAlignment.START,
+                spacing=10,
+            ),
+            bgcolor=ft.Colors.WHITE,
+            padding=10,
+            border_radius=10,
+            margin=ft.margin.only(bottom=5),
+            visible=False,
+        )
+
+    def show(self, summary: "DailySummary", unit_symbol: str, icon_src: str):
+        """Fill the card with one day's summary."""
+        self.date_text.value = summary.day.strftime("%a, %b %d")
+        self.icon_image.src = icon_src
+        self.description_text.value = summary.description.title()
+        self.high_text.value = f"H: {summary.high:.1f}{unit_symbol}"
+        self.low_text.value = f"L: {summary.low:.1f}{unit_symbol}"
+        self.control.visible = True
+
+    def hide(self):
+        self.control.visible = False
 
 
 class WeatherApp:
@@ -16,55 +86,142 @@ class WeatherApp:
     
     def __init__(self, page: ft.Page):
         self.page = page
-        self.weather_service = WeatherService()
-        self.history_file = Path("search_history.json")
-        self.settings_file = Path("settings.json")
-        self.search_history = self.load_history()
-        self.settings = self.load_settings()
-        self.current_unit = self.settings.get("unit", "metric")
+        # Timings of the service's requests and of rendering; Ctrl+Shift+M shows them
+        self.metrics = MetricsRegistry()
+        self.metrics_server = None
+        self._metrics_task = None  # refreshes the overlay while it is shown
+        # Merges the page.update() calls of one frame into a single message
+        self.ui = UpdateScheduler(self.update_page, page.loop, Config.UI_UPDATE_INTERVAL)
+        # Created on first use; see the weather_service and icons properties
+        self._weather_service: Optional["WeatherService"] = None
+        self._service_lock = threading.Lock()  # prepare_service() runs in a worker thread
+        self._icons: Optional["IconCache"] = None
+        # Loaded off the event loop by load_state() once the UI is up
+        self.history_store = JsonStore(Path("search_history.json"), [], page.loop)
+        self.settings_store = JsonStore(Path("settings.json"), {"unit": "metric"}, page.loop)
+        self.search_history = []
+        self.current_unit = "metric"
+        # Offline city list for suggestions; None until loaded or if not built
+        self.city_index: Optional["CityIndex"] = None
+        # OpenWeatherMap IDs of the cities picked from suggestions, by label
+        self.city_ids: Dict[str, int] = {}
         
         # UI controls for dynamic updates
         self.current_temp = None
         self.feels_like = None
         self.wind_speed = None
         self.current_city = None
+        self.current_city_id: Optional[int] = None
+        self.current_utc_offset = 0  # seconds; the city's local time
+        self.forecast_data: Optional["Forecast"] = None  # last forecast, in current_unit
+        # Hourly and daily temperatures of the current city, in kelvin
+        self.trend: Optional[Tuple[List["Summary"], List["Summary"]]] = None
+        self._search_task = None  # Future of the search currently in flight
+        self._last_search_at = float("-inf")  # time.monotonic() of the last search
         
         # Flet controls need to be explicitly managed for color and updates
         self.temp_text = ft.Text("", size=48, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_900)
         self.feels_like_text = ft.Text("", size=16, color=ft.Colors.GREY_700)
         self.wind_value_text = ft.Text("", size=16, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_900)
         self.desc_text = ft.Text("", size=20, italic=True)
-        self.icon_image = ft.Image(width=100, height=100)
+        self.icon_image = ft.Image(
+            width=100, height=100, error_content=ft.Icon(ft.Icons.CLOUD_OUTLINED, size=60)
+        )
+        self.humidity_value_text = ft.Text("", size=16, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_900)
         self.city_text = ft.Text("", size=24, weight=ft.FontWeight.BOLD)
+        self.updated_text = ft.Text("", size=12, color=ft.Colors.GREY_600)
 
         self.setup_page()
         self.build_ui()
-    
-    def load_history(self):
-        if self.history_file.exists():
-            try:
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return []
-        return []
+
+        self.page.run_task(self.load_state)
+
+    @property
+    def weather_service(self) -> "WeatherService":
+        """The weather service, created (and its modules imported) on first use."""
+        with self._service_lock:
+            if self._weather_service is None:
+                from disk_cache import DiskCache
+                from observations import DAY, ObservationStore
+                from weather_service import WeatherService
+
+                self._weather_service = WeatherService(
+                    disk_cache=DiskCache(Config.DISK_CACHE_FILE, Config.DISK_CACHE_MAX_BYTES),
+                    city_index=self.city_index,
+                    metrics=self.metrics,
+                    # Every fetched observation is kept for the trend panel
+                    observations=ObservationStore(
+                        Config.OBSERVATIONS_FILE,
+                        Config.OBSERVATION_RAW_RETENTION_DAYS * DAY,
+                        Config.OBSERVATION_HOURLY_RETENTION_DAYS * DAY,
+                    ),
+                )
+            return self._weather_service
+
+    @property
+    def icons(self) -> "IconCache":
+        """Local condition icon cache, created on first use."""
+        if self._icons is None:
+            from icon_cache import IconCache
+
+            self._icons = IconCache(Config.ASSETS_DIR)
+        return self._icons
+
+    def prepare_service(self):
+        """Import the service modules and create its HTTP client.
+
+        Runs in a worker thread after the first frame: the imports and the
+        client's TLS context take ~100 ms that would otherwise stall the
+        event loop.
+        """
+        import city_index  # noqa: F401
+
+        self.weather_service.client
+
+    async def load_state(self):
+        """Load search history, settings and the city index, then restore the last city."""
+        await asyncio.to_thread(self.prepare_service)
+        from city_index import CityIndex
+
+        if Config.METRICS_PORT:
+            from metrics import MetricsServer
+
+            self.metrics_server = MetricsServer(self.metrics, Config.METRICS_PORT).start()
+
+        history, settings, self.city_index = await asyncio.gather(
+            self.history_store.load_async(),
+            self.settings_store.load_async(),
+            asyncio.to_thread(CityIndex.open, Config.CITY_INDEX_FILE),
+        )
+
+        # Fetch any condition icons not cached yet, without blocking the UI
+        self.page.run_task(self.icons.preload)
+        # Lets coordinates resolve to the nearest known city offline
+        self.weather_service.city_index = self.city_index
+        # Searches made while loading come first
+        self.search_history = (
+            self.search_history + [c for c in history if c not in self.search_history]
+        )[:10]
+        if not self.settings_store.saves and settings.get("unit") in ("metric", "imperial"):
+            self.current_unit = settings["unit"]
+            self.unit_switch.value = self.current_unit == "imperial"
+        city_ids = settings.get("city_ids")
+        if isinstance(city_ids, dict):
+            for label, city_id in city_ids.items():
+                self.city_ids.setdefault(label, city_id)
+        self.update_history_dropdown()
+
+        # Show the last city from the disk cache right away, then refresh it
+        if self.search_history and (self._search_task is None or self._search_task.done()):
+            self.start_search(self.restore_last_city)
 
     def save_history(self):
-        with open(self.history_file, 'w') as f:
-            json.dump(self.search_history, f)
-
-    def load_settings(self):
-        if self.settings_file.exists():
-            try:
-                with open(self.settings_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                pass
-        return {"unit": "metric"}
+        self.history_store.save(list(self.search_history))
 
     def save_settings(self):
-        with open(self.settings_file, "w") as f:
-            json.dump({"unit": self.current_unit}, f)
+        # Only the IDs of cities still in the history are worth keeping
+        city_ids = {c: self.city_ids[c] for c in self.search_history if c in self.city_ids}
+        self.settings_store.save({"unit": self.current_unit, "city_ids": city_ids})
 
     def add_to_history(self, city: str):
         if city in self.search_history:
@@ -73,6 +230,8 @@ class WeatherApp:
         self.search_history.insert(0, city)
         self.search_history = self.search_history[:10]
         self.save_history()
+        if city in self.city_ids:
+            self.save_settings()
         self.update_history_dropdown()
         
     def setup_page(self):
@@ -94,6 +253,10 @@ class WeatherApp:
         
         # Center the window on desktop
         self.page.window.center()
+
+        # Release pooled HTTP connections when the session ends
+        self.page.on_close = self.on_close
+        self.page.on_keyboard_event = self.on_keyboard
         
     def build_ui(self):
         """Build the user interface."""
@@ -150,7 +313,15 @@ class WeatherApp:
             prefix_icon=ft.Icons.LOCATION_CITY,
             autofocus=True,
             on_submit=self.on_search,
+            on_change=self.on_city_input_change,
         )
+
+        # A fixed pool of suggestion buttons, refilled as the user types
+        self.suggestion_buttons = [
+            ft.TextButton(visible=False, on_click=self.on_suggestion_click)
+            for _ in range(Config.SUGGESTION_LIMIT)
+        ]
+        self.suggestions = ft.Column(self.suggestion_buttons, spacing=0, visible=False)
         
         self.search_button = ft.ElevatedButton(
             "Get Weather",
@@ -162,6 +333,17 @@ class WeatherApp:
             ),
         )
 
+        self.near_me_button = ft.IconButton(
+            icon=ft.Icons.MY_LOCATION,
+            tooltip="Weather near me",
+            icon_color=ft.Colors.BLUE_700,
+            on_click=self.on_near_me,
+        )
+        # Flet's built-in Geolocator is deprecated since 0.26 and goes in 0.29,
+        # where it moves to the flet-geolocator package; it warns at startup
+        self.geolocator = ft.Geolocator()
+        self.page.overlay.append(self.geolocator)
+
         self.history_dropdown = ft.Dropdown(
             label="Search History",
             width=120,
@@ -185,9 +367,18 @@ class WeatherApp:
             border_radius=10,
             padding=20,
         )
+
+        self.trend_container = ft.Container(
+            visible=False,
+            bgcolor=ft.Colors.BLUE_50,
+            border_radius=10,
+            padding=20,
+        )
         
-        self.weather_container.content = self._build_weather_content()
-        self.forecast_container.content = ft.Column([])
+        # The panels start hidden; their content is built on first display
+        self.forecast_cards: List[ForecastCard] = []
+        self.trend_bars: List[ft.Container] = []
+        self.trend_days: List[ft.Text] = []
         
         self.error_message = ft.Text(
             "",
@@ -196,6 +387,19 @@ class WeatherApp:
         )
         
         self.loading = ft.ProgressRing(visible=False)
+
+        # Debug overlay with the hot-path timings, toggled with Ctrl+Shift+M
+        self.metrics_text = ft.Text("", font_family="monospace", size=11, color=ft.Colors.WHITE)
+        self.metrics_overlay = ft.Container(
+            content=self.metrics_text,
+            bgcolor=ft.Colors.with_opacity(0.8, ft.Colors.BLACK),
+            padding=10,
+            border_radius=8,
+            right=10,
+            bottom=10,
+            visible=False,
+        )
+        self.page.overlay.append(self.metrics_overlay)
         
         self.page.add(
             ft.Container(
@@ -209,10 +413,12 @@ class WeatherApp:
                         ft.Row(
                             [
                                 self.city_input,
+                                self.near_me_button,
                                 self.history_dropdown,
                             ],
                             alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                         ),
+                        self.suggestions,
                         self.search_button,
                         ft.Divider(height=20, color=ft.Colors.TRANSPARENT),
                         self.loading,
@@ -221,6 +427,7 @@ class WeatherApp:
                             [
                                 self.weather_container,
                                 self.forecast_container,
+                                self.trend_container,
                             ],
                             scroll=ft.ScrollMode.AUTO,
                             expand=True,
@@ -232,14 +439,51 @@ class WeatherApp:
             )
         )
 
+    def _build_forecast_content(self):
+        """Builds the forecast panel: a header and a fixed pool of day cards."""
+        self.forecast_cards = [ForecastCard() for _ in range(Config.FORECAST_DAYS)]
+        return ft.Column(
+            [
+                ft.Text("5-Day Forecast", size=18, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_900),
+                ft.Divider(),
+            ]
+            + [card.control for card in self.forecast_cards]
+        )
+
+    def _build_trend_content(self):
+        """Builds the trend panel: a bar per hour and a low/high per day."""
+        self.trend_range_text = ft.Text("", size=12, color=ft.Colors.GREY_700)
+        self.trend_bars = [
+            ft.Container(width=14, height=0, bgcolor=ft.Colors.BLUE_300, border_radius=2)
+            for _ in range(Config.TREND_HOURS)
+        ]
+        self.trend_days = [
+            ft.Text("", size=12, text_align=ft.TextAlign.CENTER, color=ft.Colors.BLUE_900)
+            for _ in range(Config.TREND_DAYS)
+        ]
+        return ft.Column(
+            [
+                ft.Text("Recent Trend", size=18, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_900),
+                self.trend_range_text,
+                ft.Divider(),
+                ft.Row(
+                    self.trend_bars,
+                    height=60,
+                    spacing=3,
+                    vertical_alignment=ft.CrossAxisAlignment.END,
+                    alignment=ft.MainAxisAlignment.CENTER,
+                ),
+                ft.Row(self.trend_days, alignment=ft.MainAxisAlignment.SPACE_EVENLY),
+            ]
+        )
+
     def _build_weather_content(self):
         """Builds the content for the main weather display."""
         # Info card controls
         humidity_card = self.create_info_card(
             ft.Icons.WATER_DROP,
             "Humidity",
-            ft.Text(f"0%", 
-                    size=16, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_900)
+            self.humidity_value_text
         )
         wind_card = self.create_info_card(
             ft.Icons.AIR,
@@ -250,6 +494,7 @@ class WeatherApp:
         return ft.Column(
             [
                 self.city_text,
+                self.updated_text,
                 
                 ft.Row(
                     [
@@ -276,22 +521,115 @@ class WeatherApp:
             spacing=10,
         )
     
+    def update_page(self):
+        with self.metrics.span("page_update"):
+            self.page.update()
+
+    def on_keyboard(self, e: ft.KeyboardEvent):
+        if e.ctrl and e.shift and e.key.upper() == "M":
+            self.metrics_overlay.visible = not self.metrics_overlay.visible
+            if self.metrics_overlay.visible and (self._metrics_task is None or self._metrics_task.done()):
+                self._metrics_task = self.page.run_task(self.refresh_metrics_overlay)
+            self.ui.request()
+
+    async def refresh_metrics_overlay(self):
+        """Redraw the metrics overlay every second while it is shown."""
+        while self.metrics_overlay.visible:
+            self.metrics_text.value = self.metrics.summary()
+            self.ui.request()
+            await asyncio.sleep(Config.METRICS_REFRESH)
+
     def update_history_dropdown(self):
         self.history_dropdown.options = [ft.dropdown.Option(c) for c in self.search_history]
-        self.page.update()
+        self.ui.request()
 
     def on_history_select(self, e):
         self.city_input.value = self.history_dropdown.value
-        self.page.update()
+        self.ui.request()
         self.on_search(None)
     
+    def on_city_input_change(self, e):
+        """Suggest matching cities from the offline index as the user types."""
+        if self.city_index is None:
+            return
+        self.show_suggestions(self.city_index.search(self.city_input.value, Config.SUGGESTION_LIMIT))
+
+    def show_suggestions(self, cities: List["City"]):
+        for index, button in enumerate(self.suggestion_buttons):
+            if index < len(cities):
+                button.text = cities[index].label
+                button.data = cities[index]
+                button.visible = True
+            else:
+                button.visible = False
+        self.suggestions.visible = bool(cities)
+        self.ui.request()
+
+    def on_suggestion_click(self, e):
+        city: "City" = e.control.data
+        # Search by ID so "Springfield, IL, US" is not confused with another Springfield
+        self.city_ids[city.label] = city.id
+        self.city_input.value = city.label
+        self.on_search(None)
+
     def on_search(self, e):
         """Handle search button click or enter key press."""
-        self.page.run_task(self.get_weather)
+        if self.suggestions.visible:
+            self.show_suggestions([])
+        self.start_search(self.get_weather)
+
+    def on_near_me(self, e):
+        self.start_search(self.get_weather_near_me)
+
+    async def get_weather_near_me(self):
+        """Show the weather of the city nearest to the device's location."""
+        denied = (ft.GeolocatorPermissionStatus.DENIED, ft.GeolocatorPermissionStatus.DENIED_FOREVER)
+        try:
+            permission = await self.geolocator.request_permission_async()
+            if permission in denied:
+                self.show_error("Location access was denied. Allow it in your system settings.")
+                return
+            position = await self.geolocator.get_current_position_async()
+        except Exception:
+            position = None
+        if position is None or position.latitude is None:
+            self.show_error("Your location is not available")
+            return
+
+        try:
+            # Offline with the city index; otherwise one request that the
+            # weather fetch below is then served from
+            city = await self.weather_service.locate(position.latitude, position.longitude)
+        except Exception as e:
+            self.show_error(str(e))
+            return
+        self.city_ids[city.label] = city.id
+        self.city_input.value = city.label
+        await self.get_weather()
+
+    def start_search(self, handler):
+        """Run ``handler`` as the only search, cancelling any superseded one.
+
+        Cancellation propagates through the weather service into the HTTP
+        request, so an abandoned search stops costing network and render work.
+        """
+        if self._search_task is not None and not self._search_task.done():
+            self._search_task.cancel()
+        self._search_task = self.page.run_task(handler)
     
     async def get_weather(self):
         """Fetch and display weather data."""
+        # Debounce bursts only: a search right after another waits briefly, so
+        # a newer one can cancel it before it hits the network, while a lone
+        # search (Enter, history pick, "near me") goes out at once
+        now = time.monotonic()
+        burst = now - self._last_search_at < Config.SEARCH_DEBOUNCE
+        self._last_search_at = now
+        if burst:
+            await asyncio.sleep(Config.SEARCH_DEBOUNCE)
+
         city = self.city_input.value.strip()
+        city_id = self.city_ids.get(city)
         
         if not city:
             self.show_error("Please enter a city name")
@@ -301,27 +639,70 @@ class WeatherApp:
         self.error_message.visible = False
         self.weather_container.visible = False
         self.forecast_container.visible = False
-        self.page.update()
+        self.trend_container.visible = False
+        self.ui.request()
         
-        try:
-            weather_data = await self.weather_service.get_weather(city, self.current_unit)
-            
-            self.current_city = city 
-            
-            forecast_data = await self.weather_service.get_forecast(city, self.current_unit)
+        # The unit may be toggled while the request is in flight
+        unit = self.current_unit
+
+        async def on_weather(weather_data):
+            # Render current conditions as soon as they land
+            self.current_city = city
             self.add_to_history(city)
-            await self.display_weather(weather_data)
-            await self.display_forecast(forecast_data)
+            await self.display_weather(weather_data, unit)
+
+        started = time.perf_counter()
+        try:
+            bundle = await self.weather_service.get_weather_bundle(
+                city,
+                unit,
+                city_id=city_id,
+                on_weather=on_weather,
+                on_forecast=self.display_forecast,
+            )
+            self.show_staleness(bundle.fetched_at)
+            await self.show_trend()
+            if bundle.forecast_error is not None:
+                # Keep showing current conditions when only the forecast failed
+                self.show_error(
+                    f"Forecast unavailable: {bundle.forecast_error}",
+                    hide_results=False,
+                )
             
         except Exception as e:
             self.show_error(str(e))
         
-        finally:
-            self.loading.visible = False
-            self.page.update()
+        # End to end, from the request to the forecast on screen
+        self.metrics.observe("search", time.perf_counter() - started)
+
+        # Not in a finally block: a cancelled search must leave the spinner to
+        # the search that replaced it
+        self.loading.visible = False
+        self.ui.request()
+
+    async def display_weather(self, data: dict, unit: str, animate: bool = True):
+        """Display weather information given in ``unit``, in the current unit."""
+        with self.metrics.span("display_weather"):
+            self._fill_weather(data, unit)
+
+        if not animate:
+            self.weather_container.visible = True
+            self.ui.request()
+            return
 
-    async def display_weather(self, data: dict):
-        """Display weather information."""
+        self.weather_container.animate_opacity = 300
+        self.weather_container.opacity = 0
+        self.weather_container.visible = True
+        self.ui.flush()
+
+        await asyncio.sleep(0.1)
+        self.weather_container.opacity = 1
+        self.ui.request()
+
+    def _fill_weather(self, data: dict, unit: str):
+        """Write current conditions into the weather panel's controls."""
+        # Fetched before a unit toggle: convert, or the next toggle converts twice
+        data = units.convert_payload(data, unit, self.current_unit)
         city_name = data.get("name", "Unknown")
         country = data.get("sys", {}).get("country", "")
         temp = data.get("main", {}).get("temp", 0)
@@ -331,20 +712,25 @@ class WeatherApp:
         icon_code = data.get("weather", [{}])[0].get("icon", "01d")
         wind_speed = data.get("wind", {}).get("speed", 0)
         
+        self.current_city_id = data.get("id")
+        self.current_utc_offset = data.get("timezone", 0)
+
         # Store raw values for unit conversion
         self.current_temp = temp
         self.feels_like = feels_like
         self.wind_speed = wind_speed
         self.humidity = humidity
 
-        unit_symbol = "°C" if self.current_unit == "metric" else "°F"
-        wind_unit = "m/s" if self.current_unit == "metric" else "mph"
+        unit_symbol = units.TEMPERATURE_SYMBOLS[self.current_unit]
+        wind_unit = units.SPEED_UNITS[self.current_unit]
+        if self.weather_container.content is None:
+            self.weather_container.content = self._build_weather_content()
         
         # Update text controls directly.
         self.city_text.value = f"{city_name}, {country}"
         self.city_text.color = ft.Colors.BLACK 
         
-        self.icon_image.src = f"https://openweathermap.org/img/wn/{icon_code}@2x.png"
+        self.icon_image.src = self.icons.src(icon_code)
         
         self.desc_text.value = description
         self.desc_text.color = ft.Colors.BLACK
@@ -356,77 +742,154 @@ class WeatherApp:
         self.wind_value_text.value = f"{wind_speed:.1f} {wind_unit}"
         self.wind_value_text.color = ft.Colors.BLUE_900
 
-        # Update Humidity Text Control
-        humidity_card = self.weather_container.content.controls[5].controls[0]
-        humidity_value_control = humidity_card.content.controls[2]
-        if isinstance(humidity_value_control, ft.Text):
-             humidity_value_control.value = f"{humidity}%"
-
-        self.weather_container.animate_opacity = 300
-        self.weather_container.opacity = 0
-        self.weather_container.visible = True
-        self.page.update()
-
-        await asyncio.sleep(0.1)
-        self.weather_container.opacity = 1
-        self.page.update()
+        self.humidity_value_text.value = f"{humidity}%"
 
-    async def display_forecast(self, data: dict):
+    async def display_forecast(self, forecast: "Forecast"):
         """Display 5-day forecast."""
-        unit_symbol = "°C" if self.current_unit == "metric" else "°F"
-
-        # Aggregate by date
-        daily_forecast = defaultdict(list)
-        for item in data.get("list", []):
-            dt_txt = item.get("dt_txt", "")
-            date_str = dt_txt.split(" ")[0]
-            daily_forecast[date_str].append(item)
+        from forecast_aggregate import aggregate_daily
+
+        # Requested before a unit toggle if it differs; free when it already matches
+        forecast = forecast.to_unit(self.current_unit)
+        with self.metrics.span("display_forecast"):
+            if self.forecast_container.content is None:
+                self.forecast_container.content = self._build_forecast_content()
+            self.forecast_data = forecast
+            unit_symbol = units.TEMPERATURE_SYMBOLS[self.current_unit]
+
+            # One summary per local day of the city, not per UTC date
+            summaries = aggregate_daily(forecast, days=len(self.forecast_cards))
+            for index, card in enumerate(self.forecast_cards):
+                if index < len(summaries):
+                    summary = summaries[index]
+                    card.show(summary, unit_symbol, self.icons.src(summary.icon))
+                else:
+                    card.hide()
 
-        forecast_cards = []
+        self.forecast_container.visible = True
+        self.ui.request()
+
+    async def restore_last_city(self):
+        """Paint the last searched city from the disk cache, then revalidate it."""
+        city = self.search_history[0]
+        city_id = self.city_ids.get(city)
+        unit = self.current_unit
+        cached = await self.weather_service.load_cached_bundle(city, unit, city_id)
+        if cached is None:
+            return
 
-        for date_str, items in list(daily_forecast.items())[:5]:
-            temps = [i.get("main", {}).get("temp", 0) for i in items]
-            
-            first_item = items[0]
-            icon = first_item.get("weather", [{}])[0].get("icon", "01d")
-            description = first_item.get("weather", [{}])[0].get("description", "").title()
-            
-            high_temp = max(temps)
-            low_temp = min(temps)
-            
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-            date_label = date_obj.strftime("%a, %b %d")
+        self.current_city = city
+        self.city_input.value = city
+        await self.display_weather(cached.weather, unit)
+        if cached.forecast is not None:
+            await self.display_forecast(cached.forecast)
+        self.show_staleness(cached.fetched_at)
+        await self.show_trend()
 
-            # Fixed text colors for dark mode readability
-            card = ft.Container(
-                content=ft.Row(
-                    [
-                        ft.Text(date_label, size=16, weight=ft.FontWeight.BOLD, width=80, color=ft.Colors.BLACK),
-                        ft.Image(
-                            src=f"https://openweathermap.org/img/wn/{icon}@2x.png",
-                            width=30,
-                            height=30,
-                        ),
-                        ft.Text(description, size=14, italic=True, expand=True, color=ft.Colors.BLACK),
-                        ft.Text(f"H: {high_temp:.1f}{unit_symbol}", size=14, color=ft.Colors.BLACK),
-                        ft.Text(f"L: {low_temp:.1f}{unit_symbol}", size=14, color=ft.Colors.BLACK),
-                    ],
-                    alignment=ft.MainAxisAlignment.START,
-                    spacing=10,
-                ),
-                bgcolor=ft.Colors.WHITE,
-                padding=10,
-                border_radius=10,
-                margin=ft.margin.only(bottom=5),
+        # Runs as the current search, so a new search cancels the revalidation
+        try:
+            bundle = await self.weather_service.get_weather_bundle(
+                city,
+                unit,
+                city_id=city_id,
+                on_weather=partial(self.display_weather, unit=unit, animate=False),
+                on_forecast=self.display_forecast,
             )
-            forecast_cards.append(card)
+        except Exception:
+            # Keep the cached data on screen and say it could not be refreshed
+            self.show_staleness(cached.fetched_at, offline=True)
+            return
 
-        self.forecast_container.content.controls.clear()
-        self.forecast_container.content.controls.extend(
-            [ft.Text("5-Day Forecast", size=18, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_900), ft.Divider()] + forecast_cards
+        self.show_staleness(bundle.fetched_at)
+        await self.show_trend()
+
+    async def show_trend(self):
+        """Store the observations fetched so far and show the current city's trend."""
+        import sqlite3
+
+        store: Optional["ObservationStore"] = self.weather_service.observations
+        if store is None or self.current_city_id is None:
+            return
+        try:
+            with self.metrics.span("trend_query"):
+                self.trend = await asyncio.to_thread(
+                    self._query_trend, store, self.current_city_id, self.current_utc_offset
+                )
+        except sqlite3.Error:
+            # The history is an extra; never fail a search over it
+            self.trend = None
+        self.display_trend()
+
+    @staticmethod
+    def _query_trend(
+        store: "ObservationStore", city_id: int, utc_offset: int
+    ) -> Tuple[List["Summary"], List["Summary"]]:
+        """Flush pending observations, then read the hourly and daily temperatures."""
+        from observations import DAY, HOUR
+
+        store.flush()
+        now = time.time()
+        return (
+            store.hourly(city_id, now - (Config.TREND_HOURS - 1) * HOUR),
+            store.daily(city_id, now - (Config.TREND_DAYS - 1) * DAY, utc_offset=utc_offset),
         )
-        self.forecast_container.visible = True
-        self.page.update()
+
+    def display_trend(self):
+        """Draw the trend in the current unit; hidden until there are two hours or days."""
+        hours, days = self.trend or ([], [])
+        if len(hours) < 2 and len(days) < 2:
+            self.trend_container.visible = False
+            self.ui.request()
+            return
+
+        with self.metrics.span("display_trend"):
+            if self.trend_container.content is None:
+                self.trend_container.content = self._build_trend_content()
+            unit_symbol = units.TEMPERATURE_SYMBOLS[self.current_unit]
+
+            def convert(kelvin: float) -> float:
+                return units.convert_temperature(kelvin, units.STANDARD, self.current_unit)
+
+            # One slot per hour, the latest on the right; hours without data stay empty
+            latest = int(time.time()) // 3600 * 3600
+            by_slot = {len(self.trend_bars) - 1 - (latest - h.start) // 3600: h for h in hours}
+            means = [h.mean for h in hours] or [0.0]
+            low, high = min(means), max(means)
+            for index, bar in enumerate(self.trend_bars):
+                summary = by_slot.get(index)
+                if summary is None:
+                    bar.height, bar.tooltip = 0, None
+                    continue
+                bar.height = 6 + 54 * (summary.mean - low) / ((high - low) or 1)
+                hour = time.strftime("%H:00", time.gmtime(summary.start + self.current_utc_offset))
+                bar.tooltip = f"{hour}  {convert(summary.mean):.1f}{unit_symbol}"
+
+            if hours:
+                self.trend_range_text.value = (
+                    f"Last {Config.TREND_HOURS} h: {convert(min(h.min for h in hours)):.1f}{unit_symbol}"
+                    f" – {convert(max(h.max for h in hours)):.1f}{unit_symbol}"
+                )
+            else:
+                self.trend_range_text.value = ""
+            for index, text in enumerate(self.trend_days):
+                if index < len(days):
+                    day = days[index]
+                    name = time.strftime("%a", time.gmtime(day.start + self.current_utc_offset))
+                    text.value = f"{name}\n{convert(day.min):.0f}° / {convert(day.max):.0f}°"
+                    text.visible = True
+                else:
+                    text.visible = False
+
+        self.trend_container.visible = True
+        self.ui.request()
+
+    def show_staleness(self, fetched_at: Optional[float], offline: bool = False):
+        """Show how old the displayed weather is."""
+        if fetched_at is None:
+            self.updated_text.value = ""
+        else:
+            age = format_age(max(0.0, time.time() - fetched_at))
+            self.updated_text.value = f"Updated {age}" + (" · offline" if offline else "")
+        self.ui.request()
 
     def create_info_card(self, icon, label, value):
         """Create an info card for weather details."""
@@ -454,13 +917,27 @@ class WeatherApp:
             width=150,
         )
     
-    def show_error(self, message: str):
-        """Display error message."""
+    def show_error(self, message: str, hide_results: bool = True):
+        """Display error message, optionally hiding the weather panels."""
         self.error_message.value = f"❌ {message}"
         self.error_message.visible = True
-        self.weather_container.visible = False
-        self.forecast_container.visible = False
-        self.page.update()
+        if hide_results:
+            self.weather_container.visible = False
+            self.forecast_container.visible = False
+            self.trend_container.visible = False
+        self.ui.request()
+
+    async def on_close(self, e):
+        """Write pending history/settings/observations and close the shared HTTP client."""
+        await asyncio.gather(self.history_store.flush(), self.settings_store.flush())
+        if self._weather_service is not None:
+            if self._weather_service.observations is not None:
+                await asyncio.to_thread(self._weather_service.observations.close)
+            await self._weather_service.aclose()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        if self.city_index is not None:
+            self.city_index.close()
 
     def toggle_theme(self, e):
         """Toggle between light and dark theme."""
@@ -474,20 +951,12 @@ class WeatherApp:
             self.theme_button.icon = ft.Icons.DARK_MODE
             self.theme_button.icon_color = ft.Colors.GREY_400
             self.unit_switch.active_color = ft.Colors.GREY_400
-        self.page.update()
+        self.ui.request()
 
     async def update_forecast_display(self):
-        """Fetches and displays new forecast data based on the current unit."""
-        if self.current_city and self.forecast_container.visible:
-            try:
-                # Re-fetch forecast data with the new unit
-                forecast_data = await self.weather_service.get_forecast(self.current_city, self.current_unit)
-                await self.display_forecast(forecast_data)
-            except Exception as e:
-                # Show an error but don't hide the current weather
-                self.show_error("Could not refresh forecast units.")
-                self.page.update()
-
+        """Re-render the forecast in the current unit without re-fetching it."""
+        if self.forecast_data is not None and self.forecast_container.visible:
+            await self.display_forecast(self.forecast_data)
 
     def toggle_units(self, e):
         if not self.weather_container.visible or self.current_temp is None:
@@ -500,20 +969,15 @@ class WeatherApp:
         # Animate current weather temperature conversion
         self.weather_container.animate_opacity = 200
         self.weather_container.opacity = 0
-        self.page.update()
+        self.ui.flush()
 
-        # Perform the conversion math
-        if old_unit == "metric":
-            self.current_temp = (self.current_temp * 9/5) + 32
-            self.feels_like = (self.feels_like * 9/5) + 32
-            self.wind_speed = self.wind_speed * 2.237
-        else:
-            self.current_temp = (self.current_temp - 32) * 5/9
-            self.feels_like = (self.feels_like - 32) * 5/9
-            self.wind_speed = self.wind_speed / 2.237
+        # Perform the conversion math locally
+        self.current_temp = units.convert_temperature(self.current_temp, old_unit, self.current_unit)
+        self.feels_like = units.convert_temperature(self.feels_like, old_unit, self.current_unit)
+        self.wind_speed = units.convert_speed(self.wind_speed, old_unit, self.current_unit)
 
-        unit_symbol = "°C" if self.current_unit == "metric" else "°F"
-        wind_unit = "m/s" if self.current_unit == "metric" else "mph"
+        unit_symbol = units.TEMPERATURE_SYMBOLS[self.current_unit]
+        wind_unit = units.SPEED_UNITS[self.current_unit]
 
         # Update displayed values for current weather
         self.temp_text.value = f"{self.current_temp:.1f}{unit_symbol}"
@@ -522,10 +986,12 @@ class WeatherApp:
 
         # Animate current weather back in
         self.weather_container.opacity = 1
-        self.page.update()
+        self.ui.request()
         
-        # Update the 5-day forecast unit by re-fetching data
+        # Convert the 5-day forecast and the trend in memory; no network round trip
         self.page.run_task(self.update_forecast_display)
+        if self.trend_container.visible:
+            self.display_trend()
 
 
 def main(page: ft.Page):
@@ -534,4 +1000,4 @@ def main(page: ft.Page):
 
 
 if __name__ == "__main__":
-    ft.app(target=main)
\ No newline at end of file
+    ft.app(target=main, assets_dir=Config.ASSETS_DIR)
\ No newline at end of file
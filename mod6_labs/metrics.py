@@ -0,0 +1,289 @@
+"""In-memory metrics for the hot paths of the service and the app.
+
+``MetricsRegistry`` records timings (``span``/``observe``) and counters,
+labelled like Prometheus series, and exports them as Prometheus text or JSON.
+``WeatherService`` takes an optional registry and skips instrumentation
+without one; ``WeatherApp`` always keeps one for its debug overlay.
+
+HTTP requests are broken into phases with httpx event hooks and httpcore's
+``trace`` extension: connect (DNS + TCP), TLS, waiting for the response
+headers (upstream time) and reading the body. ``MetricsServer`` serves the
+registry on localhost for scraping.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Seconds; Prometheus histogram buckets from 1 ms to 10 s
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# httpcore trace events that start and end each request phase
+_PHASES = {
+    "connection.connect_tcp": "http_connect",
+    "connection.start_tls": "http_tls",
+    "http11.receive_response_headers": "http_wait",
+    "http2.receive_response_headers": "http_wait",
+    "http11.receive_response_body": "http_body",
+    "http2.receive_response_body": "http_body",
+}
+
+
+class Timing:
+    """Distribution of one timed series.
+
+    Keeps cumulative histogram buckets for export, and the most recent
+    ``window`` samples for percentiles shown in the app.
+    """
+
+    __slots__ = ("count", "total", "max", "buckets", "recent")
+
+    def __init__(self, window: int = 512):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+        self.recent.append(seconds)
+
+    def percentile(self, pct: float) -> float:
+        """Nearest-rank percentile of the recent samples, in seconds."""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _series(name: str, labels: Labels) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe store of timings and counters.
+
+    Args:
+        prefix: Prepended to every exported metric name
+    """
+
+    def __init__(self, prefix: str = "weather_"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._timings: Dict[Tuple[str, Labels], Timing] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+    # -- recording --------------------------------------------------------
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Record one duration of ``name``."""
+        key = (name, _labels(labels))
+        with self._lock:
+            timing = self._timings.get(key)
+            if timing is None:
+                timing = self._timings[key] = Timing()
+            timing.observe(seconds)
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[None]:
+        """Time the ``with`` block as one observation of ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def register_gauges(self, name: str, collect: Callable[[], Dict[str, float]]):
+        """Export the numbers ``collect()`` returns as gauges ``<name>_<key>``."""
+        self._gauges[name] = collect
+
+    def timing(self, name: str, **labels) -> Optional[Timing]:
+        return self._timings.get((name, _labels(labels)))
+
+    # -- httpx ------------------------------------------------------------
+
+    def httpx_event_hooks(self) -> Dict[str, list]:
+        """Event hooks for ``httpx.AsyncClient`` that time each request's phases.
+
+        The request hook attaches an httpcore ``trace`` callback, which sees
+        connection setup and the response phases; the response hook counts
+        responses by status.
+        """
+        async def on_request(request):
+            endpoint = request.url.path.rsplit("/", 1)[-1]
+            started: Dict[str, float] = {}
+
+            async def trace(event: str, info: Dict):
+                phase, _, stage = event.rpartition(".")
+                name = _PHASES.get(phase)
+                if name is None:
+                    return
+                if stage == "started":
+                    started[name] = time.perf_counter()
+                elif stage == "complete" and name in started:
+                    self.observe(name, time.perf_counter() - started.pop(name), endpoint=endpoint)
+
+            request.extensions["trace"] = trace
+
+        async def on_response(response):
+            endpoint = response.request.url.path.rsplit("/", 1)[-1]
+            self.inc("http_responses_total", endpoint=endpoint, status=response.status_code)
+
+        return {"request": [on_request], "response": [on_response]}
+
+    # -- export -----------------------------------------------------------
+
+    def snapshot(self) -> Dict:
+        """Everything recorded so far, as JSON-compatible data."""
+        # Under the lock: other threads may be appending samples
+        with self._lock:
+            timings = {
+                _series(name, labels): {
+                    "count": t.count,
+                    "sum": t.total,
+                    "max": t.max,
+                    "p50": t.percentile(50),
+                    "p95": t.percentile(95),
+                }
+                for (name, labels), t in sorted(self._timings.items())
+            }
+            counters = {
+                _series(name, labels): value for (name, labels), value in sorted(self._counters.items())
+            }
+        return {"timings": timings, "counters": counters, "gauges": self._collect_gauges()}
+
+    def summary(self) -> str:
+        """Plain-text table of the timings, in milliseconds."""
+        lines = [f"{'span':<36}{'n':>6}{'p50':>9}{'p95':>9}{'max':>9}"]
+        for series, t in self.snapshot()["timings"].items():
+            lines.append(
+                f"{series[:36]:<36}{t['count']:>6}"
+                f"{t['p50'] * 1000:>9.1f}{t['p95'] * 1000:>9.1f}{t['max'] * 1000:>9.1f}"
+            )
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """The registry in the Prometheus text exposition format."""
+        with self._lock:
+            timings = [(key, t.buckets[:], t.count, t.total) for key, t in sorted(self._timings.items())]
+            counters = sorted(self._counters.items())
+        lines = []
+        declared = set()
+        for (name, labels), buckets, count, total in timings:
+            metric = f"{self.prefix}{name}_seconds"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            for bound, in_bucket in zip(BUCKETS, buckets):
+                lines.append(f"{_series(metric + '_bucket', labels + (('le', str(bound)),))} {in_bucket}")
+            lines.append(f"{_series(metric + '_bucket', labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{_series(metric + '_sum', labels)} {total}")
+            lines.append(f"{_series(metric + '_count', labels)} {count}")
+        for (name, labels), value in counters:
+            metric = f"{self.prefix}{name}"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{_series(metric, labels)} {value}")
+        for key, value in sorted(self._collect_gauges().items()):
+            lines.append(f"# TYPE {self.prefix}{key} gauge")
+            lines.append(f"{self.prefix}{key} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _collect_gauges(self) -> Dict[str, float]:
+        gauges = {}
+        for name, collect in list(self._gauges.items()):
+            for key, value in collect().items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, (int, float)):
+                    gauges[f"{name}_{key}"] = value
+        return gauges
+
+
+class MetricsServer:
+    """Serves a registry on ``http://127.0.0.1:<port>/metrics`` from a thread.
+
+    ``/metrics`` returns Prometheus text and ``/metrics.json`` the JSON
+    snapshot. Use as a context manager, or call ``start()``/``stop()``.
+    """
+
+    def __init__(self, registry: MetricsRegistry, port: int = 0, host: str = "127.0.0.1"):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "MetricsServer":
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = registry.to_prometheus(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = registry.to_json(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # keep the app's console quiet
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def __enter__(self) -> "MetricsServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
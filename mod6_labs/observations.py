@@ -0,0 +1,286 @@
+"""Time series of weather observations, stored in SQLite.
+
+Every current-weather response is one observation: the city's ID, the time
+OpenWeatherMap measured it (``dt``) and the measured values, in the
+canonical ``standard`` units. ``(city_id, ts)`` is the primary key, so a
+response fetched twice before the upstream updates is stored once.
+
+Observations are buffered in memory by ``add()`` and written by ``flush()``
+in a single transaction, so a poll round costs one commit however many
+cities it covers. The same transaction updates an hourly rollup (count,
+min, max and sum per measure), which the downsampling queries ``hourly()``
+and ``daily()`` read instead of the raw rows: a year of one city is at most
+8,760 rollup rows, whatever the polling rate.
+
+Retention is two-tiered: raw observations are kept for ``raw_retention``
+seconds and hourly rollups for ``hourly_retention``; older rows are pruned
+by ``flush()`` about once an hour.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Union
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Measures rolled up per hour, as <measure>_min/_max/_sum columns
+MEASURES = ("temp", "humidity", "pressure", "wind_speed")
+
+
+class Observation(NamedTuple):
+    """One current-weather measurement, in standard units (K, m/s)."""
+    city_id: int
+    ts: int  # Unix time of the measurement
+    temp: float
+    feels_like: float
+    humidity: float
+    pressure: float
+    wind_speed: float
+    condition_id: int
+
+    @classmethod
+    def from_payload(cls, data: Dict) -> Optional["Observation"]:
+        """The observation in a current-weather response, if it names a city and time."""
+        if not isinstance(data.get("id"), int) or not isinstance(data.get("dt"), int):
+            return None
+        main = data.get("main", {})
+        return cls(
+            city_id=data["id"],
+            ts=data["dt"],
+            temp=main.get("temp", 0.0),
+            feels_like=main.get("feels_like", 0.0),
+            humidity=main.get("humidity", 0.0),
+            pressure=main.get("pressure", 0.0),
+            wind_speed=data.get("wind", {}).get("speed", 0.0),
+            condition_id=(data.get("weather") or [{}])[0].get("id", 0),
+        )
+
+
+class Summary(NamedTuple):
+    """One measure of one city downsampled to an hour or a day, in standard units."""
+    start: int  # Unix time the bucket starts
+    count: int
+    min: float
+    max: float
+    mean: float
+
+
+_ROLLUP_COLUMNS = ", ".join(f"{m}_min REAL, {m}_max REAL, {m}_sum REAL" for m in MEASURES)
+
+# Recomputes the rollup of one (city, hour) from the raw rows
+_REFRESH_HOUR = (
+    "INSERT OR REPLACE INTO observations_hourly SELECT city_id, ts / 3600 * 3600, COUNT(*), "
+    + ", ".join(f"MIN({m}), MAX({m}), SUM({m})" for m in MEASURES)
+    + " FROM observations WHERE city_id = ? AND ts >= ? AND ts < ? GROUP BY city_id"
+)
+
+# One measure per hour, read straight from the rollup
+_HOURLY = (
+    "SELECT hour, count, {m}_min, {m}_max, {m}_sum / count FROM observations_hourly"
+    " WHERE city_id = :city_id AND hour >= :since AND hour < :until ORDER BY hour"
+)
+
+# Merges hourly rollups into days, aligned to the city's local midnight
+_DAILY = (
+    "SELECT (hour + :offset) / 86400 * 86400 - :offset AS day, SUM(count),"
+    " MIN({m}_min), MAX({m}_max), SUM({m}_sum) / SUM(count) FROM observations_hourly"
+    " WHERE city_id = :city_id AND hour >= :since AND hour < :until GROUP BY day ORDER BY day"
+)
+
+
+class ObservationStore:
+    """SQLite table of observations, written in batches.
+
+    Methods other than ``add()`` are blocking; call them through
+    ``asyncio.to_thread`` from async code.
+
+    Args:
+        path: Database file
+        raw_retention: Seconds raw observations are kept; ``None`` keeps them
+        hourly_retention: Seconds hourly rollups are kept; ``None`` keeps them
+        clock: Wall-clock time source, for tests
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        raw_retention: Optional[float] = 35 * DAY,
+        hourly_retention: Optional[float] = 400 * DAY,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path)
+        self.raw_retention = raw_retention
+        self.hourly_retention = hourly_retention
+        self._clock = clock
+        self._pruned_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._pending: List[Observation] = []
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL lets the app read trends while a poller writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS observations (
+                city_id INTEGER NOT NULL,
+                ts INTEGER NOT NULL,
+                temp REAL NOT NULL,
+                feels_like REAL NOT NULL,
+                humidity REAL NOT NULL,
+                pressure REAL NOT NULL,
+                wind_speed REAL NOT NULL,
+                condition_id INTEGER NOT NULL,
+                PRIMARY KEY (city_id, ts)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS observations_hourly (
+                city_id INTEGER NOT NULL,
+                hour INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                {_ROLLUP_COLUMNS},
+                PRIMARY KEY (city_id, hour)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+        self.batches = 0
+
+    def add(self, observation: Observation):
+        """Buffer ``observation`` until the next ``flush()``."""
+        with self._lock:
+            self._pending.append(observation)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """Write the buffered observations and their hourly rollups in one transaction.
+
+        Observations older than the raw retention are dropped: the rows
+        their hour was rolled up from may already be gone.
+
+        Returns:
+            Number of new rows (repeated ``(city_id, ts)`` pairs are skipped)
+        """
+        with self._lock:
+            rows, self._pending = self._pending, []
+            now = self._clock()
+            if self.raw_retention is not None:
+                rows = [row for row in rows if row.ts >= now - self.raw_retention]
+            if not rows:
+                return 0
+            hours = {(row.city_id, row.ts // HOUR * HOUR) for row in rows}
+            before = self._conn.total_changes
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO observations VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                added = self._conn.total_changes - before
+                if added:
+                    self._conn.executemany(
+                        _REFRESH_HOUR,
+                        [(city_id, hour, hour + HOUR) for city_id, hour in sorted(hours)],
+                    )
+            self.batches += 1
+            if self._pruned_at is None or now - self._pruned_at >= HOUR:
+                self._prune(now)
+            return added
+
+    def prune(self) -> int:
+        """Delete rows past their retention now; returns how many."""
+        with self._lock:
+            return self._prune(self._clock())
+
+    def _prune(self, now: float) -> int:
+        self._pruned_at = now
+        before = self._conn.total_changes
+        with self._conn:
+            if self.raw_retention is not None:
+                self._conn.execute(
+                    "DELETE FROM observations WHERE ts < ?", (int(now - self.raw_retention),)
+                )
+            if self.hourly_retention is not None:
+                self._conn.execute(
+                    "DELETE FROM observations_hourly WHERE hour < ?",
+                    (int(now - self.hourly_retention),),
+                )
+        return self._conn.total_changes - before
+
+    def latest(self, city_id: int) -> Optional[Observation]:
+        """The most recent observation of a city."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM observations WHERE city_id = ? ORDER BY ts DESC LIMIT 1",
+                (city_id,),
+            ).fetchone()
+        return Observation(*row) if row else None
+
+    def hourly(
+        self, city_id: int, since: float, until: Optional[float] = None, measure: str = "temp"
+    ) -> List[Summary]:
+        """
+        Min, max and mean of a measure per hour.
+
+        Args:
+            city_id: OpenWeatherMap city ID
+            since: Unix time; the hour containing it is the first
+            until: Unix time, exclusive; defaults to now
+            measure: One of ``MEASURES``
+
+        Returns:
+            One ``Summary`` per hour with observations, oldest first
+        """
+        return self._downsample(_HOURLY, measure, city_id, since // HOUR * HOUR, until, 0)
+
+    def daily(
+        self,
+        city_id: int,
+        since: float,
+        until: Optional[float] = None,
+        utc_offset: int = 0,
+        measure: str = "temp",
+    ) -> List[Summary]:
+        """
+        Min, max and mean of a measure per local day of the city.
+
+        Args:
+            city_id: OpenWeatherMap city ID
+            since: Unix time; the day containing it is the first
+            until: Unix time, exclusive; defaults to now
+            utc_offset: The city's offset from UTC in seconds (the
+                ``timezone`` field of a response); days start at local
+                midnight, to the hour
+            measure: One of ``MEASURES``
+
+        Returns:
+            One ``Summary`` per day with observations, oldest first
+        """
+        since = (since + utc_offset) // DAY * DAY - utc_offset
+        return self._downsample(_DAILY, measure, city_id, since, until, utc_offset)
+
+    def _downsample(
+        self, query: str, measure: str, city_id: int, since: float, until: Optional[float], offset: int
+    ) -> List[Summary]:
+        if measure not in MEASURES:
+            raise ValueError(f"Unknown measure: {measure}")
+        until = self._clock() if until is None else until
+        params = {"city_id": city_id, "since": int(since), "until": int(until), "offset": offset}
+        with self._lock:
+            rows = self._conn.execute(query.format(m=measure), params).fetchall()
+        return [Summary(*row) for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM observations").fetchone()[0]
+
+    def close(self):
+        """Write what is still buffered and close the database."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
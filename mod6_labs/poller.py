@@ -0,0 +1,252 @@
+"""Headless poller: keeps the caches warm and records observations.
+
+Runs without the Flet UI, e.g. as a service::
+
+    python -m poller --city London --city "Nabua, PH" --id 1724767 --interval 600
+
+Each city is polled every ``interval`` seconds, plus or minus ``jitter``,
+and the first polls are spread evenly over the first interval so requests
+never arrive in bursts. All requests go through one ``WeatherService``, so
+they share its rate limiter (the global request budget), retries, circuit
+breaker and caches, including the disk cache the app paints from at
+startup. The service records every response in an ``ObservationStore``,
+which the poller writes in batched transactions. SIGTERM or SIGINT stops the poller after writing what it has.
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import signal
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from config import Config
+from disk_cache import DiskCache
+from observations import DAY, ObservationStore
+from units import STANDARD
+from weather_service import WeatherService, WeatherServiceError
+
+log = logging.getLogger("poller")
+
+# A city to poll: its name, or its OpenWeatherMap ID (then the name is a label)
+Target = Tuple[str, Optional[int]]
+
+
+class Poller:
+    """Polls a list of cities on a jittered schedule.
+
+    Args:
+        service: Service used for every request; ``store`` is attached to it
+        store: Where observations are written
+        targets: ``(name, city_id)`` pairs; ``city_id`` may be ``None``
+        interval: Seconds between two polls of the same city
+        jitter: Fraction of ``interval`` each delay is randomly moved by
+        forecast: Also refresh each city's forecast
+        max_concurrency: Upper bound on simultaneous polls
+        rng: Random source for the jitter, for reproducible tests
+    """
+
+    def __init__(
+        self,
+        service: WeatherService,
+        store: ObservationStore,
+        targets: Sequence[Target],
+        interval: float = Config.POLL_INTERVAL,
+        jitter: float = Config.POLL_JITTER,
+        forecast: bool = False,
+        max_concurrency: int = Config.BATCH_CONCURRENCY,
+        rng: Optional[random.Random] = None,
+    ):
+        if not targets:
+            raise ValueError("Nothing to poll")
+        self.service = service
+        self.store = store
+        service.observations = store
+        self.targets = list(targets)
+        self.jitter = jitter
+        self.forecast = forecast
+        self.max_concurrency = max_concurrency
+        self._rng = rng or random.Random()
+        self._stop = asyncio.Event()
+        self.interval = self._fit_budget(interval)
+        self.rounds = 0
+        self.fetched = 0
+        self.failed = 0
+        self.stored = 0
+
+    def _fit_budget(self, interval: float) -> float:
+        """Stretch ``interval`` if polling every city would exceed the rate budget."""
+        budget = Config.RATE_LIMIT_PER_MINUTE
+        if budget <= 0:
+            return interval
+        requests = len(self.targets) * (2 if self.forecast else 1)
+        # Leave a fifth of the budget for the app sharing the same API key
+        shortest = requests * 60 / (budget * 0.8)
+        if interval < shortest:
+            log.warning(
+                "%d requests every %.0f s exceed %d/min; polling every %.0f s instead",
+                requests, interval, budget, shortest,
+            )
+            return shortest
+        return interval
+
+    def _delay(self) -> float:
+        return self.interval * (1 + self._rng.uniform(-self.jitter, self.jitter))
+
+    def stop(self):
+        """Finish the current round, write pending observations and return from ``run()``."""
+        self._stop.set()
+
+    async def run(self, rounds: Optional[int] = None):
+        """
+        Poll until stopped (by ``stop()``, SIGTERM or SIGINT).
+
+        Args:
+            rounds: Return after this many rounds instead (each round polls
+                the cities that are due)
+        """
+        loop = asyncio.get_running_loop()
+        signals = self._install_signal_handlers(loop)
+        start = loop.time()
+        step = self.interval / len(self.targets)
+        due = {target: start + index * step for index, target in enumerate(self.targets)}
+        last_flush = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                wait = min(due.values()) - loop.time()
+                if wait > 0 and await self._sleep(wait):
+                    break
+
+                now = loop.time()
+                batch = [target for target, when in due.items() if when <= now]
+                for target in batch:
+                    due[target] = now + self._delay()
+                await self._poll_until_stopped(batch)
+                self.rounds += 1
+
+                if (self.store.pending >= Config.OBSERVATION_BATCH
+                        or time.monotonic() - last_flush >= Config.OBSERVATION_FLUSH_INTERVAL):
+                    await self._flush()
+                    last_flush = time.monotonic()
+                if rounds is not None and self.rounds >= rounds:
+                    break
+        finally:
+            for sig in signals:
+                loop.remove_signal_handler(sig)
+            await self._flush()
+
+    def _install_signal_handlers(self, loop: asyncio.AbstractEventLoop) -> List[int]:
+        installed = []
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError, ValueError):
+                continue  # Windows, or not the main thread; stop() still works
+            installed.append(sig)
+        return installed
+
+    async def _sleep(self, seconds: float) -> bool:
+        """Sleep, waking early when stopped; returns whether it was stopped."""
+        try:
+            await asyncio.wait_for(self._stop.wait(), seconds)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _poll_until_stopped(self, batch: List[Target]):
+        """Poll ``batch``, abandoning the requests still in flight when stopped."""
+        round_task = asyncio.ensure_future(self.poll(batch))
+        stopped = asyncio.ensure_future(self._stop.wait())
+        await asyncio.wait({round_task, stopped}, return_when=asyncio.FIRST_COMPLETED)
+        stopped.cancel()
+        if not round_task.done():
+            round_task.cancel()
+            try:
+                await round_task
+            except asyncio.CancelledError:
+                pass
+
+    async def poll(self, batch: Sequence[Target]):
+        """Fetch every city in ``batch`` once, bypassing the response cache."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def poll_one(name: str, city_id: Optional[int]):
+            async with semaphore:
+                try:
+                    await self.service.get_weather(name, STANDARD, True, city_id=city_id)
+                    if self.forecast:
+                        await self.service.get_forecast(name, STANDARD, True, city_id=city_id)
+                except WeatherServiceError as e:
+                    self.failed += 1
+                    log.warning("%s: %s", name, e)
+                    return
+            self.fetched += 1
+
+        await asyncio.gather(*(poll_one(name, city_id) for name, city_id in batch))
+
+    async def _flush(self):
+        if self.store.pending:
+            self.stored += await asyncio.to_thread(self.store.flush)
+
+
+def parse_targets(cities: Sequence[str], ids: Sequence[int], path: Optional[str]) -> List[Target]:
+    """Cities from the command line and from a file with one city per line."""
+    targets: List[Target] = [(city, None) for city in cities]
+    targets += [(f"#{city_id}", city_id) for city_id in ids]
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    targets.append((line, None))
+    return list(dict.fromkeys(targets))
+
+
+async def _main(args: argparse.Namespace, targets: List[Target]):
+    store = ObservationStore(
+        args.db,
+        Config.OBSERVATION_RAW_RETENTION_DAYS * DAY,
+        Config.OBSERVATION_HOURLY_RETENTION_DAYS * DAY,
+    )
+    disk_cache = DiskCache(Config.DISK_CACHE_FILE, Config.DISK_CACHE_MAX_BYTES)
+    try:
+        async with WeatherService(disk_cache=disk_cache) as service:
+            poller = Poller(service, store, targets, args.interval, args.jitter, args.forecast)
+            log.info("Polling %d cities every %.0f s", len(targets), poller.interval)
+            await poller.run(args.rounds)
+            log.info(
+                "Stopped after %d rounds: %d fetched, %d failed, %d observations stored",
+                poller.rounds, poller.fetched, poller.failed, poller.stored,
+            )
+    finally:
+        await asyncio.to_thread(store.close)
+        disk_cache.close()
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Poll cities and record observations without the UI")
+    parser.add_argument("--city", action="append", default=[], help="city name (repeatable)")
+    parser.add_argument("--id", action="append", type=int, default=[], help="OpenWeatherMap city ID (repeatable)")
+    parser.add_argument("--file", help="file with one city name per line")
+    parser.add_argument("--interval", type=float, default=Config.POLL_INTERVAL, help="seconds between polls of a city")
+    parser.add_argument("--jitter", type=float, default=Config.POLL_JITTER, help="fraction of the interval to randomise")
+    parser.add_argument("--forecast", action="store_true", help="also refresh forecasts")
+    parser.add_argument("--db", default=Config.OBSERVATIONS_FILE, help="observation database")
+    parser.add_argument("--rounds", type=int, help="stop after this many rounds")
+    args = parser.parse_args(argv)
+
+    targets = parse_targets(args.city, args.id, args.file)
+    if not targets:
+        parser.error("give at least one --city, --id or --file")
+    try:
+        Config.validate()
+    except ValueError as e:
+        parser.error(str(e))
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(_main(args, targets))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Client-side rate limiting for the weather service."""
+
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+
+class TokenBucket:
+    """Token-bucket rate limiter that delays callers instead of failing them.
+
+    Tokens refill continuously at ``rate_per_minute / 60`` per second up to
+    ``burst``. ``acquire()`` takes one token, sleeping until one is available;
+    waiters are served in arrival order.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        burst: int,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        if rate_per_minute <= 0 or burst < 1:
+            raise ValueError("rate_per_minute must be positive and burst at least 1")
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+        self.acquired = 0
+        self.delayed = 0  # acquisitions that had to wait for a token
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Take one token, waiting for the bucket to refill if it is empty."""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                self.delayed += 1
+                while self._tokens < 1:
+                    await self._sleep((1 - self._tokens) / self.rate)
+                    self._refill()
+            self._tokens -= 1
+            self.acquired += 1
+
+    @property
+    def available(self) -> float:
+        """Tokens currently in the bucket."""
+        self._refill()
+        return self._tokens
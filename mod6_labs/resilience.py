@@ -0,0 +1,116 @@
+"""Retry policy and circuit breaker for calls to the weather API."""
+
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how patiently transient failures are retried.
+
+    The delay before retry ``n`` (1-based) is ``base_delay * 2 ** (n - 1)``
+    capped at ``max_delay``; ``jitter`` is the fraction of that delay that is
+    randomised (0 = fixed delays, 1 = "full jitter"). A server-sent
+    ``Retry-After`` is honoured when it is no longer than ``max_retry_after``;
+    longer waits give up instead of leaving the user staring at a spinner.
+    """
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    jitter: float = 0.5
+    max_retry_after: float = 30.0
+
+    def delay(
+        self,
+        attempt: int,
+        retry_after: Optional[float] = None,
+        rng: Callable[[], float] = random.random,
+    ) -> Optional[float]:
+        """Seconds to wait before retrying after failed ``attempt``, or ``None`` to give up."""
+        if attempt >= self.max_attempts:
+            return None
+        if retry_after is not None and retry_after > self.max_retry_after:
+            return None
+
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        backoff = backoff * (1 - self.jitter) + backoff * self.jitter * rng()
+        if retry_after is not None:
+            return max(backoff, retry_after)
+        return backoff
+
+
+class CircuitBreaker:
+    """Fast-fail requests for a cooldown period once the upstream looks down.
+
+    ``CLOSED`` lets every request through. After ``failure_threshold``
+    consecutive failures the breaker goes ``OPEN`` and rejects requests until
+    ``cooldown`` seconds have passed; it then goes ``HALF_OPEN`` and lets a
+    single trial request through, closing again if it succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a trial request through."""
+        if self._state != self.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.cooldown - self._clock())
+
+    def allow_request(self) -> bool:
+        """Return whether a request may be sent now."""
+        if self._state == self.OPEN and self.retry_in() == 0:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+
+        if self._state == self.CLOSED:
+            return True
+        if self._state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        """The upstream answered; close the breaker."""
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def release(self):
+        """A request ended without a verdict (e.g. cancelled); free the trial slot."""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        """The upstream failed; open the breaker if it keeps failing."""
+        self._failures += 1
+        self._trial_in_flight = False
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.times_opened += 1
+            self._state = self.OPEN
+            self._opened_at = self._clock()
@@ -0,0 +1,145 @@
+"""Small JSON documents persisted off the event loop.
+
+The app keeps its search history and settings in JSON files next to it.
+``JsonStore`` loads such a file on first use, writes it from a worker
+thread, merges bursts of changes into one write, and replaces the file
+atomically so a crash mid-write cannot corrupt it.
+"""
+
+import asyncio
+import copy
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from config import Config
+
+_UNLOADED = object()
+
+
+class JsonStore:
+    """One JSON document on disk.
+
+    ``save()`` only records the new value and returns; the file is written
+    ``delay`` seconds later by a task on ``loop``, so a burst of saves costs
+    a single write. ``flush()`` writes a pending value right away (e.g. when
+    the app closes). ``save()`` may be called from Flet's handler threads.
+
+    Args:
+        path: File to load from and save to
+        default: Value used when the file is missing or unreadable
+        loop: Event loop that runs the delayed writes
+        delay: Seconds to wait for more changes before writing
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        default: Any,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        delay: float = Config.SAVE_DEBOUNCE,
+    ):
+        self.path = Path(path)
+        self.default = default
+        self.delay = delay
+        self._loop = loop
+        self._value: Any = _UNLOADED
+        self._lock = threading.Lock()
+        self._pending: Optional[str] = None
+        self._scheduled = False
+        self._write_lock: Optional[asyncio.Lock] = None
+        self.saves = 0
+        self.writes = 0
+        self.errors = 0
+
+    # -- loading ----------------------------------------------------------
+
+    def load(self) -> Any:
+        """Return the stored value, reading the file on first use."""
+        if self._value is _UNLOADED:
+            self._value = self._read()
+        return self._value
+
+    async def load_async(self) -> Any:
+        """``load()`` without blocking the event loop."""
+        if self._value is _UNLOADED:
+            return await asyncio.to_thread(self.load)
+        return self._value
+
+    def _read(self) -> Any:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except FileNotFoundError:
+            return copy.deepcopy(self.default)
+        except (ValueError, OSError):
+            # Keep the unreadable file for inspection instead of overwriting it
+            try:
+                os.replace(self.path, self.path.with_name(self.path.name + ".corrupt"))
+            except OSError:
+                pass
+            return copy.deepcopy(self.default)
+        if not isinstance(value, type(self.default)):
+            return copy.deepcopy(self.default)
+        return value
+
+    # -- saving -----------------------------------------------------------
+
+    def save(self, value: Any):
+        """Store ``value``; the file is written after ``delay`` seconds."""
+        # Serialize now so later changes to ``value`` cannot leak into the write
+        text = json.dumps(value)
+        with self._lock:
+            self._value = value
+            self._pending = text
+            self.saves += 1
+            if self._scheduled:
+                return
+            self._scheduled = True
+
+        loop = self._loop or asyncio.get_running_loop()
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            loop.create_task(self._write_later())
+        else:
+            loop.call_soon_threadsafe(lambda: loop.create_task(self._write_later()))
+
+    async def _write_later(self):
+        while True:
+            await asyncio.sleep(self.delay)
+            await self.flush()
+            with self._lock:
+                if self._pending is None:
+                    self._scheduled = False
+                    return
+
+    async def flush(self):
+        """Write the pending value now, if there is one."""
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        # Serialized so an older value can never replace a newer one
+        async with self._write_lock:
+            with self._lock:
+                text, self._pending = self._pending, None
+            if text is None:
+                return
+            try:
+                await asyncio.to_thread(self._write, text)
+            except OSError:
+                self.errors += 1
+            else:
+                self.writes += 1
+
+    def _write(self, text: str):
+        """Write to a temporary file, then atomically swap it into place."""
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
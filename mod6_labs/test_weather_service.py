@@ -1,65 +1,701 @@
 # test_weather_service.py
-"""Simple tests for weather service."""
+"""Tests for the weather service, run offline against a fake API.
+
+Run with ``python -m pytest`` from the ``mod6_labs`` directory.
+"""
 
 import asyncio
-from weather_service import WeatherService, WeatherServiceError
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+
+import forecast_aggregate
+import units
+from cache import TTLCache
+from city_index import CityIndex, build_index
+from conftest import WEATHER_URL
+from disk_cache import DiskCache
+from fake_owm_server import make_forecast, make_weather
+from forecast_aggregate import aggregate_daily
+from forecast_model import Forecast
+from forecast_stream import DISPLAY_FIELDS, ForecastStreamParser, prune
+from icon_cache import IconCache
+from metrics import MetricsRegistry
+from observations import DAY, HOUR, Observation, ObservationStore
+from poller import Poller
+from ratelimit import TokenBucket
+from storage import JsonStore
+from resilience import CircuitBreaker, RetryPolicy
+from update_scheduler import UpdateScheduler
+from weather_service import TransientServiceError, WeatherService, WeatherServiceError
+
 
+def mock_client(handler) -> httpx.AsyncClient:
+    """A client answering every request with ``handler``."""
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
 
-async def test_valid_city():
+
+async def test_valid_city(make_service):
     """Test fetching weather for a valid city."""
-    service = WeatherService()
-    try:
-        # FIX: Pass the required 'unit' argument
+    async with make_service() as service:
         data = await service.get_weather("London", "metric")
-        print(f"✅ Successfully fetched weather for {data['name']}")
-        print(f"   Temperature: {data['main']['temp']}°C")
-        return True
-    except Exception as e:
-        print(f"❌ Test failed: {e}")
-        return False
+    assert data["name"] == "London"
+    assert data["main"]["temp"] == pytest.approx(make_weather("London", "metric")["main"]["temp"])
 
 
-async def test_invalid_city():
+async def test_invalid_city(make_service):
     """Test handling of invalid city."""
-    service = WeatherService()
-    try:
-        # FIX: Pass the required 'unit' argument
-        await service.get_weather("InvalidCityXYZ123", "metric")
-        print("❌ Should have raised an error")
-        return False
-    except WeatherServiceError as e:
-        print(f"✅ Correctly handled error: {e}")
-        return True
-
-
-async def test_empty_city():
+    async with make_service() as service:
+        with pytest.raises(WeatherServiceError, match="not found"):
+            await service.get_weather("InvalidCityXYZ123", "metric")
+
+
+async def test_empty_city(make_service):
     """Test handling of empty city name."""
-    service = WeatherService()
-    try:
-        # FIX: Pass the required 'unit' argument
-        await service.get_weather("", "metric")
-        print("❌ Should have raised an error")
-        return False
-    except WeatherServiceError as e:
-        print(f"✅ Correctly handled error: {e}")
-        return True
-
-
-async def run_tests():
-    """Run all tests."""
-    print("Running Weather Service Tests\n")
-    print("=" * 50)
-    
-    results = []
-    results.append(await test_valid_city())
-    results.append(await test_invalid_city())
-    results.append(await test_empty_city())
-    
-    print("\n" + "=" * 50)
-    passed = sum(results)
-    total = len(results)
-    print(f"\nTests Passed: {passed}/{total}")
-
-
-if __name__ == "__main__":
-    asyncio.run(run_tests())
\ No newline at end of file
+    async with make_service() as service:
+        with pytest.raises(WeatherServiceError, match="cannot be empty"):
+            await service.get_weather("", "metric")
+
+
+async def test_weather_by_coordinates(make_service, fake_api):
+    """Test fetching weather by latitude and longitude."""
+    async with make_service() as service:
+        await service.get_weather_by_coordinates(13.59, 123.27, "metric")
+        await service.get_weather_by_coordinates(13.591, 123.268, "imperial")
+    assert fake_api.requests == 1  # same ~1 km cell, served from the cache
+
+
+async def test_shared_client_reuses_connection(fake_server):
+    """Test that back-to-back lookups share one pooled connection."""
+    async with WeatherService(
+        base_url=fake_server.weather_url, forecast_url=fake_server.forecast_url
+    ) as service:
+        await service.get_weather("London", "metric")
+        await service.get_forecast("London", "metric")
+    assert fake_server.connections == 1
+
+
+async def test_repeat_city_served_from_cache(make_service, fake_api):
+    """Test that a repeat lookup is answered by the response cache."""
+    async with make_service() as service:
+        await service.get_weather("London", "metric")
+        await service.get_weather("  london ", "metric")
+        await service.get_weather("London", "metric", bypass_cache=True)
+    assert fake_api.requests == 2
+    assert service.cache.stats()["hits"] == 1
+
+
+def test_cache_expiry_and_eviction():
+    """Test TTL expiry and least-recently-used eviction."""
+    now = [0.0]
+    cache = TTLCache(max_entries=2, clock=lambda: now[0])
+    cache.set("a", 1, ttl=10)
+    cache.set("b", 2, ttl=100)
+    cache.get("a")
+    cache.set("c", 3, ttl=100)  # evicts "b", the least recently used
+    now[0] = 50  # "a" has expired
+    assert cache.get("b") is None
+    assert cache.get("a") is None
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+async def test_bundle_fetches_concurrently(make_service, fake_api):
+    """Test that the weather bundle runs both requests at the same time."""
+    fake_api.latency = 0.2
+    async with make_service() as service:
+        started = time.perf_counter()
+        bundle = await service.get_weather_bundle("London", "metric")
+        elapsed = time.perf_counter() - started
+    assert bundle.forecast is not None
+    assert elapsed < 0.35
+
+
+async def test_bundle_survives_forecast_failure(make_service):
+    """Test that current weather is returned when only the forecast fails."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/forecast"):
+            return httpx.Response(503)
+        return httpx.Response(200, json=make_weather(request.url.params["q"]))
+
+    shown = []
+
+    async def on_weather(data):
+        shown.append(data["name"])
+
+    async with make_service(transport=httpx.MockTransport(handler)) as service:
+        bundle = await service.get_weather_bundle("London", "metric", on_weather=on_weather)
+    assert shown == ["London"]
+    assert bundle.forecast is None
+    assert isinstance(bundle.forecast_error, WeatherServiceError)
+
+
+async def test_unit_switch_needs_no_refetch(make_service, fake_api):
+    """Test that metric and imperial lookups share one canonical response."""
+    async with make_service() as service:
+        metric = await service.get_forecast("Tokyo", "metric")
+        imperial = await service.get_forecast("Tokyo", "imperial")
+    expected = make_forecast("Tokyo", "imperial")["list"][0]["main"]["temp"]
+    assert fake_api.requests == 1
+    assert imperial["list"][0]["main"]["temp"] == pytest.approx(expected, abs=0.05)
+    assert metric["list"][0]["main"]["temp"] != imperial["list"][0]["main"]["temp"]
+
+
+def test_convert_payload_round_trip():
+    """Test that converting a payload there and back restores it."""
+    data = make_weather("Paris", "metric")
+    imperial = units.convert_payload(data, "metric", "imperial")
+    back = units.convert_payload(imperial, "imperial", "metric")
+    for section, field in [("main", "temp"), ("main", "feels_like"), ("wind", "speed")]:
+        assert back[section][field] == pytest.approx(data[section][field])
+    assert data == make_weather("Paris", "metric")  # input untouched
+
+
+async def test_disk_cache_survives_restart(make_service, tmp_path):
+    """Test that a new service can load the last response from disk."""
+    path = tmp_path / "weather_cache.db"
+    async with make_service(disk_cache=DiskCache(path)) as service:
+        await service.get_weather_bundle("Nabua", "metric")
+        service.disk_cache.close()
+
+    # Simulate an app restart: fresh service, empty memory cache
+    restarted = WeatherService(disk_cache=DiskCache(path))
+    bundle = await restarted.load_cached_bundle("nabua", "imperial")
+    restarted.disk_cache.close()
+    assert bundle is not None and bundle.forecast is not None
+    assert bundle.weather["name"] == "Nabua"
+    assert bundle.fetched_at is not None
+
+
+def test_disk_cache_size_cap(tmp_path):
+    """Test that the disk cache evicts least recently used rows past its cap."""
+    now = [0.0]
+    cache = DiskCache(tmp_path / "cache.db", max_bytes=1100, clock=lambda: now[0])
+    for i, city in enumerate(["London", "Tokyo", "Paris"]):
+        now[0] = i
+        cache.put(("weather", city), make_weather(city))
+    now[0] = 3
+    cache.get(("weather", "London"))  # London is now the most recently used
+    now[0] = 4
+    cache.put(("weather", "Nabua"), make_weather("Nabua"))
+    kept = [c for c in ["London", "Tokyo", "Paris", "Nabua"]
+            if cache.get(("weather", c)) is not None]
+    size = cache.size_bytes()
+    cache.close()
+    assert "London" in kept and "Tokyo" not in kept
+    assert size <= 1100
+
+
+async def test_weather_many_bounded_and_deduplicated(make_service, fake_api):
+    """Test batch lookups: dedupe, concurrency bound, per-city errors."""
+    in_flight = 0
+    peak = 0
+    transport = fake_api.transport()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return await transport.handle_async_request(request)
+
+    cities = ["London", "Tokyo", "london ", "Paris", "InvalidCityXYZ123", "Nabua", "Oslo"]
+    async with make_service(transport=httpx.MockTransport(handler)) as service:
+        results = await service.get_weather_many(cities, "metric", max_concurrency=2)
+    assert list(results) == cities
+    assert fake_api.requests == 6
+    assert peak == 2
+    assert results["london "] is results["London"]
+    assert isinstance(results["InvalidCityXYZ123"], WeatherServiceError)
+
+
+async def test_weather_many_streams_as_completed(make_service):
+    """Test that the streaming variant yields every city once."""
+    async with make_service() as service:
+        seen = [city async for city, _ in service.iter_weather_many(["A", "B", "a"], "metric")]
+    assert sorted(seen) == ["A", "B", "a"]
+
+
+async def test_identical_requests_are_coalesced(make_service, fake_api):
+    """Test that concurrent identical requests share one upstream call."""
+    fake_api.latency = 0.1
+    async with make_service() as service:
+        results = await asyncio.gather(
+            *(service.get_weather("London", "metric", bypass_cache=True) for _ in range(5))
+        )
+    assert fake_api.requests == 1
+    assert service.coalesced == 4
+    assert all(r == results[0] for r in results)
+
+
+async def test_token_bucket_delays_instead_of_failing():
+    """Test that the rate limiter queues requests beyond the burst."""
+    now = [0.0]
+
+    async def fake_sleep(seconds):
+        now[0] += seconds
+
+    bucket = TokenBucket(rate_per_minute=60, burst=3, clock=lambda: now[0], sleep=fake_sleep)
+    for _ in range(5):
+        await bucket.acquire()
+    assert bucket.acquired == 5
+    assert bucket.delayed == 2
+    assert now[0] == pytest.approx(2.0)
+
+
+async def test_transient_errors_are_retried(make_service):
+    """Test that a 503 and a 429 are retried transparently."""
+    statuses = [503, 429, 200]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        status = statuses.pop(0)
+        if status == 429:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        if status != 200:
+            return httpx.Response(status)
+        return httpx.Response(200, json=make_weather("London"))
+
+    async with make_service(transport=httpx.MockTransport(handler)) as service:
+        data = await service.get_weather("London", "metric")
+    assert data["name"] == "London"
+    assert service.retries == 2
+
+
+async def test_dropped_connections_are_retried(make_service):
+    """Test that a connection dropped by the server is transient, not an answer."""
+    dropped = [True]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if dropped[0]:
+            dropped[0] = False
+            raise httpx.RemoteProtocolError("Server disconnected without sending a response.")
+        return httpx.Response(200, json=make_weather("London"))
+
+    async with make_service(transport=httpx.MockTransport(handler)) as service:
+        data = await service.get_weather("London", "metric")
+    assert data["name"] == "London"
+    assert service.retries == 1
+
+    # Without retries left the drop counts against the breaker
+    dropped[0] = True
+    service = make_service(
+        transport=httpx.MockTransport(handler),
+        retry_policy=RetryPolicy(max_attempts=1),
+        breaker=CircuitBreaker(failure_threshold=1),
+    )
+    async with service:
+        with pytest.raises(TransientServiceError):
+            await service.get_weather("London", "metric")
+    assert service.breaker.state == CircuitBreaker.OPEN
+
+
+async def test_error_rate_from_fake_api_is_absorbed(make_service, fake_api):
+    """Test that sporadic 500s from the fake API are hidden by retries."""
+    fake_api.error_rate = 0.3
+    async with make_service(retry_policy=RetryPolicy(max_attempts=5, base_delay=0.001)) as service:
+        results = await service.get_weather_many([f"City{i}" for i in range(20)], "metric")
+    assert fake_api.errors > 0
+    assert not [r for r in results.values() if isinstance(r, Exception)]
+
+
+async def test_circuit_breaker_fast_fails(make_service, fake_api):
+    """Test that the breaker stops calling a dead upstream until cooldown."""
+    now = [0.0]
+    fake_api.error_rate = 1.0
+    service = make_service(
+        retry_policy=RetryPolicy(max_attempts=1),
+        breaker=CircuitBreaker(failure_threshold=2, cooldown=30, clock=lambda: now[0]),
+    )
+    async with service:
+        for city in ["A", "B", "C", "D"]:
+            with pytest.raises(WeatherServiceError):
+                await service.get_weather(city, "metric")
+        assert fake_api.requests == 2
+        assert service.breaker.state == CircuitBreaker.OPEN
+
+        now[0] = 31  # cooldown over: one trial request goes through
+        with pytest.raises(WeatherServiceError):
+            await service.get_weather("E", "metric")
+    assert fake_api.requests == 3
+    assert service.breaker.rejected == 2
+
+
+async def test_cancel_during_retry_frees_breaker_trial(make_service, fake_api):
+    """Test that a half-open trial cancelled while backing off does not wedge the breaker."""
+    now = [0.0]
+    fake_api.error_rate = 1.0
+    service = make_service(
+        retry_policy=RetryPolicy(max_attempts=3, base_delay=10),
+        breaker=CircuitBreaker(failure_threshold=1, cooldown=30, clock=lambda: now[0]),
+    )
+    async with service:
+        service.breaker.record_failure()  # open
+        now[0] = 31  # half-open: the next request is the trial
+        task = asyncio.ensure_future(service.get_weather("London", "metric"))
+        while fake_api.requests < 1:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)  # now sleeping before the retry
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.01)  # let the shared request unwind
+
+        now[0] = 1000
+        fake_api.error_rate = 0.0
+        assert (await service.get_weather("London", "metric"))["name"] == "London"
+    assert service.breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_cancelling_all_callers_aborts_request():
+    """Test that cancellation reaches the HTTP request once nobody waits."""
+    aborted = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            aborted.append(request.url.params["q"])
+            raise
+        return httpx.Response(200, json=make_weather("London"))
+
+    service = WeatherService(client=mock_client(handler), base_url=WEATHER_URL)
+    first = asyncio.ensure_future(service.get_weather("London", "metric"))
+    second = asyncio.ensure_future(service.get_weather("London", "metric"))
+    await asyncio.sleep(0.05)
+
+    first.cancel()
+    await asyncio.sleep(0.05)
+    assert not aborted  # the second caller still wants the response
+
+    second.cancel()
+    await asyncio.gather(first, second, return_exceptions=True)
+    await asyncio.sleep(0.05)
+    assert aborted == ["London"]
+
+
+def test_fake_server_speaks_http(fake_server):
+    """Test the socket-based fake server end to end."""
+    response = httpx.get(fake_server.forecast_url, params={"q": "Oslo", "units": "metric"})
+    assert response.status_code == 200
+    assert len(response.json()["list"]) == 40
+    assert fake_server.requests == 1
+
+
+def test_streamed_forecast_matches_full_parse():
+    """Test the incremental parser against json.loads at any chunk size."""
+    body = json.dumps(make_forecast("Oslo", "metric", count=12), indent=1).encode("utf-8")
+    expected = [prune(entry, DISPLAY_FIELDS) for entry in json.loads(body)["list"]]
+    for size in (1, 7, 100, len(body)):
+        parser = ForecastStreamParser()
+        for i in range(0, len(body), size):
+            parser.feed(body[i:i + size])
+        result = parser.close()
+        assert result["list"] == expected
+        assert result["city"]["name"] == "Oslo"
+
+
+async def test_streamed_forecast_is_compact(make_service, fake_api):
+    """Test that a streamed forecast keeps only display fields, cached apart."""
+    async with make_service() as service:
+        compact = await service.get_forecast("Tokyo", "imperial", stream=True)
+        full = await service.get_forecast("Tokyo", "imperial")
+    assert fake_api.requests == 2
+    assert "dt_txt" not in compact["list"][0]
+    assert set(compact["list"][0]["main"]) == {"temp", "feels_like", "temp_min", "temp_max", "humidity"}
+    assert compact["list"][0]["main"]["temp"] == full["list"][0]["main"]["temp"]
+
+
+async def test_forecast_model_parsed_once(make_service, fake_api):
+    """Test the columnar forecast: parsed once, converted per unit, stream-safe."""
+    async with make_service() as service:
+        metric = await service.get_forecast_model("Oslo", "metric")
+        imperial = await service.get_forecast_model("Oslo", "imperial")
+        streamed = await service.get_forecast_model("Oslo", "imperial", stream=True)
+        bundle = await service.get_weather_bundle("Oslo", "metric")
+    raw = make_forecast("Oslo", "imperial")
+    assert fake_api.requests == 3  # full, streamed and the bundle's weather
+    assert isinstance(bundle.forecast, Forecast)
+    assert len(metric) == 40 and metric.city == "Oslo"
+    assert list(imperial.temp) == pytest.approx([e["main"]["temp"] for e in raw["list"]], abs=0.05)
+    assert imperial.precipitation[0] == 0.8 and imperial.icon[0] == "10d"
+    assert metric.dt is imperial.dt  # unit-independent columns are shared
+    assert list(streamed.temp) == list(imperial.temp)
+
+
+def test_daily_aggregation_uses_local_days():
+    """Test per-day stats grouped by the city's local day, on both code paths."""
+    data = make_forecast("Oslo", "metric", count=16)  # 2023-11-15 00:00 UTC, 3-hourly
+    data["city"]["timezone"] = -5 * 3600
+    forecast = Forecast.from_payload(data, "metric")
+    days = aggregate_daily(forecast, use_numpy=False)
+
+    # 00:00 and 03:00 UTC are still the 14th in UTC-5
+    assert [d.day.day for d in days] == [14, 15, 16]
+    assert [d.steps for d in days] == [2, 8, 6]
+    first = days[1]  # steps 2..9
+    entries = data["list"][2:10]
+    assert first.high == pytest.approx(max(e["main"]["temp_max"] for e in entries))
+    assert first.precipitation == pytest.approx(0.8)  # only step 5 is rainy
+    assert first.condition_id == 800 and first.icon == "01d"
+    if forecast_aggregate.load_numpy() is not None:
+        assert aggregate_daily(forecast, use_numpy=True) == days
+
+
+async def test_update_scheduler_coalesces_requests():
+    """Test that UI update requests in one frame become one page update."""
+    sent = []
+    ui = UpdateScheduler(lambda: sent.append(ui.requests), asyncio.get_running_loop(), interval=0.01)
+    for _ in range(5):
+        ui.request()
+    await asyncio.sleep(0.05)
+    assert sent == [5]
+
+    ui.request()
+    ui.flush()  # an animation frame goes out right away...
+    await asyncio.sleep(0.05)
+    assert sent == [5, 6]  # ...and the scheduled flush has nothing left to send
+
+
+async def test_icon_cache_downloads_once_and_falls_back(fake_api, tmp_path):
+    """Test icons are fetched once into the assets dir, with a remote fallback."""
+    template = "http://owm.test/img/wn/{icon}@2x.png"
+    icons = IconCache(tmp_path, template, transport=fake_api.transport())
+    assert icons.src("10d") == template.format(icon="10d")
+
+    assert await icons.preload(["10d", "01n", "10d", "zz"]) == 2
+    assert icons.src("10d") == "/icons/10d@2x.png"
+    assert (tmp_path / "icons" / "10d@2x.png").read_bytes().startswith(b"\x89PNG")
+    assert icons.failed == 1  # "zz" is not an icon
+
+    def offline(request: httpx.Request):
+        raise httpx.ConnectError("offline")
+
+    restarted = IconCache(tmp_path, template, transport=httpx.MockTransport(offline))
+    assert await restarted.preload(["10d", "01n", "04d"]) == 0
+    assert restarted.src("01n") == "/icons/01n@2x.png"
+    assert restarted.src("04d") == template.format(icon="04d")
+
+
+async def test_json_store_debounces_atomic_writes(tmp_path):
+    """Test that a burst of saves becomes one atomic write off the event loop."""
+    path = tmp_path / "search_history.json"
+    store = JsonStore(path, [], asyncio.get_running_loop(), delay=0.05)
+    assert store.load() == []
+    for i in range(5):
+        store.save([f"City{i}"])
+    assert not path.exists()  # nothing written yet
+    await asyncio.sleep(0.15)
+    assert store.writes == 1
+    assert JsonStore(path, []).load() == ["City4"]
+    assert [p.name for p in tmp_path.iterdir()] == ["search_history.json"]
+
+
+def test_json_store_sets_corrupt_file_aside(tmp_path):
+    """Test that a corrupt file falls back to the default and is kept aside."""
+    path = tmp_path / "settings.json"
+    path.write_text('{"unit": "imp')
+    assert JsonStore(path, {"unit": "metric"}).load() == {"unit": "metric"}
+    assert (tmp_path / "settings.json.corrupt").read_text() == '{"unit": "imp'
+
+
+def test_city_index_prefix_search_and_id_lookup(tmp_path):
+    """Test accent/case-insensitive prefix search and lookup by city ID."""
+    path = tmp_path / "city_index.bin"
+    build_index([
+        {"id": 4250542, "name": "Springfield", "state": "IL", "country": "US", "coord": {"lat": 39.8, "lon": -89.6}},
+        {"id": 3448439, "name": "São Paulo", "state": "", "country": "BR", "coord": {"lat": -23.5, "lon": -46.6}},
+        {"id": 4409896, "name": "Springfield", "state": "MO", "country": "US", "coord": {"lat": 37.2, "lon": -93.3}},
+        {"id": 2643743, "name": "London", "state": "", "country": "GB", "coord": {"lat": 51.5, "lon": -0.1}},
+    ], path)
+    index = CityIndex(path)
+    assert [c.label for c in index.search("spring")] == ["Springfield, IL, US", "Springfield, MO, US"]
+    assert [c.id for c in index.search("  SAO p")] == [3448439]
+    assert index.search("x") == [] and index.search("") == []
+    assert index.get(2643743).name == "London"
+    assert index.get(1) is None
+    index.close()
+    assert CityIndex.open(tmp_path / "missing.bin") is None
+
+
+async def test_weather_by_city_id(make_service, fake_api):
+    """Test that a city ID is sent as ``id`` and cached apart from names."""
+    async with make_service() as service:
+        data = await service.get_weather_by_id(2643743, "metric")
+        assert data["name"] == "City 2643743"
+        await service.get_weather("City 2643743", "metric")
+    assert fake_api.requests == 2
+
+
+async def test_coordinates_resolve_to_nearest_city(make_service, fake_api, tmp_path):
+    """Test offline nearest-city lookup and cache sharing between names, IDs and coordinates."""
+    path = tmp_path / "city_index.bin"
+    build_index([
+        {"id": 1, "name": "Nabua", "country": "PH", "coord": {"lat": 13.41, "lon": 123.37}},
+        {"id": 2, "name": "Iriga", "country": "PH", "coord": {"lat": 13.42, "lon": 123.41}},
+        {"id": 3, "name": "Fiji", "country": "FJ", "coord": {"lat": -17.7, "lon": 179.9}},
+    ], path)
+    index = CityIndex(path)
+    city, km = index.nearest(13.43, 123.42)
+    assert city.name == "Iriga" and km < 2
+    assert index.nearest(-17.7, -179.95)[0].name == "Fiji"  # across the antimeridian
+    assert index.nearest(0.0, 0.0, max_km=100) is None
+
+    async with make_service(city_index=index) as service:
+        await service.get_weather_by_id(2, "metric")
+        data = await service.get_weather_by_coordinates(13.43, 123.42, "metric")
+        assert data["id"] == 2
+        assert fake_api.requests == 1  # the coordinate lookup reused the ID lookup
+
+        service.city_index = None
+        located = await service.locate(51.5, -0.12)
+        await service.get_weather_by_id(located.id, "metric")
+        assert fake_api.requests == 2  # served from the coordinate response
+    index.close()
+
+
+def test_startup_defers_config_and_heavy_imports():
+    """Test that importing main needs no API key and loads no service modules."""
+    code = (
+        "import sys, main; "
+        "print(main.Config._loaded, *sorted(m for m in sys.modules if m in "
+        "('weather_service', 'city_index', 'forecast_aggregate', 'numpy', 'sqlite3', 'dotenv')))"
+    )
+    env = {k: v for k, v in os.environ.items() if k != "OPENWEATHER_API_KEY"}
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.split() == ["False"]
+
+
+async def test_missing_api_key_is_a_service_error(make_service, fake_api):
+    """Test that a missing key fails the request, not the import."""
+    async with make_service() as service:
+        service.api_key = ""
+        with pytest.raises(WeatherServiceError, match="OPENWEATHER_API_KEY"):
+            await service.get_weather("London", "metric")
+    assert fake_api.requests == 0
+
+
+async def test_metrics_time_request_phases(make_service):
+    """Test request spans, response counters and Prometheus export."""
+    registry = MetricsRegistry()
+    async with make_service(metrics=registry) as service:
+        await service.get_weather("London", "metric")
+        await service.get_weather("London", "metric")  # cached: no new request
+    assert registry.timing("request", endpoint="weather").count == 1
+    assert registry.timing("json_decode", endpoint="weather").count == 1
+
+    text = registry.to_prometheus()
+    assert 'weather_request_seconds_count{endpoint="weather"} 1' in text
+    assert 'weather_request_seconds_bucket{endpoint="weather",le="+Inf"} 1' in text
+    assert 'weather_http_responses_total{endpoint="weather",status="200"} 1' in text
+    assert "weather_service_cache_hits 1" in text
+    assert json.loads(registry.to_json())["gauges"]["service_cache_misses"] == 1
+
+
+async def test_poller_records_observations_until_stopped(make_service, fake_api, tmp_path, monkeypatch):
+    """Test jittered polling, batched writes and a clean shutdown."""
+    # The fake API's readings are from 2023; keep them
+    store = ObservationStore(tmp_path / "observations.db", raw_retention=None)
+    async with make_service() as service:
+        # Two cities every 60 s would not fit in a 1/min budget
+        monkeypatch.setattr("config.Config.RATE_LIMIT_PER_MINUTE", 1)
+        assert Poller(service, store, [("London", None), ("Paris", None)], interval=60).interval == 150
+
+        monkeypatch.setattr("config.Config.RATE_LIMIT_PER_MINUTE", 0)
+        poller = Poller(service, store, [("London", None), ("Paris", None), ("", 2643743)], interval=0.05)
+        asyncio.get_running_loop().call_later(0.4, poller.stop)
+        await asyncio.wait_for(poller.run(), 5)
+
+    assert poller.rounds >= 4 and poller.failed == 0
+    # Requests in flight when stopped are abandoned, not counted as fetched
+    assert 0 <= fake_api.requests - poller.fetched <= 3
+    # The fake API's readings never change, so re-polls add no rows
+    assert poller.stored == len(store) == 3
+    assert store.pending == 0 and store.batches >= 1
+    assert store.latest(2643743).ts == 1700000000
+    store.close()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="asyncio cannot handle signals on Windows")
+async def test_poller_stops_on_sigterm(make_service, fake_api, tmp_path):
+    """Test that SIGTERM stops the poller after writing what it has."""
+    store = ObservationStore(tmp_path / "observations.db", raw_retention=None)
+    async with make_service() as service:
+        poller = Poller(service, store, [("London", None)], interval=0.05)
+        task = asyncio.create_task(poller.run())
+        # Handlers are installed before the first round; signal once it has run
+        while poller.rounds < 1:
+            await asyncio.sleep(0.01)
+        os.kill(os.getpid(), signal.SIGTERM)
+        await asyncio.wait_for(task, 5)
+
+    assert poller.fetched >= 1
+    assert poller.stored == len(store) == 1 and store.pending == 0
+    store.close()
+
+
+async def test_expired_responses_are_revalidated(make_service, fake_api, tmp_path):
+    """Test server max-age TTLs, 304 refreshes and validators kept on disk."""
+    fake_api.max_age = 60
+    now = [0.0]
+    async with make_service(cache=TTLCache(clock=lambda: now[0])) as service:
+        first = await service.get_weather("London", "metric")
+        now[0] = 59  # within the server's max-age
+        await service.get_weather("London", "metric")
+        assert fake_api.requests == 1
+        now[0] = 61
+        again = await service.get_weather("London", "metric")
+    assert again == first
+    assert fake_api.requests == 2 and fake_api.not_modified == service.revalidated == 1
+
+    # After a restart the validators come from the disk cache
+    disk_cache = DiskCache(tmp_path / "cache.db")
+    async with make_service(disk_cache=disk_cache) as service:
+        await service.get_forecast("Paris", "metric")
+    sent = fake_api.bytes_sent
+    async with make_service(disk_cache=disk_cache) as service:
+        forecast = await service.get_forecast("Paris", "metric")
+    assert service.revalidated == 1 and fake_api.bytes_sent == sent
+    assert forecast["city"]["name"] == "Paris"
+    disk_cache.close()
+
+
+def test_observation_rollups_and_retention(tmp_path):
+    """Test hourly/daily downsampling, local days and two-tier retention."""
+    now = [10 * DAY]
+    store = ObservationStore(
+        tmp_path / "observations.db", raw_retention=3 * DAY, hourly_retention=6 * DAY,
+        clock=lambda: now[0],
+    )
+    # Every 20 minutes for two days, 1 K warmer each time
+    for index, ts in enumerate(range(8 * DAY, 10 * DAY, 1200)):
+        store.add(Observation(7, ts, 270 + index, 269, 50, 1000, 3, 800))
+    store.add(Observation(7, 6 * DAY, 250, 249, 50, 1000, 3, 800))  # past raw retention
+    assert store.flush() == 144
+    store.add(Observation(7, 8 * DAY, 270, 269, 50, 1000, 3, 800))
+    assert store.flush() == 0
+
+    hours = store.hourly(7, 8 * DAY)
+    assert len(hours) == 48
+    assert hours[0] == (8 * DAY, 3, 270, 272, 271)
+    assert store.hourly(7, 8 * DAY, measure="humidity")[0].mean == 50
+    assert [d.count for d in store.daily(7, 8 * DAY)] == [72, 72]
+    # Days starting at 06:00 UTC
+    assert [d.count for d in store.daily(7, 8 * DAY, utc_offset=-6 * HOUR)] == [18, 72, 54]
+
+    now[0] = 12 * DAY
+    store.prune()
+    assert len(store) == 72 and len(store.hourly(7, 0)) == 48
+    now[0] = 15 * DAY
+    store.prune()
+    assert len(store) == 0 and len(store.hourly(7, 0)) == 24
+    store.close()
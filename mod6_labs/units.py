@@ -0,0 +1,151 @@
+"""Unit conversion for OpenWeatherMap payloads.
+
+OpenWeatherMap reports temperatures in Kelvin (``standard``), Celsius
+(``metric``) or Fahrenheit (``imperial``), and wind speed in m/s or mph.
+Every conversion here is a linear ``value * scale + offset`` transform, so a
+whole forecast is converted by collecting all values of a kind into one list
+and transforming it in a single pass. Nothing in this module touches the
+network or mutates its inputs.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+STANDARD = "standard"
+METRIC = "metric"
+IMPERIAL = "imperial"
+UNIT_SYSTEMS = (STANDARD, METRIC, IMPERIAL)
+
+TEMPERATURE_SYMBOLS = {STANDARD: "K", METRIC: "°C", IMPERIAL: "°F"}
+SPEED_UNITS = {STANDARD: "m/s", METRIC: "m/s", IMPERIAL: "mph"}
+
+# Fields of the "main" and "wind" objects that carry unit-dependent values
+TEMPERATURE_FIELDS = ("temp", "feels_like", "temp_min", "temp_max")
+SPEED_FIELDS = ("speed", "gust")
+
+MPS_TO_MPH = 2.2369362920544
+
+# (scale, offset) taking Kelvin to each unit system
+_TEMP_FROM_KELVIN = {
+    STANDARD: (1.0, 0.0),
+    METRIC: (1.0, -273.15),
+    IMPERIAL: (9 / 5, -273.15 * 9 / 5 + 32),
+}
+# scale taking m/s to each unit system
+_SPEED_FROM_MPS = {STANDARD: 1.0, METRIC: 1.0, IMPERIAL: MPS_TO_MPH}
+
+
+def _check(unit: str):
+    if unit not in UNIT_SYSTEMS:
+        raise ValueError(f"Unknown unit system: {unit!r}")
+
+
+def temperature_transform(from_unit: str, to_unit: str) -> Tuple[float, float]:
+    """Return ``(scale, offset)`` converting temperatures between unit systems."""
+    _check(from_unit)
+    _check(to_unit)
+    from_scale, from_offset = _TEMP_FROM_KELVIN[from_unit]
+    to_scale, to_offset = _TEMP_FROM_KELVIN[to_unit]
+    # value -> Kelvin -> target, folded into a single linear map
+    scale = to_scale / from_scale
+    return scale, to_offset - from_offset * scale
+
+
+def speed_scale(from_unit: str, to_unit: str) -> float:
+    """Return the factor converting wind speeds between unit systems."""
+    _check(from_unit)
+    _check(to_unit)
+    return _SPEED_FROM_MPS[to_unit] / _SPEED_FROM_MPS[from_unit]
+
+
+def convert_temperature(value: float, from_unit: str, to_unit: str) -> float:
+    """Convert a single temperature."""
+    scale, offset = temperature_transform(from_unit, to_unit)
+    return value * scale + offset
+
+
+def convert_speed(value: float, from_unit: str, to_unit: str) -> float:
+    """Convert a single wind speed."""
+    return value * speed_scale(from_unit, to_unit)
+
+
+def convert_temperatures(values: Sequence[float], from_unit: str, to_unit: str) -> List[float]:
+    """Convert a sequence of temperatures in one pass."""
+    scale, offset = temperature_transform(from_unit, to_unit)
+    return [v * scale + offset for v in values]
+
+
+def convert_speeds(values: Sequence[float], from_unit: str, to_unit: str) -> List[float]:
+    """Convert a sequence of wind speeds in one pass."""
+    scale = speed_scale(from_unit, to_unit)
+    return [v * scale for v in values]
+
+
+def _convert_fields(records: List[Dict], fields: Sequence[str], convert) -> List[Dict]:
+    """Return copies of ``records`` with ``fields`` converted by ``convert``.
+
+    Values of all records are gathered into one flat list, converted with a
+    single call, and scattered back into shallow copies.
+    """
+    slots = []
+    values = []
+    for index, record in enumerate(records):
+        for field in fields:
+            value = record.get(field)
+            if isinstance(value, (int, float)):
+                slots.append((index, field))
+                values.append(value)
+
+    copies = [dict(record) for record in records]
+    for (index, field), value in zip(slots, convert(values)):
+        copies[index][field] = value
+    return copies
+
+
+def convert_payload(data: Dict, from_unit: str, to_unit: str) -> Dict:
+    """
+    Convert a current-weather or forecast payload between unit systems.
+
+    Args:
+        data: Response from the ``/weather`` or ``/forecast`` endpoint
+        from_unit: Unit system ``data`` is expressed in
+        to_unit: Unit system to convert to
+
+    Returns:
+        A new payload; only the ``main`` and ``wind`` objects are copied,
+        everything else is shared with ``data``
+    """
+    if from_unit == to_unit:
+        _check(from_unit)
+        return data
+
+    # A forecast is a list of observation-shaped entries; current weather is one
+    entries = data.get("list")
+    is_forecast = isinstance(entries, list)
+    if not is_forecast:
+        entries = [data]
+
+    mains = _convert_fields(
+        [entry.get("main", {}) for entry in entries],
+        TEMPERATURE_FIELDS,
+        lambda values: convert_temperatures(values, from_unit, to_unit),
+    )
+    winds = _convert_fields(
+        [entry.get("wind", {}) for entry in entries],
+        SPEED_FIELDS,
+        lambda values: convert_speeds(values, from_unit, to_unit),
+    )
+
+    converted = []
+    for entry, main, wind in zip(entries, mains, winds):
+        entry = dict(entry)
+        if "main" in entry:
+            entry["main"] = main
+        if "wind" in entry:
+            entry["wind"] = wind
+        converted.append(entry)
+
+    if not is_forecast:
+        return converted[0]
+    result = dict(data)
+    result["list"] = converted
+    return result
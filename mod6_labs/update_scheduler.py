@@ -0,0 +1,79 @@
+"""Coalescing of Flet ``page.update()`` calls.
+
+Every ``page.update()`` diffs the whole control tree and sends a protocol
+message to the Flet client. A single search used to call it six or seven
+times within a few milliseconds. ``UpdateScheduler`` turns those calls into
+requests: the first request of a frame schedules one flush on the event loop
+and later requests in the same frame ride along with it.
+"""
+
+import asyncio
+import threading
+from typing import Callable, Optional
+
+
+class UpdateScheduler:
+    """Flush pending UI changes at most once per ``interval`` seconds.
+
+    ``request()`` may be called from the event loop or from Flet's handler
+    threads. ``flush()`` sends pending changes immediately, for the cases
+    where the client must see an intermediate state, such as the first frame
+    of an opacity animation.
+    """
+
+    def __init__(
+        self,
+        update: Callable[[], None],
+        loop: asyncio.AbstractEventLoop,
+        interval: float = 1 / 60,
+    ):
+        self._update = update
+        self._loop = loop
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending: Optional[asyncio.TimerHandle] = None
+        self._scheduled = False
+        self.requests = 0
+        self.flushes = 0
+
+    def request(self):
+        """Mark the page dirty; it is updated within one frame."""
+        with self._lock:
+            self.requests += 1
+            if self._scheduled:
+                return
+            self._scheduled = True
+
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._schedule()
+        else:
+            self._loop.call_soon_threadsafe(self._schedule)
+
+    def _schedule(self):
+        with self._lock:
+            if self._scheduled and self._pending is None:
+                self._pending = self._loop.call_later(self.interval, self._flush_scheduled)
+
+    def _flush_scheduled(self):
+        with self._lock:
+            self._pending = None
+            if not self._scheduled:
+                return  # already sent by an explicit flush()
+            self._scheduled = False
+        self._send()
+
+    def flush(self):
+        """Send pending changes now instead of at the end of the frame."""
+        with self._lock:
+            # A timer still pending finds nothing to send, or picks up
+            # requests made after this flush
+            self._scheduled = False
+        self._send()
+
+    def _send(self):
+        self.flushes += 1
+        self._update()
@@ -1,9 +1,30 @@
 # weather_service.py
 """Weather API service layer."""
 
+import asyncio
+import sqlite3
+import time
 import httpx
-from typing import Dict, Optional
+from collections import OrderedDict
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import (
+    AsyncIterator, Awaitable, Callable, ContextManager, Dict, Hashable, Iterable, List,
+    Optional, Sequence, Tuple, Union,
+)
+from cache import CachedResponse, TTLCache
+from city_index import City, CityIndex
 from config import Config
+from disk_cache import DiskCache
+from forecast_model import Forecast
+from forecast_stream import DISPLAY_FIELDS, FieldPath, ForecastStreamParser
+from metrics import MetricsRegistry
+from observations import Observation, ObservationStore
+from ratelimit import TokenBucket
+from resilience import CircuitBreaker, RetryPolicy
+from units import STANDARD, convert_payload
 
 
 class WeatherServiceError(Exception):
@@ -11,63 +32,590 @@ class WeatherServiceError(Exception):
     pass
 
 
+class TransientServiceError(WeatherServiceError):
+    """A failure worth retrying: timeouts, network errors, 429 and 5xx."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def parse_max_age(headers: httpx.Headers) -> Optional[float]:
+    """
+    Seconds a response may be served from cache, from Cache-Control and Age.
+
+    Returns:
+        The remaining ``max-age``; 0 for ``no-cache``/``no-store``
+        (revalidate before every use); ``None`` if the server did not say
+    """
+    directives = {}
+    for part in headers.get("Cache-Control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        directives[name.lower()] = value.strip('"')
+    if "no-cache" in directives or "no-store" in directives:
+        return 0.0
+    try:
+        max_age = float(directives["max-age"])
+    except (KeyError, ValueError):
+        return None
+    try:
+        age = float(headers.get("Age", 0))
+    except ValueError:
+        age = 0.0
+    return max(0.0, max_age - age)
+
+
+@dataclass
+class WeatherBundle:
+    """Current conditions plus the forecast for one city.
+
+    The forecast is optional: if only the forecast request failed,
+    ``forecast`` is ``None`` and ``forecast_error`` holds the reason.
+    """
+    weather: Dict
+    forecast: Optional[Forecast] = None
+    forecast_error: Optional[WeatherServiceError] = None
+    fetched_at: Optional[float] = None  # wall-clock time of the weather part
+
+
+DataCallback = Callable[[Dict], Awaitable[None]]
+ForecastCallback = Callable[[Forecast], Awaitable[None]]
+WeatherResult = Union[Dict, WeatherServiceError]
+
+
+def normalize_city(city: str) -> str:
+    """Normalize a city query so equivalent spellings share a cache key."""
+    return " ".join(city.split()).casefold()
+
+
+def city_location(city: str, city_id: Optional[int] = None) -> Tuple[Dict, Hashable]:
+    """
+    Query parameters and cache-key part for a city name or city ID.
+
+    Args:
+        city: Name of the city; ignored when ``city_id`` is given
+        city_id: OpenWeatherMap city ID, which is unambiguous
+
+    Raises:
+        WeatherServiceError: If neither a name nor an ID is given
+    """
+    if city_id is not None:
+        return {"id": int(city_id)}, ("id", int(city_id))
+    if not city:
+        raise WeatherServiceError("City name cannot be empty")
+    return {"q": city}, normalize_city(city)
+
+
 class WeatherService:
-    """Service for fetching weather data from OpenWeatherMap API."""
-    
-    def __init__(self):
+    """Service for fetching weather data from OpenWeatherMap API.
+
+    A single ``httpx.AsyncClient`` is kept for the lifetime of the service so
+    consecutive requests reuse pooled keep-alive connections instead of paying
+    for a new TCP connect and TLS handshake each time. Call ``aclose()`` when
+    done, or use the service as an async context manager.
+
+    Data is always requested in the canonical ``standard`` unit system and
+    converted locally to whatever unit the caller asks for, so switching
+    between °C and °F never costs a network round trip.
+
+    Successful responses are kept in a TTL/LRU cache keyed on
+    ``(endpoint, normalized query)``; pass ``bypass_cache=True`` to force a
+    network request (the fresh response still refreshes the cache). A
+    response lives for the server's ``Cache-Control: max-age`` when it sends
+    one, else for the endpoint's configured TTL. Once it expires, it is
+    revalidated with a conditional request (``If-None-Match`` /
+    ``If-Modified-Since``); a 304 answer refreshes the cached body without
+    downloading it again.
+
+    With a ``DiskCache`` attached, every fresh response is also persisted so
+    ``load_cached_bundle`` can return the last known data after a restart,
+    and revalidated rather than downloaded again on the next request.
+
+    Concurrent requests for the same key share one in-flight request
+    (single-flight) that is cancelled once every caller has been cancelled,
+    and every network call first takes a token from the
+    rate limiter so bursts queue up instead of exceeding the API quota.
+    Transient failures are retried with jittered exponential backoff, and a
+    circuit breaker fast-fails requests while the upstream is clearly down.
+
+    With a ``CityIndex`` attached, coordinates resolve offline to the
+    nearest known city and are fetched by its city ID. Responses are also
+    cached under the city ID they name, so a coordinate lookup reuses what an
+    earlier search by name fetched, and the other way round.
+
+    With an ``ObservationStore`` attached, every current-weather response
+    fetched is recorded as an observation; the caller decides when the
+    store's buffer is flushed.
+
+    With a ``MetricsRegistry`` attached, every request is timed phase by
+    phase (rate-limit wait, connect, TLS, upstream wait, body, JSON decode)
+    and the service counters are exported as gauges.
+
+    ``base_url``/``forecast_url`` and ``transport`` override where requests
+    go, which is how the tests run against the local fake API.
+    """
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        base_url: Optional[str] = None,
+        forecast_url: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        cache: Optional[TTLCache] = None,
+        disk_cache: Optional[DiskCache] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        city_index: Optional[CityIndex] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        observations: Optional[ObservationStore] = None,
+    ):
+        Config.load()  # .env is read by the first service, not at import
         self.api_key = Config.API_KEY
-        self.base_url = Config.BASE_URL
+        self.base_url = base_url or Config.BASE_URL
+        self.forecast_url = forecast_url or Config.FORECAST_URL
         self.timeout = Config.TIMEOUT
+        self.transport = transport
+        self._client = client
+        self._owns_client = client is None
+        self.cache = cache if cache is not None else TTLCache(Config.CACHE_MAX_ENTRIES)
+        self.cache_ttls = {
+            "weather": Config.CACHE_TTL_WEATHER,
+            "forecast": Config.CACHE_TTL_FORECAST,
+        }
+        self.ttl_from_server = Config.CACHE_TTL_FROM_SERVER
+        self.conditional_requests = Config.CONDITIONAL_REQUESTS
+        self.revalidated = 0  # requests answered 304 Not Modified
+        self.disk_cache = disk_cache
+        self.city_index = city_index
+        self.observations = observations
+        self.stream_forecast = Config.STREAM_FORECAST
+        self.stream_fields = DISPLAY_FIELDS
+        # Parsed forecasts, reused for as long as their response is cached
+        self._forecast_models = TTLCache(Config.CACHE_MAX_ENTRIES)
+        if rate_limiter is None and Config.RATE_LIMIT_PER_MINUTE > 0:
+            rate_limiter = TokenBucket(Config.RATE_LIMIT_PER_MINUTE, Config.RATE_LIMIT_BURST)
+        self.rate_limiter = rate_limiter
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.coalesced = 0  # requests that joined an in-flight request
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_attempts=Config.RETRY_MAX_ATTEMPTS,
+            base_delay=Config.RETRY_BASE_DELAY,
+            max_delay=Config.RETRY_MAX_DELAY,
+            jitter=Config.RETRY_JITTER,
+            max_retry_after=Config.RETRY_MAX_RETRY_AFTER,
+        )
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=Config.BREAKER_FAILURE_THRESHOLD,
+            cooldown=Config.BREAKER_COOLDOWN,
+        )
+        self.retries = 0
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.register_gauges("service", self._gauges)
+
+    def _gauges(self) -> Dict:
+        stats = self.stats()
+        cache = stats.pop("cache")
+        stats.update({f"cache_{key}": value for key, value in cache.items()})
+        stats["breaker_open"] = stats.pop("breaker_state") != "closed"
+        return stats
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared HTTP client, created on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=Config.MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=Config.KEEPALIVE_EXPIRY,
+                ),
+                http2=Config.HTTP2,
+                transport=self.transport,
+                event_hooks=self.metrics.httpx_event_hooks() if self.metrics else None,
+            )
+            self._owns_client = True
+        return self._client
+
+    async def aclose(self):
+        """Close the pooled connections if this service created the client."""
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+        self._client = None
+
+    async def __aenter__(self) -> "WeatherService":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
     
-    async def _fetch_data(self, url: str, params: Dict) -> Dict:
-        """Internal helper to handle HTTP request and error handling."""
+    async def _fetch_data(
+        self,
+        url: str,
+        params: Dict,
+        stream_fields: Optional[Sequence[FieldPath]] = None,
+        cached: Optional[CachedResponse] = None,
+    ) -> Tuple[CachedResponse, Optional[float]]:
+        """Internal helper to handle HTTP request, retries and error handling.
+
+        With ``stream_fields`` the body is parsed incrementally as a forecast
+        and only those fields of each entry are kept. With ``cached`` the
+        request is conditional on its validators, and a 304 answer returns
+        ``cached`` refreshed.
+
+        Returns:
+            The response and the server's ``max-age`` (see ``parse_max_age``)
+        """
+        if not self.api_key:
+            raise WeatherServiceError(Config.MISSING_API_KEY)
+        if not self.breaker.allow_request():
+            raise WeatherServiceError(
+                "Weather service is currently unavailable. "
+                f"Please try again in {self.breaker.retry_in():.0f} seconds."
+            )
+
+        attempt = 1
+        while True:
+            try:
+                result = await self._request_once(url, params, stream_fields, cached)
+            except TransientServiceError as e:
+                delay = self.retry_policy.delay(attempt, e.retry_after)
+                if delay is None:
+                    self.breaker.record_failure()
+                    raise
+            except WeatherServiceError:
+                # A definite answer such as 404 means the upstream is healthy
+                self.breaker.record_success()
+                raise
+            except BaseException:
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+            self.retries += 1
+            try:
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Cancelled while backing off: free the half-open trial slot
+                self.breaker.release()
+                raise
+            attempt += 1
+
+    async def _request_once(
+        self,
+        url: str,
+        params: Dict,
+        stream_fields: Optional[Sequence[FieldPath]] = None,
+        cached: Optional[CachedResponse] = None,
+    ) -> Tuple[CachedResponse, Optional[float]]:
+        """Send a single request and translate failures into service errors."""
+        with self._span("request", endpoint=url.rsplit("/", 1)[-1]):
+            return await self._send(url, params, stream_fields, cached)
+
+    def _span(self, name: str, **labels) -> ContextManager:
+        """A metrics span, or a no-op without a registry."""
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.span(name, **labels)
+
+    async def _send(
+        self,
+        url: str,
+        params: Dict,
+        stream_fields: Optional[Sequence[FieldPath]] = None,
+        cached: Optional[CachedResponse] = None,
+    ) -> Tuple[CachedResponse, Optional[float]]:
+        if self.rate_limiter is not None:
+            with self._span("rate_limit_wait"):
+                await self.rate_limiter.acquire()
+
+        headers = cached.conditional_headers() if cached is not None else None
         try:
-            # Make async HTTP request
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(url, params=params)
-                
-                # Check for HTTP errors
-                if response.status_code == 404:
-                    city_name = params.get("q", "location")
-                    raise WeatherServiceError(
-                        f"City or {city_name} not found. Please check the spelling."
-                    )
-                elif response.status_code == 401:
-                    raise WeatherServiceError(
-                        "Invalid API key. Please check your configuration."
-                    )
-                elif response.status_code >= 500:
-                    raise WeatherServiceError(
-                        "Weather service is currently unavailable. "
-                        "Please try again later."
-                    )
-                elif response.status_code != 200:
-                    raise WeatherServiceError(
-                        f"Error fetching data: {response.status_code}"
-                    )
-                
-                # Parse JSON response
-                return response.json()
+            # Make async HTTP request on the shared connection pool
+            async with self.client.stream("GET", url, params=params, headers=headers) as response:
+                max_age = parse_max_age(response.headers) if self.ttl_from_server else None
+                if response.status_code == 304 and cached is not None:
+                    await response.aread()  # the empty body; keeps the connection reusable
+                    self.revalidated += 1
+                    return CachedResponse(
+                        cached.data,
+                        time.time(),
+                        response.headers.get("ETag", cached.etag),
+                        response.headers.get("Last-Modified", cached.last_modified),
+                    ), max_age
+                self._check_status(response, params)
+
+                if stream_fields is None:
+                    await response.aread()
+                    with self._span("json_decode", endpoint=url.rsplit("/", 1)[-1]):
+                        data = response.json()
+                else:
+                    # Parse as the body arrives, keeping only the wanted fields
+                    parser = ForecastStreamParser(stream_fields)
+                    async for chunk in response.aiter_bytes():
+                        parser.feed(chunk)
+                    data = parser.close()
+                return CachedResponse(
+                    data,
+                    time.time(),
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                ), max_age
                 
+        except WeatherServiceError:
+            raise
         except httpx.TimeoutException:
-            raise WeatherServiceError(
+            raise TransientServiceError(
                 "Request timed out. Please check your internet connection."
             )
         except httpx.NetworkError:
-            raise WeatherServiceError(
+            raise TransientServiceError(
                 "Network error. Please check your internet connection."
             )
+        except httpx.ProtocolError:
+            # E.g. a pooled connection the server had closed, or a cut-off body
+            raise TransientServiceError(
+                "Connection to the weather service was interrupted."
+            )
         except httpx.HTTPError as e:
             raise WeatherServiceError(f"HTTP error occurred: {str(e)}")
         except Exception as e:
             raise WeatherServiceError(f"An unexpected error occurred: {str(e)}")
 
-    async def get_weather(self, city: str, unit: str) -> Dict:
+    @staticmethod
+    def _check_status(response: httpx.Response, params: Dict):
+        """Raise the service error matching a non-200 response."""
+        if response.status_code == 404:
+            city_name = params.get("q", "location")
+            raise WeatherServiceError(
+                f"City or {city_name} not found. Please check the spelling."
+            )
+        elif response.status_code == 401:
+            raise WeatherServiceError(
+                "Invalid API key. Please check your configuration."
+            )
+        elif response.status_code == 429:
+            raise TransientServiceError(
+                "Too many requests. Please try again later.",
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            )
+        elif response.status_code >= 500:
+            raise TransientServiceError(
+                "Weather service is currently unavailable. "
+                "Please try again later.",
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            )
+        elif response.status_code != 200:
+            raise WeatherServiceError(
+                f"Error fetching data: {response.status_code}"
+            )
+
+    def stats(self) -> Dict:
+        """Counters describing cache, coalescing, retry and breaker behaviour."""
+        return {
+            "cache": self.cache.stats(),
+            "coalesced": self.coalesced,
+            "revalidated": self.revalidated,
+            "retries": self.retries,
+            "breaker_state": self.breaker.state,
+            "breaker_opened": self.breaker.times_opened,
+            "breaker_rejected": self.breaker.rejected,
+            "rate_limited": self.rate_limiter.delayed if self.rate_limiter else 0,
+        }
+
+    async def _cached_fetch(
+        self,
+        endpoint: str,
+        url: str,
+        params: Dict,
+        key: Hashable,
+        unit: str,
+        bypass_cache: bool = False,
+        stream_fields: Optional[Sequence[FieldPath]] = None,
+    ) -> Dict:
+        """Serve ``key`` from the cache, or fetch it and cache the response.
+
+        ``params`` must request the canonical unit; the result is converted
+        to ``unit``. The returned dictionary may share nested objects with
+        the cache and must not be modified by callers.
+        """
+        entry = None if bypass_cache else self.cache.get(key)
+        if entry is None:
+            entry = await self._fetch_shared(endpoint, url, params, key, stream_fields)
+        return convert_payload(entry.data, STANDARD, unit)
+
+    async def _fetch_shared(
+        self,
+        endpoint: str,
+        url: str,
+        params: Dict,
+        key: Hashable,
+        stream_fields: Optional[Sequence[FieldPath]] = None,
+    ) -> CachedResponse:
+        """Fetch ``key`` once no matter how many callers ask concurrently."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._fetch_and_store(endpoint, url, params, key, stream_fields)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._request_finished(key, t))
+        else:
+            self.coalesced += 1
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # Shielded so one caller giving up does not fail the others
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # Every caller gave up; abort the HTTP request itself
+                    task.cancel()
+
+    def _request_finished(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark as retrieved even if every caller left
+
+    async def _fetch_and_store(
+        self,
+        endpoint: str,
+        url: str,
+        params: Dict,
+        key: Hashable,
+        stream_fields: Optional[Sequence[FieldPath]] = None,
+    ) -> CachedResponse:
+        cached = await self._revalidation_candidate(key) if self.conditional_requests else None
+        response, max_age = await self._fetch_data(url, params, stream_fields, cached)
+        ttl = self.cache_ttls[endpoint] if max_age is None else max_age
+        self.cache.set(key, response, ttl)
+        alias = self._id_alias(key, response.data)
+        if alias is not None:
+            # Later lookups by city ID (e.g. from coordinates) hit this response
+            self.cache.set(alias, response, ttl)
+        if endpoint == "weather" and self.observations is not None:
+            observation = Observation.from_payload(response.data)
+            if observation is not None:
+                self.observations.add(observation)
+        await self._persist(key, response)
+        return response
+
+    async def _revalidation_candidate(self, key: Hashable) -> Optional[CachedResponse]:
+        """The last response for ``key``, expired or persisted, if it can be revalidated."""
+        cached = self.cache.stale(key)
+        if cached is None and self.disk_cache is not None:
+            try:
+                cached = await asyncio.to_thread(self.disk_cache.get_response, key)
+            except sqlite3.Error:
+                return None
+        if cached is None or not (cached.etag or cached.last_modified):
+            return None
+        return cached
+
+    @staticmethod
+    def _id_alias(key: Hashable, data: Dict) -> Optional[Hashable]:
+        """``key`` addressed by the city ID the response names, if that differs."""
+        endpoint, location, *rest = key
+        city = data.get("city") if endpoint == "forecast" else data
+        city_id = city.get("id") if isinstance(city, dict) else None
+        if not isinstance(city_id, int) or location == ("id", city_id):
+            return None
+        return (endpoint, ("id", city_id), *rest)
+
+    async def _persist(self, key: Hashable, response: CachedResponse):
+        """Write a fresh response to the disk cache without blocking the loop."""
+        if self.disk_cache is None:
+            return
+        try:
+            await asyncio.to_thread(self.disk_cache.put, key, *response)
+        except sqlite3.Error:
+            # The disk cache is only an optimisation; never fail a lookup over it
+            pass
+
+    def fetched_at(self, endpoint: str, city: str, city_id: Optional[int] = None) -> Optional[float]:
+        """Wall-clock time the in-memory cached response for ``city`` was fetched."""
+        entry = self.cache.peek((endpoint, city_location(city, city_id)[1]))
+        return entry.fetched_at if entry is not None else None
+
+    async def load_cached_bundle(
+        self, city: str, unit: str, city_id: Optional[int] = None
+    ) -> Optional[WeatherBundle]:
+        """
+        Load the last persisted weather and forecast for a city, however old.
+        
+        Args:
+            city: Name of the city
+            unit: metric, imperial, or standard
+            city_id: Look up what was fetched by OpenWeatherMap city ID
+            
+        Returns:
+            WeatherBundle whose ``fetched_at`` tells how stale it is, or
+            ``None`` if nothing is stored for the city
+        """
+        if self.disk_cache is None or not (city or city_id is not None):
+            return None
+
+        location = city_location(city, city_id)[1]
+        try:
+            weather_row = await asyncio.to_thread(self.disk_cache.get, ("weather", location))
+            forecast_row = await asyncio.to_thread(
+                self.disk_cache.get, self._forecast_key(location, self.stream_forecast)
+            )
+        except sqlite3.Error:
+            return None
+        if weather_row is None:
+            return None
+
+        weather, fetched_at = weather_row
+        bundle = WeatherBundle(
+            weather=convert_payload(weather, STANDARD, unit),
+            fetched_at=fetched_at,
+        )
+        if forecast_row is not None:
+            bundle.forecast = Forecast.from_payload(forecast_row[0]).to_unit(unit)
+        return bundle
+
+    async def get_weather(
+        self,
+        city: str,
+        unit: str,
+        bypass_cache: bool = False,
+        city_id: Optional[int] = None,
+    ) -> Dict:
         """
         Fetch weather data for a given city.
         
         Args:
             city: Name of the city
+            unit: metric, imperial, or standard
+            bypass_cache: Skip the response cache and hit the API
+            city_id: Query by OpenWeatherMap city ID instead of by name
             
         Returns:
             Dictionary containing weather data
@@ -75,24 +623,41 @@ class WeatherService:
         Raises:
             WeatherServiceError: If the request fails
         """
-        if not city:
-            raise WeatherServiceError("City name cannot be empty")
+        query, location = city_location(city, city_id)
         
         # Build request parameters
         params = {
-            "q": city,
+            **query,
             "appid": self.api_key,
-            "units": unit,
+            "units": STANDARD,
         }
         
         # Use the unified fetcher
-        return await self._fetch_data(self.base_url, params)
+        key = ("weather", location)
+        return await self._cached_fetch(
+            "weather", self.base_url, params, key, unit, bypass_cache
+        )
+
+    async def get_weather_by_id(self, city_id: int, unit: str, bypass_cache: bool = False) -> Dict:
+        """
+        Fetch weather data by OpenWeatherMap city ID (see ``city_index``).
+        
+        Args:
+            city_id: City ID from the OpenWeatherMap city list
+            unit: metric, imperial, or standard
+            bypass_cache: Skip the response cache and hit the API
+            
+        Returns:
+            Dictionary containing weather data
+        """
+        return await self.get_weather("", unit, bypass_cache, city_id=city_id)
         
     async def get_weather_by_coordinates(
         self, 
         lat: float, 
         lon: float,
-        unit: str = Config.UNITS
+        unit: str = Config.UNITS,
+        bypass_cache: bool = False,
     ) -> Dict:
         """
         Fetch weather data by coordinates.
@@ -100,28 +665,277 @@ class WeatherService:
         Args:
             lat: Latitude
             lon: Longitude
+            unit: metric, imperial, or standard
+            bypass_cache: Skip the response cache and hit the API
             
         Returns:
             Dictionary containing weather data
         """
+        match = self.nearest_city(lat, lon)
+        if match is not None:
+            # Shares the cache entry of every other lookup of that city
+            return await self.get_weather_by_id(match[0].id, unit, bypass_cache)
+
         params = {
             "lat": lat,
             "lon": lon,
             "appid": self.api_key,
-            "units": unit,
+            "units": STANDARD,
         }
         
-        # Use the unified fetcher
-        return await self._fetch_data(self.base_url, params)
+        # Use the unified fetcher; ~1 km precision is plenty for a cache key
+        key = ("weather", (round(lat, 2), round(lon, 2)))
+        return await self._cached_fetch(
+            "weather", self.base_url, params, key, unit, bypass_cache
+        )
+
+    def nearest_city(self, lat: float, lon: float) -> Optional[Tuple[City, float]]:
+        """
+        The indexed city nearest to a coordinate, found offline.
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            The city and its distance in km, or ``None`` without a city index
+            or when no city is within ``Config.NEAREST_CITY_MAX_KM``
+        """
+        if self.city_index is None:
+            return None
+        return self.city_index.nearest(lat, lon, Config.NEAREST_CITY_MAX_KM)
+
+    async def locate(self, lat: float, lon: float) -> City:
+        """
+        Name the city to show for a coordinate, e.g. the user's location.
+
+        The city index answers without a network request. Otherwise one
+        weather request by coordinates names the city; its response is cached
+        under the city ID, so fetching that city next is a cache hit.
+
+        Args:
+            lat: Latitude
+            lon: Longitude
 
-    async def get_forecast(self, city: str, unit: str) -> Dict:
-        """Get 5-day forecast."""
-        forecast_url = "https://api.openweathermap.org/data/2.5/forecast"
+        Returns:
+            City with an OpenWeatherMap ID to fetch weather and forecast by
+        """
+        match = self.nearest_city(lat, lon)
+        if match is not None:
+            return match[0]
+        data = await self.get_weather_by_coordinates(lat, lon, STANDARD)
+        if not isinstance(data.get("id"), int):
+            raise WeatherServiceError("No city found at this location")
+        country = data.get("sys", {}).get("country", "")
+        return City(data["id"], data.get("name", ""), "", country, lat, lon)
+
+    @staticmethod
+    def _forecast_key(location: Hashable, stream: bool) -> Hashable:
+        # Compact (streamed) forecasts hold fewer fields, so cache them apart
+        if stream:
+            return ("forecast", location, "compact")
+        return ("forecast", location)
+
+    async def get_forecast(
+        self,
+        city: str,
+        unit: str,
+        bypass_cache: bool = False,
+        stream: Optional[bool] = None,
+        city_id: Optional[int] = None,
+    ) -> Dict:
+        """
+        Get 5-day forecast.
+        
+        Args:
+            city: Name of the city
+            unit: metric, imperial, or standard
+            bypass_cache: Skip the response cache and hit the API
+            stream: Parse the body incrementally and keep only the fields in
+                ``stream_fields`` (defaults to ``self.stream_forecast``)
+            city_id: Query by OpenWeatherMap city ID instead of by name
+        """
+        if stream is None:
+            stream = self.stream_forecast
+        query, location = city_location(city, city_id)
         params = {
-            "q": city,
+            **query,
             "appid": self.api_key,
-            "units": unit,
+            "units": STANDARD,
         }
         
         # Use the unified fetcher
-        return await self._fetch_data(forecast_url, params)
\ No newline at end of file
+        return await self._cached_fetch(
+            "forecast",
+            self.forecast_url,
+            params,
+            self._forecast_key(location, stream),
+            unit,
+            bypass_cache,
+            stream_fields=self.stream_fields if stream else None,
+        )
+
+    async def get_forecast_model(
+        self,
+        city: str,
+        unit: str,
+        bypass_cache: bool = False,
+        stream: Optional[bool] = None,
+        city_id: Optional[int] = None,
+    ) -> Forecast:
+        """
+        Get the 5-day forecast as a compact ``Forecast``.
+
+        The response is parsed once; later calls for the same cached
+        response only convert the parsed columns to ``unit``.
+
+        Args:
+            city: Name of the city
+            unit: metric, imperial, or standard
+            bypass_cache: Skip the response cache and hit the API
+            stream: Parse the body incrementally (see ``get_forecast``)
+            city_id: Query by OpenWeatherMap city ID instead of by name
+        """
+        if stream is None:
+            stream = self.stream_forecast
+        data = await self.get_forecast(city, STANDARD, bypass_cache, stream, city_id)
+
+        key = self._forecast_key(city_location(city, city_id)[1], stream)
+        parsed = self._forecast_models.get(key)
+        if parsed is None or parsed[0] is not data:
+            # Remember which response the model came from, to notice refreshes
+            parsed = (data, Forecast.from_payload(data, STANDARD))
+            self._forecast_models.set(key, parsed, self.cache_ttls["forecast"])
+        return parsed[1].to_unit(unit)
+
+    async def get_weather_bundle(
+        self,
+        city: str,
+        unit: str,
+        on_weather: Optional[DataCallback] = None,
+        on_forecast: Optional[ForecastCallback] = None,
+        city_id: Optional[int] = None,
+    ) -> WeatherBundle:
+        """
+        Fetch current weather and the 5-day forecast concurrently.
+        
+        Args:
+            city: Name of the city
+            unit: metric, imperial, or standard
+            on_weather: Awaited with the current weather as soon as it arrives
+            on_forecast: Awaited with the parsed ``Forecast`` as soon as it arrives
+            city_id: Query by OpenWeatherMap city ID instead of by name
+            
+        Returns:
+            WeatherBundle with both parts; a failed forecast is reported in
+            ``forecast_error`` instead of failing the whole bundle
+            
+        Raises:
+            WeatherServiceError: If the current weather request fails
+        """
+        city_location(city, city_id)  # validate before starting any request
+
+        async def fetch_part(fetch, callback):
+            data = await fetch(city, unit, city_id=city_id)
+            if callback is not None:
+                await callback(data)
+            return data
+
+        weather_task = asyncio.ensure_future(fetch_part(self.get_weather, on_weather))
+        forecast_task = asyncio.ensure_future(fetch_part(self.get_forecast_model, on_forecast))
+
+        try:
+            weather = await weather_task
+        except BaseException:
+            # Without current conditions there is nothing to show
+            forecast_task.cancel()
+            await asyncio.gather(forecast_task, return_exceptions=True)
+            raise
+
+        bundle = WeatherBundle(weather=weather, fetched_at=self.fetched_at("weather", city, city_id))
+        try:
+            bundle.forecast = await forecast_task
+        except WeatherServiceError as e:
+            bundle.forecast_error = e
+        return bundle
+
+    async def iter_weather_many(
+        self,
+        cities: Iterable[str],
+        unit: str,
+        max_concurrency: int = Config.BATCH_CONCURRENCY,
+    ) -> AsyncIterator[Tuple[str, WeatherResult]]:
+        """
+        Fetch current weather for many cities, yielding results as they complete.
+        
+        Cities that normalize to the same query are fetched once and yielded
+        once per spelling. At most ``max_concurrency`` requests are in flight.
+        Closing the iterator early cancels the outstanding requests.
+        
+        Args:
+            cities: City names
+            unit: metric, imperial, or standard
+            max_concurrency: Upper bound on simultaneous requests
+            
+        Yields:
+            ``(city, result)`` pairs where ``result`` is the weather data or
+            the ``WeatherServiceError`` raised for that city
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        spellings: Dict[str, List[str]] = OrderedDict()
+        for city in cities:
+            names = spellings.setdefault(normalize_city(city), [])
+            if city not in names:
+                names.append(city)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch_one(city: str) -> WeatherResult:
+            async with semaphore:
+                try:
+                    return await self.get_weather(city, unit)
+                except WeatherServiceError as e:
+                    return e
+
+        pending = {
+            asyncio.ensure_future(fetch_one(names[0])): names
+            for names in spellings.values()
+        }
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    for city in pending.pop(task):
+                        yield city, result
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def get_weather_many(
+        self,
+        cities: Iterable[str],
+        unit: str,
+        max_concurrency: int = Config.BATCH_CONCURRENCY,
+    ) -> "OrderedDict[str, WeatherResult]":
+        """
+        Fetch current weather for many cities with bounded concurrency.
+        
+        Args:
+            cities: City names
+            unit: metric, imperial, or standard
+            max_concurrency: Upper bound on simultaneous requests
+            
+        Returns:
+            Mapping of each city, in input order, to its weather data or to
+            the ``WeatherServiceError`` raised for it
+        """
+        cities = list(cities)
+        results = {}
+        async for city, result in self.iter_weather_many(cities, unit, max_concurrency):
+            results[city] = result
+        return OrderedDict((city, results[city]) for city in cities)